@@ -0,0 +1,2 @@
+# benchmarks : scripts de mesure de performance, à lancer depuis la racine du dépôt
+# (ex : python -m benchmarks.bench_normaliseurs)
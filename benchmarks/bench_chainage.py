@@ -0,0 +1,125 @@
+# bench_chainage.py
+#
+# Compare le chaînage des doublons (chainer_doublons) à l'ancienne boucle de propagation du plus petit
+# id jusqu'au point fixe, sur des chaînes de liens synthétiques de longueur croissante : règle d'exclusion
+# historique vectorisée (CONTRADICTION_GROUPE_ENTIER = False), qui doit donner exactement les mêmes
+# id_groupe, et union-find sur les groupes complets (True). Affiche les temps des trois.
+#
+# Avec --contradictions > 0, des étudiants distincts partagent la clé faible avec des CIN différents.
+# La règle historique teste alors la contradiction sur des chaînes encore partiellement propagées et
+# peut fusionner ces étudiants, l'union-find non : le nombre de lignes regroupées différemment est affiché.
+#
+# Usage : python -m benchmarks.bench_chainage [--lignes 200000] [--longueurs 2 8 32 128] [--contradictions 0.0]
+
+import argparse
+import io
+import time
+from contextlib import redirect_stdout, redirect_stderr
+
+import numpy as np
+import pandas as pd
+
+from student_code_manager import (
+    KEY_COLUMNS, CLE_FAIBLE, COLONNES_FORTES_CHECK, chainer_doublons, verifier_contradiction_forte
+)
+
+
+def chainer_doublons_reference(df: pd.DataFrame) -> np.ndarray:
+    """Ancienne implémentation (propagation itérative du plus petit id, un regroupement par clé et par tour)."""
+    df_temp = df[['id_temporaire'] + KEY_COLUMNS].astype({col: 'string' for col in KEY_COLUMNS})
+    while True:
+        nouvelles_fusions = 0
+        for key_col in KEY_COLUMNS:
+            df_subset = df_temp.loc[df_temp[key_col].notna()]
+            if df_subset.empty:
+                continue
+            canonical_ids = df_subset.groupby(key_col)['id_temporaire'].transform('min')
+            condition = df_subset['id_temporaire'] > canonical_ids
+            indices_valides = condition[condition].index
+            if len(indices_valides) == 0:
+                continue
+            if key_col == CLE_FAIBLE:
+                propositions = pd.DataFrame({
+                    'id_courant': df_temp.loc[indices_valides, 'id_temporaire'],
+                    'id_cible': canonical_ids.loc[indices_valides]
+                }).reset_index()
+                groupes_valides_cible_id = set()
+                for _, row in propositions.drop_duplicates(subset=['id_courant', 'id_cible']).iterrows():
+                    indices_courant = df_temp[df_temp['id_temporaire'] == row['id_courant']].index
+                    indices_cible = df_temp[df_temp['id_temporaire'] == row['id_cible']].index
+                    if not verifier_contradiction_forte(df, indices_courant.union(indices_cible), COLONNES_FORTES_CHECK):
+                        groupes_valides_cible_id.add(row['id_cible'])
+                indices_valides = propositions[propositions['id_cible'].isin(groupes_valides_cible_id)]['index']
+            df_temp.loc[indices_valides, 'id_temporaire'] = canonical_ids.loc[indices_valides]
+            nouvelles_fusions += len(indices_valides)
+        if nouvelles_fusions == 0:
+            return df_temp['id_temporaire'].to_numpy()
+
+
+# --- Données synthétiques ---
+
+def generer_chaines(nb_lignes: int, longueur: int, taux_contradiction: float = 0.0, graine: int = 0) -> pd.DataFrame:
+    """
+    Étudiants fictifs dont les inscriptions forment des chaînes de `longueur` lignes : chaque ligne
+    partage une clé forte avec la suivante (alternativement téléphone, CIN, mail...), les lignes sont
+    mélangées pour que la chaîne remonte les id dans le désordre. Une partie des lignes porte aussi la
+    clé faible, partagée par deux étudiants voisins ; une fraction `taux_contradiction` des paires a
+    des CIN différents, ce qui exerce la règle d'exclusion.
+    """
+    rng = np.random.default_rng(graine)
+    etudiants = np.arange(nb_lignes) // longueur
+    rang = np.arange(nb_lignes) % longueur
+    df = pd.DataFrame({'etudiant': etudiants, 'rang': rang}).sample(frac=1, random_state=graine).reset_index(drop=True)
+    etudiants, rang = df['etudiant'].to_numpy(), df['rang'].to_numpy()
+
+    fortes = [cle for cle in KEY_COLUMNS if cle != CLE_FAIBLE]
+    for numero, cle in enumerate(fortes):
+        # Lien entre le rang r et r + 1 porté par la clé numéro r % len(fortes) : les deux lignes ont la même valeur
+        maillon = np.where(rang % len(fortes) == numero, rang, rang - 1)
+        valeur = pd.Series([f'{cle}_{e}_{m}' for e, m in zip(etudiants, maillon)])
+        df[cle] = valeur.where((maillon >= 0) & ((maillon % len(fortes)) == numero) & (maillon < longueur - 1))
+
+    avec_cle_faible = rng.random(nb_lignes) < 0.3
+    df[CLE_FAIBLE] = pd.Series([f'NOM{e // 2}_FAC_MENTION' for e in etudiants]).where(avec_cle_faible)
+    contradictoires = rng.random(nb_lignes // longueur + 1) < taux_contradiction
+    cin = np.where(contradictoires[etudiants], etudiants, etudiants // 2)
+    df['cin'] = pd.Series([f'101{c:09d}' for c in cin]).where(rng.random(nb_lignes) < 0.5)
+    df['naissance_date'] = None
+    df['id_temporaire'] = df.index + 1
+    return df.drop(columns=['etudiant', 'rang'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chaînage des doublons (union-find / point fixe).")
+    parser.add_argument('--lignes', type=int, default=200_000)
+    parser.add_argument('--longueurs', type=int, nargs='+', default=[2, 8, 32, 128])
+    parser.add_argument('--contradictions', type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"--- ⏱️ Chaînage sur {args.lignes} lignes ---")
+    print(f"{'Longueur':>9} {'point fixe':>12} {'historique':>12} {'union-find':>12} {'gain':>9}")
+    for longueur in args.longueurs:
+        df = generer_chaines(args.lignes, longueur, args.contradictions)
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            debut = time.perf_counter()
+            attendu = chainer_doublons_reference(df)
+            temps_reference = time.perf_counter() - debut
+            debut = time.perf_counter()
+            historique = chainer_doublons(df, groupe_entier=False)
+            temps_historique = time.perf_counter() - debut
+            debut = time.perf_counter()
+            obtenu = chainer_doublons(df, groupe_entier=True)
+            temps_union_find = time.perf_counter() - debut
+        if not np.array_equal(attendu, historique):
+            raise AssertionError(f"Règle historique : id_groupe différents pour des chaînes de longueur {longueur}")
+        differentes = int((attendu != obtenu).sum())
+        if differentes and not args.contradictions:
+            raise AssertionError(f"Partitions id_groupe différentes pour des chaînes de longueur {longueur}")
+        print(f"{longueur:>9} {temps_reference:>10.3f} s {temps_historique:>10.3f} s {temps_union_find:>10.3f} s "
+              f"{temps_reference / temps_union_find:>8.1f}x"
+              + (f"   ({differentes} lignes regroupées différemment par l'union-find)" if differentes else ""))
+    print("✅ Règle historique : id_groupe identiques à l'ancienne boucle.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# bench_chaines.py
+#
+# Compare les deux moteurs de chaînes (config.MOTEUR_CHAINES) sur le nettoyage général des
+# colonnes texte et la construction des clés de chaînage : chaînes Python (object) contre
+# chaînes Arrow et noyaux compilés. Vérifie que les colonnes standardisées et les clés sont
+# identiques et affiche les temps.
+#
+# Usage : python -m benchmarks.bench_chaines [--lignes 1000000]
+
+import argparse
+import io
+import time
+from contextlib import redirect_stdout, redirect_stderr
+
+import numpy as np
+import pandas as pd
+
+import config
+import string_engine
+from normalized_columns import vider_cache_formes
+from data_cleaner import nettoyer_colonnes_texte
+from student_code_manager import KEY_COLUMNS, standardiser_champs_pour_hachage, creer_cles_de_concatenation
+
+
+# --- Données synthétiques ---
+
+def generer_donnees(nb_lignes: int, graine: int = 0) -> pd.DataFrame:
+    """
+    Génère des colonnes d'identité aux formats des exports : espaces parasites, casse mixte,
+    accents et quelques caractères dont la mise en majuscules change la longueur ('ß', 'ﬁ').
+    """
+    rng = np.random.default_rng(graine)
+
+    def tirer(valeurs, taux_manquant=0.0):
+        colonne = np.array(valeurs, dtype=object)[rng.integers(0, len(valeurs), nb_lignes)]
+        colonne[rng.random(nb_lignes) < taux_manquant] = np.nan
+        return colonne
+
+    noms = ['RAKOTO', 'Rabe ', ' randria', 'Andriamanana', 'Rasoa-Nirina', 'Hérizo', 'Straße', 'Raﬁ', 'Nantenaina']
+    prenoms = ['Jean', 'Marie Claire', ' Fanja', 'Toky', 'Éléonore', "N'Aina", 'Solo ']
+    lieux = ['Antananarivo', 'Fianarantsoa ', 'TOAMASINA', 'Mahajanga', 'Toliara', 'Antsiranana']
+    composantes = ['FAC_DEGS', 'FAC_SCIENCES', 'FAC_LETTRES', 'ENS', 'IST']
+    mentions = ['INFORMATIQUE', 'Géographie', 'DROIT', 'Mathématiques', 'Économie']
+
+    df = pd.DataFrame({
+        'nom': tirer(noms, 0.01),
+        'prenoms': tirer(prenoms, 0.05),
+        'cin_lieu': tirer(lieux, 0.3),
+        'mail': tirer(['a.b@mail.mg', ' Toky@Gmail.com', 'x_y@uni.mg'], 0.4),
+        'composante': tirer(composantes),
+        'mention': tirer(mentions, 0.1),
+    })
+    df['nom'] = df['nom'] + rng.integers(0, nb_lignes // 4 + 1, nb_lignes).astype(str)
+    df['cin'] = np.where(rng.random(nb_lignes) < 0.5,
+                         np.char.add('101-', rng.integers(100_000_000, 999_999_999, nb_lignes).astype(str)), None)
+    df['telephone'] = np.where(rng.random(nb_lignes) < 0.5,
+                               np.char.add('034 ', rng.integers(1_000_000, 9_999_999, nb_lignes).astype(str)), None)
+    jours = rng.integers(0, 10_000, nb_lignes)
+    df['naissance_date'] = (pd.Timestamp('1990-01-01') + pd.to_timedelta(jours, unit='D')).strftime('%Y-%m-%d')
+    df.loc[rng.random(nb_lignes) < 0.3, 'naissance_date'] = None
+    return df.astype(object)
+
+
+# --- Mesure ---
+
+def executer(df: pd.DataFrame, moteur: str):
+    """Nettoyage texte + standardisation + clés avec le moteur donné. Retourne (DataFrame, temps par étape)."""
+    config.MOTEUR_CHAINES = moteur
+    vider_cache_formes()  # pas de formes reprises d'un moteur à l'autre
+    temps = {}
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        for nom, etape in (('Nettoyage texte', nettoyer_colonnes_texte),
+                           ('Standardisation', standardiser_champs_pour_hachage),
+                           ('Clés de chaînage', creer_cles_de_concatenation)):
+            debut = time.perf_counter()
+            df = etape(df)
+            temps[nom] = time.perf_counter() - debut
+    return df, temps
+
+def normaliser(serie: pd.Series) -> pd.Series:
+    """Valeurs comparables entre moteurs : objets Python, valeurs manquantes à None."""
+    return serie.astype(object).where(serie.notna(), None)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs de chaînes (object / pyarrow).")
+    parser.add_argument('--lignes', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if string_engine.pa is None:
+        print("❌ pyarrow n'est pas installé : seul le moteur 'object' est disponible.")
+        return
+
+    moteur_initial = config.MOTEUR_CHAINES
+    df = generer_donnees(args.lignes)
+    try:
+        attendu, temps_object = executer(df.copy(), 'object')
+        obtenu, temps_arrow = executer(df.copy(), 'pyarrow')
+    finally:
+        config.MOTEUR_CHAINES = moteur_initial
+
+    print(f"--- ⏱️ Moteurs de chaînes sur {args.lignes} lignes ---")
+    print(f"{'Étape':<20} {'object':>12} {'pyarrow':>12} {'gain':>9}")
+    for nom in temps_object:
+        print(f"{nom:<20} {temps_object[nom]:>10.3f} s {temps_arrow[nom]:>10.3f} s "
+              f"{temps_object[nom] / temps_arrow[nom]:>8.1f}x")
+    total_object, total_arrow = sum(temps_object.values()), sum(temps_arrow.values())
+    print(f"{'Total':<20} {total_object:>10.3f} s {total_arrow:>10.3f} s {total_object / total_arrow:>8.1f}x")
+
+    colonnes = KEY_COLUMNS + ['nom_prenoms_standard'] + [col for col in attendu.columns if col.endswith('_standard')]
+    differentes = [col for col in colonnes if not normaliser(attendu[col]).equals(normaliser(obtenu[col]))]
+    if differentes:
+        raise AssertionError(f"Colonnes différentes entre les moteurs : {differentes}")
+    print("✅ Colonnes standardisées et clés identiques.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_dates.py
+#
+# Compare traiter_naissance_date / traiter_cin_date (formats explicites vectorisés, numéros de
+# série Excel, cache par valeur distincte) à l'ancienne analyse générique pd.to_datetime ligne par
+# ligne, vérifie que naissance_annee/mois/jour et cin_date sont identiques et affiche les temps.
+#
+# Usage : python -m benchmarks.bench_dates [--lignes 1000000]
+
+import argparse
+import io
+import re
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner import traiter_naissance_date, traiter_cin_date, vider_cache_valeurs_uniques
+
+
+def traiter_dates_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Ancienne implémentation (analyse générique de chaque ligne)."""
+    df['annee_vers'] = df['naissance_date'].astype(str).str.extract(r'vers\s*(\d{4})', flags=re.IGNORECASE).astype('float')
+    date_clean = pd.to_datetime(df['naissance_date'], errors='coerce', dayfirst=True, format='mixed')
+    df['naissance_annee'] = date_clean.dt.year.astype('float')
+    df['naissance_mois'] = date_clean.dt.month.astype('float')
+    df['naissance_jour'] = date_clean.dt.day.astype('float')
+    condition_vers = df['naissance_annee'].isna() & df['annee_vers'].notna()
+    df.loc[condition_vers, 'naissance_annee'] = df.loc[condition_vers, 'annee_vers']
+    for col in ['naissance_annee', 'naissance_mois', 'naissance_jour']:
+        df[col] = df[col].convert_dtypes()
+    df['cin_date'] = pd.to_datetime(df['cin_date'], errors='coerce', dayfirst=True, format='mixed').convert_dtypes()
+    return df
+
+
+def generer_donnees(nb_lignes: int, graine: int = 0) -> pd.DataFrame:
+    """
+    Mélange de cellules date Excel, de textes 'jj/mm/aaaa' (avec ou sans heure, selon l'export),
+    de 'vers AAAA' et de texte libre.
+    """
+    rng = np.random.default_rng(graine)
+    jours = pd.Timestamp('1985-01-01') + pd.to_timedelta(rng.integers(0, 7300, nb_lignes), unit='D')
+    instants = jours + pd.to_timedelta(rng.integers(0, 1440, nb_lignes), unit='min')
+    textes = jours.strftime('%d/%m/%Y').to_numpy(dtype=object)
+    textes_heure = instants.strftime('%d/%m/%Y %H:%M').to_numpy(dtype=object)
+    objets = np.array(jours.to_pydatetime(), dtype=object)
+    genre = rng.integers(0, 10, nb_lignes)
+    naissance = np.where(genre < 3, textes, np.where(genre < 5, textes_heure, objets))
+    naissance[genre == 5] = 'vers 1995'
+    naissance[genre == 6] = np.nan
+    naissance[genre == 7] = 'inconnu'
+    cin = np.where(genre < 4, textes_heure, np.where(genre < 7, textes, objets))
+    cin[genre == 8] = np.nan
+    return pd.DataFrame({'naissance_date': naissance, 'cin_date': cin}, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'analyse des dates.")
+    parser.add_argument('--lignes', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = generer_donnees(args.lignes)
+    print(f"--- ⏱️ Dates de naissance et de CIN sur {args.lignes} lignes ---")
+
+    debut = time.perf_counter()
+    attendu = traiter_dates_reference(df.copy())
+    t_ref = time.perf_counter() - debut
+
+    vider_cache_valeurs_uniques()
+    debut = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        obtenu = traiter_cin_date(traiter_naissance_date(df.copy()))
+    t_vec = time.perf_counter() - debut
+
+    colonnes = ['naissance_annee', 'naissance_mois', 'naissance_jour', 'cin_date']
+    identique = all(attendu[col].equals(obtenu[col]) for col in colonnes)
+    print(f"Analyse générique : {t_ref:.3f} s")
+    print(f"Moteur de dates   : {t_vec:.3f} s ({t_ref / t_vec:.1f}x)  {'OK' if identique else 'DIFFÉRENT'}")
+    if not identique:
+        raise AssertionError("Les dates diffèrent de la référence.")
+
+
+if __name__ == "__main__":
+    main()
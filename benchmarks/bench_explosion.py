@@ -0,0 +1,73 @@
+# bench_explosion.py
+#
+# Compare l'explosion des inscriptions par semestre par df.melt (ancienne implémentation : tableau
+# 16 fois plus haut que l'entrée, avec toutes les colonnes, filtré ensuite sur inscrit == 1) à
+# l'indexation directe des paires (ligne, semestre) lues dans le masque des semestres
+# (exploser_par_semestre). Vérifie que les deux donnent le même DataFrame (lignes, ordre, index,
+# types) et affiche les temps et le pic de mémoire résidente (memory_monitor.suivre_etape).
+#
+# Usage : python -m benchmarks.bench_explosion [--lignes 200000]
+
+import argparse
+import io
+from contextlib import redirect_stdout, redirect_stderr
+
+import pandas as pd
+
+import config
+from categorical_encoding import encoder_categoriel
+from data_cleaner import nettoyer_donnees
+from memory_monitor import suivre_etape
+from inscription_semestre_code_manager import exploser_par_semestre
+from benchmarks.generateur_classeurs import generer_inscriptions
+
+COLONNES_SEMESTRES = [f'S{i:02d}' for i in range(1, 17)]
+
+
+def exploser_par_semestre_reference(df: pd.DataFrame, semestre_cols: list) -> pd.DataFrame:
+    """Ancienne implémentation (melt sur toutes les colonnes, puis filtre inscrit == 1)."""
+    id_vars_list = [col for col in df.columns if col not in semestre_cols]
+    df_melted = df.melt(id_vars=id_vars_list, value_vars=semestre_cols, var_name='semestre_id', value_name='inscrit')
+    df_semestres = df_melted[df_melted['inscrit'] == 1]
+    del df_melted
+    df_semestres = df_semestres.drop(columns=['inscrit'])
+    if config.ENCODAGE_CATEGORIEL_ACTIF:
+        df_semestres['semestre_id'] = encoder_categoriel(df_semestres['semestre_id'])
+    return df_semestres
+
+
+def mesurer(fonction, df: pd.DataFrame):
+    """Résultat, durée et hausse du pic de RSS d'une explosion, sur une copie de df."""
+    copie = df.copy()
+    mesures = []
+    with suivre_etape(fonction.__name__, mesures):
+        resultat = fonction(copie, COLONNES_SEMESTRES)
+    return resultat, mesures[0]['duree_s'], mesures[0]['rss_pic'] - mesures[0]['rss_debut']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'explosion des inscriptions par semestre.")
+    parser.add_argument('--lignes', type=int, default=200_000)
+    args = parser.parse_args()
+
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        df = nettoyer_donnees(generer_inscriptions(args.lignes))
+    df['code_etudiant'] = 'ETU2022_' + pd.Series(range(len(df)), index=df.index).astype(str)
+    taille_entree = df.memory_usage(deep=True).sum()
+
+    attendu, temps_melt, pic_melt = mesurer(exploser_par_semestre_reference, df)
+    obtenu, temps_take, pic_take = mesurer(exploser_par_semestre, df)
+    pd.testing.assert_frame_equal(obtenu, attendu)
+    taille_sortie = obtenu.memory_usage(deep=True).sum()
+
+    print(f"--- ⏱️ Explosion par semestre : {len(df)} lignes -> {len(obtenu)} inscriptions semestrielles ---")
+    print(f"Entrée : {taille_entree / 2**20:.0f} Mo, sortie : {taille_sortie / 2**20:.0f} Mo")
+    print(f"{'':>8} {'durée':>10} {'hausse du pic RSS':>18}")
+    print(f"{'melt':>8} {temps_melt:>9.2f}s {pic_melt / 2**20:>15.0f} Mo")
+    print(f"{'take':>8} {temps_take:>9.2f}s {pic_take / 2**20:>15.0f} Mo")
+    print(f"Gain : {temps_melt / temps_take:.1f}x en durée")
+    print("✅ Résultats identiques.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench_normaliseurs.py
+#
+# Compare les normaliseurs vectorisés de data_cleaner (CIN, téléphone, préfixe mention du
+# numéro d'inscription) aux anciennes implémentations ligne par ligne (.apply), vérifie que
+# les sorties sont identiques et affiche les temps.
+#
+# Usage : python -m benchmarks.bench_normaliseurs [--lignes 1000000]
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner import formater_cin, formater_telephone
+
+
+# --- Anciennes implémentations (référence) ---
+
+def formater_cin_reference(serie: pd.Series) -> pd.Series:
+    cin_extrait = serie.astype(str).str.replace(r'[^\d]', '', regex=True).str[:12]
+
+    def formater_cin_tiret(chaine):
+        if pd.isna(chaine) or len(chaine) != 12:
+            return pd.NA
+        return f"{chaine[0:3]}-{chaine[3:6]}-{chaine[6:9]}-{chaine[9:12]}"
+
+    return cin_extrait.apply(formater_cin_tiret)
+
+def formater_telephone_reference(serie: pd.Series) -> pd.Series:
+    tel_clean = serie.astype(str).str.replace(r'[^\d]', '', regex=True)
+
+    def normaliser_numero(chaine):
+        if pd.isna(chaine) or not chaine:
+            return pd.NA
+        chaine_locale = chaine
+        if chaine.startswith('261'):
+            chaine_locale = chaine[3:]
+        if len(chaine_locale) == 9:
+            numero_normalise = '0' + chaine_locale
+        elif len(chaine_locale) == 10:
+            numero_normalise = chaine_locale
+        else:
+            return pd.NA
+        return f"{numero_normalise[0:3]} {numero_normalise[3:5]} {numero_normalise[5:8]} {numero_normalise[8:10]}"
+
+    return tel_clean.apply(normaliser_numero)
+
+def prefixe_mention_reference(mention_prefixe: pd.Series) -> pd.Series:
+    return mention_prefixe.apply(lambda x: x + '_' if x else '')
+
+def prefixe_mention_vectorise(mention_prefixe: pd.Series) -> pd.Series:
+    return (mention_prefixe + '_').where(mention_prefixe != '', '')
+
+
+# --- Données synthétiques ---
+
+def generer_donnees(nb_lignes: int, graine: int = 0) -> pd.DataFrame:
+    """Génère des CIN, téléphones et mentions aux formats rencontrés dans les exports des facultés."""
+    rng = np.random.default_rng(graine)
+    cin_chiffres = rng.integers(101_000_000_000, 599_999_999_999, nb_lignes).astype(str)
+    formats_cin = rng.integers(0, 5, nb_lignes)
+    cin = np.where(formats_cin == 0, cin_chiffres,
+          np.where(formats_cin == 1, np.char.add('CIN N° ', cin_chiffres),
+          np.where(formats_cin == 2, np.char.add(np.char.add(cin_chiffres, ' du '), '12/03/2015'),
+          np.where(formats_cin == 3, '12345', ''))))
+
+    tel_chiffres = rng.integers(320_000_000, 349_999_999, nb_lignes).astype(str)
+    formats_tel = rng.integers(0, 5, nb_lignes)
+    telephone = np.where(formats_tel == 0, np.char.add('0', tel_chiffres),
+                np.where(formats_tel == 1, np.char.add('+261 ', tel_chiffres),
+                np.where(formats_tel == 2, tel_chiffres,
+                np.where(formats_tel == 3, '034 12', ''))))
+
+    mentions = np.array(['', 'INFORMATIQUE', 'GEOGRAPHIE', 'DROIT', 'MATHEMATIQUES', '<NA>'])
+    mention = mentions[rng.integers(0, len(mentions), nb_lignes)]
+
+    df = pd.DataFrame({'cin': cin, 'telephone': telephone, 'mention': mention}, dtype=object)
+    df.loc[df['cin'] == '', 'cin'] = np.nan
+    df.loc[df['telephone'] == '', 'telephone'] = np.nan
+    return df
+
+
+# --- Mesure ---
+
+def chronometrer(fonction, *args):
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    return resultat, time.perf_counter() - debut
+
+def comparer(nom: str, reference, vectorise, serie: pd.Series) -> None:
+    attendu, t_ref = chronometrer(reference, serie)
+    obtenu, t_vec = chronometrer(vectorise, serie)
+    identique = attendu.convert_dtypes().equals(obtenu.convert_dtypes())
+    print(f"{nom:<28} {t_ref:>10.3f} s {t_vec:>10.3f} s {t_ref / t_vec:>8.1f}x  {'OK' if identique else 'DIFFÉRENT'}")
+    if not identique:
+        raise AssertionError(f"Les sorties de '{nom}' diffèrent de la référence.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des normaliseurs CIN / téléphone / numéro d'inscription.")
+    parser.add_argument('--lignes', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = generer_donnees(args.lignes)
+    print(f"--- ⏱️ Normaliseurs sur {args.lignes} lignes ---")
+    print(f"{'Étape':<28} {'.apply':>12} {'vectorisé':>12} {'gain':>9}")
+    comparer('CIN', formater_cin_reference, formater_cin, df['cin'])
+    comparer('Téléphone', formater_telephone_reference, formater_telephone, df['telephone'])
+    comparer('Préfixe mention (inscr.)', prefixe_mention_reference, prefixe_mention_vectorise, df['mention'])
+
+
+if __name__ == "__main__":
+    main()
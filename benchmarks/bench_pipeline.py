@@ -0,0 +1,149 @@
+# bench_pipeline.py
+#
+# Mesure de bout en bout le passage à l'échelle du pipeline sur des classeurs synthétiques
+# (benchmarks.generateur_classeurs) de taille croissante : chargement (charger_et_combiner_fichiers),
+# nettoyage (nettoyer_donnees), codes étudiants (gerer_code_etudiant_et_consolider), codes
+# d'inscription (gerer_code_inscription_par_semestre) et exportation, avec la durée et le pic de
+# mémoire résidente de chaque étape. Le temps par million de lignes fait ressortir les étapes qui ne
+# passent pas linéairement à l'échelle.
+#
+# Les classeurs sont générés une fois par taille dans --dossier et réutilisés ensuite ; la génération
+# des plus grandes tailles (openpyxl) est longue. Avec --sortie, les mesures sont écrites en CSV ;
+# avec --reference, elles sont comparées à un CSV précédent et les étapes plus lentes sont signalées.
+#
+# L'exportation Excel est ignorée au-delà de la limite d'une feuille (1 048 576 lignes) : c'est aussi
+# la taille à partir de laquelle l'exportation de main.py échoue.
+#
+# Usage : python -m benchmarks.bench_pipeline --dossier donnees_synthetiques
+#         [--tailles 10000 100000 1000000 5000000] [--doublons 0.3] [--chaines 0.05]
+#         [--cache] [--sortie mesures.csv] [--reference mesures_precedentes.csv]
+
+import argparse
+import io
+import os
+import shutil
+from contextlib import redirect_stdout, redirect_stderr
+
+import pandas as pd
+
+import config
+from data_cleaner import charger_et_combiner_fichiers, nettoyer_donnees, vider_cache_valeurs_uniques
+from student_code_manager import gerer_code_etudiant_et_consolider
+from inscription_semestre_code_manager import gerer_code_inscription_par_semestre
+from normalized_columns import vider_cache_formes
+from duplicate_report import ecrire_rapports_doublons
+from memory_monitor import suivre_etape
+from benchmarks.generateur_classeurs import generer_classeurs
+
+LIGNES_MAX_FEUILLE_EXCEL = 1_048_575 # 1 048 576 lignes, en-tête compris
+
+
+# --- Exécution ---
+
+def exporter(df: pd.DataFrame, chemin: str) -> pd.DataFrame:
+    """Exportation Excel telle que la fait main.py."""
+    df.to_excel(chemin, index=False)
+    return df
+
+def executer_pipeline(dossier: str, nb_processus: int, dossier_cache: str = None) -> list:
+    """
+    Enchaîne les étapes de main.py (mode complet, sans copie défensive) sur les classeurs de
+    `dossier` et retourne les mesures de chaque étape (durée, RSS, lignes produites). Les sorties
+    (exportation, rapports des doublons) sont écrites dans le sous-dossier 'sortie_bench'.
+    """
+    config.DOSSIER_SORTIE = os.path.join(dossier, 'sortie_bench')
+    mesures = []
+
+    def etape(nom, fonction, *args, **kwargs):
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()), suivre_etape(nom, mesures):
+            resultat = fonction(*args, **kwargs)
+        mesures[-1]['lignes'] = len(resultat) if resultat is not None else None
+        return resultat
+
+    df = etape('chargement', charger_et_combiner_fichiers, dossier, config.NOM_FILTRE_2023, config.NOM_FILTRE_2024,
+               config.NOM_FILTRE_2025, nb_processus=nb_processus, dossier_cache=dossier_cache)
+    df = etape('nettoyage', nettoyer_donnees, df)
+    doublons = {} if config.RAPPORT_DOUBLONS_ACTIF else None
+    df = etape('codes_etudiants', gerer_code_etudiant_et_consolider, df, hash_algorithm=config.ALGORITHME_HACHAGE_CLES,
+               doublons=doublons)
+    vider_cache_formes()
+    df = etape('codes_inscription', gerer_code_inscription_par_semestre, df, doublons=doublons)
+
+    df_export = df[[col for col in config.COLONNES_ATTENDUES if col in df.columns]]
+    del df
+    if len(df_export) <= LIGNES_MAX_FEUILLE_EXCEL:
+        chemin_sortie = os.path.join(config.DOSSIER_SORTIE, config.FICHIER_SORTIE_NETTOYEE)
+        os.makedirs(config.DOSSIER_SORTIE, exist_ok=True)
+        etape('exportation', exporter, df_export, chemin_sortie)
+    else:
+        mesures.append({'etape': 'exportation', 'duree_s': None, 'rss_pic': None, 'lignes': len(df_export)})
+    if doublons is not None:
+        etape('rapports_doublons', ecrire_rapports_doublons, doublons, config.DOSSIER_SORTIE,
+              config.FORMAT_RAPPORT_DOUBLONS, config.FICHIER_DOUBLONS_ETUDIANTS, config.FICHIER_DOUBLONS_INSCRIPTIONS)
+    return mesures
+
+
+# --- Rapport ---
+
+def afficher_mesures(mesures: pd.DataFrame, reference: pd.DataFrame = None, seuil: float = 0.2) -> None:
+    """Tableau taille × étape : durée, durée par million de lignes chargées, pic de RSS, écart à la référence."""
+    print(f"\n{'Taille':>9} {'Étape':<18} {'Durée':>10} {'s / M lignes':>13} {'Pic RSS':>10} {'Lignes':>10}")
+    for ligne in mesures.itertuples(index=False):
+        if pd.isna(ligne.duree_s):
+            print(f"{ligne.taille:>9} {ligne.etape:<18} {'n/a':>10} {'':>13} {'':>10} {ligne.lignes:>10}"
+                  "   (au-delà de la limite d'une feuille Excel)")
+            continue
+        texte = (f"{ligne.taille:>9} {ligne.etape:<18} {ligne.duree_s:>9.2f}s "
+                 f"{ligne.duree_s / ligne.taille * 1e6:>12.1f}s {ligne.rss_pic / 2**20:>7.0f} Mo {ligne.lignes:>10}")
+        if reference is not None:
+            precedente = reference[(reference['taille'] == ligne.taille) & (reference['etape'] == ligne.etape)]
+            if len(precedente) and pd.notna(precedente['duree_s'].iloc[0]) and precedente['duree_s'].iloc[0] > 0:
+                ratio = ligne.duree_s / precedente['duree_s'].iloc[0]
+                texte += f"   x{ratio:.2f}" + ("  ⚠️ plus lent" if ratio > 1 + seuil else "")
+        print(texte)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout du pipeline sur des classeurs synthétiques.")
+    parser.add_argument('--dossier', required=True, help="Dossier des classeurs générés (un sous-dossier par taille)")
+    parser.add_argument('--tailles', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--doublons', type=float, default=0.3)
+    parser.add_argument('--chaines', type=float, default=0.05)
+    parser.add_argument('--lignes-par-fichier', type=int, default=100_000)
+    parser.add_argument('--nb-processus', type=int, default=1, help="Processus de lecture des classeurs")
+    parser.add_argument('--cache', action='store_true', help="Lecture par le cache des classeurs (2e passage)")
+    parser.add_argument('--sortie', help="CSV des mesures")
+    parser.add_argument('--reference', help="CSV de mesures précédentes à comparer")
+    parser.add_argument('--seuil', type=float, default=0.2, help="Ralentissement signalé (0.2 = +20 %%)")
+    args = parser.parse_args()
+
+    resultats = []
+    for taille in args.tailles:
+        dossier = os.path.join(args.dossier, f'{taille}_lignes')
+        with redirect_stdout(io.StringIO()):
+            generer_classeurs(dossier, taille, args.doublons, args.chaines, lignes_par_fichier=args.lignes_par_fichier)
+        dossier_cache = os.path.join(dossier, 'cache_classeurs') if args.cache else None
+        if dossier_cache:
+            # Premier passage pour remplir le cache : seul le passage suivant est mesuré
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                charger_et_combiner_fichiers(dossier, config.NOM_FILTRE_2023, config.NOM_FILTRE_2024,
+                                             config.NOM_FILTRE_2025, nb_processus=args.nb_processus,
+                                             dossier_cache=dossier_cache)
+
+        print(f"--- ⏱️ Pipeline sur {taille} lignes ---")
+        vider_cache_valeurs_uniques()
+        for mesure in executer_pipeline(dossier, args.nb_processus, dossier_cache):
+            resultats.append({'taille': taille, 'etape': mesure['etape'], 'duree_s': mesure['duree_s'],
+                              'rss_pic': mesure['rss_pic'], 'lignes': mesure['lignes']})
+        shutil.rmtree(os.path.join(dossier, 'sortie_bench'), ignore_errors=True)
+
+    mesures = pd.DataFrame(resultats)
+    reference = pd.read_csv(args.reference) if args.reference else None
+    afficher_mesures(mesures, reference, args.seuil)
+    if args.sortie:
+        mesures.to_csv(args.sortie, index=False)
+        print(f"\n📝 Mesures écrites dans {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
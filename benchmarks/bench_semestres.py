@@ -0,0 +1,88 @@
+# bench_semestres.py
+#
+# Compare traiter_colonne_semestre (masque 16 bits calculé une fois par valeur distincte)
+# à l'ancienne version (ensembles Python ligne par ligne + 16 balayages .apply), vérifie que
+# les colonnes S01 à S16 marquent les mêmes semestres et affiche les temps.
+#
+# Usage : python -m benchmarks.bench_semestres [--lignes 1000000]
+
+import argparse
+import io
+import re
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner import traiter_colonne_semestre, MAPPING_NIVEAU_SEMESTRE, COLONNES_SEMESTRES
+
+
+def traiter_colonne_semestre_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """Ancienne implémentation (avant le masque de bits)."""
+    for col in COLONNES_SEMESTRES:
+        df[col] = pd.Series(0, dtype='Int64')
+
+    semestre_propre = df['semestre'].astype(str).str.upper().str.strip().replace('NAN', '')
+    semestre_propre = semestre_propre.str.replace(r'[^A-Z0-9]', ' ', regex=True)
+
+    def extraire_semestres(valeur):
+        if pd.isna(valeur) or not valeur:
+            return set()
+        matches = re.findall(r'S(\d{1,2})', valeur, re.IGNORECASE)
+        return {int(s) for s in matches if 1 <= int(s) <= 16}
+
+    df['semestres_identifies'] = semestre_propre.apply(extraire_semestres)
+    for i in range(1, 17):
+        df.loc[df['semestres_identifies'].apply(lambda s: i in s), f'S{i:02d}'] = 1
+
+    condition_pas_de_semestre = df['semestres_identifies'].apply(len) == 0
+    niveau_propre = df['niveau'].astype(str).str.upper().str.strip().replace('NAN', '')
+    for niveau, semestres in MAPPING_NIVEAU_SEMESTRE.items():
+        condition_imputation = condition_pas_de_semestre & (niveau_propre == niveau)
+        if condition_imputation.any():
+            for i in semestres:
+                df.loc[condition_imputation, f'S{i:02d}'] = 1
+
+    return df.drop(columns=['semestres_identifies'], errors='ignore')
+
+
+def generer_donnees(nb_lignes: int, graine: int = 0) -> pd.DataFrame:
+    """Libellés de semestre et niveaux tels qu'on les trouve dans les exports des facultés."""
+    rng = np.random.default_rng(graine)
+    semestres = np.array(['S1', 'S2', 'S1 et S2', 's3-s4', 'S5, S6', 'S7', 'S8', 'S9 S10',
+                          'Semestre 1', 'S1/S2/S3', '', None, 'nan'], dtype=object)
+    niveaux = np.array(['L1', 'L2', 'L3', 'M1', 'M2', 'D1', 'l1 ', None], dtype=object)
+    return pd.DataFrame({
+        'semestre': semestres[rng.integers(0, len(semestres), nb_lignes)],
+        'niveau': niveaux[rng.integers(0, len(niveaux), nb_lignes)],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du calcul des colonnes de semestre.")
+    parser.add_argument('--lignes', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = generer_donnees(args.lignes)
+    print(f"--- ⏱️ traiter_colonne_semestre sur {args.lignes} lignes ---")
+
+    debut = time.perf_counter()
+    attendu = traiter_colonne_semestre_reference(df.copy())
+    t_ref = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        obtenu = traiter_colonne_semestre(df.copy())
+    t_vec = time.perf_counter() - debut
+
+    # L'ancienne version laissait NA (et non 0) hors de la ligne d'index 0 : seul '== 1' compte en aval
+    identique = (attendu[COLONNES_SEMESTRES].eq(1).fillna(False) == obtenu[COLONNES_SEMESTRES].eq(1)).all().all()
+    print(f"Ancienne version : {t_ref:.3f} s")
+    print(f"Masque de bits   : {t_vec:.3f} s ({t_ref / t_vec:.1f}x)  {'OK' if identique else 'DIFFÉRENT'}")
+    if not identique:
+        raise AssertionError("Les semestres marqués diffèrent de la référence.")
+
+
+if __name__ == "__main__":
+    main()
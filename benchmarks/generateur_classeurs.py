@@ -0,0 +1,308 @@
+# generateur_classeurs.py
+#
+# Génère des classeurs Excel synthétiques au format des exports des facultés : noms malgaches,
+# CIN et téléphones sous leurs différentes écritures, libellés de semestre et de niveau hétérogènes,
+# dates 'vers 1990', avec un taux de doublons (réinscriptions d'un même étudiant) et un taux de
+# chaînes (étudiants dont les lignes ne se relient que de proche en proche) réglables.
+#
+# Les fichiers sont nommés avec les filtres d'année de config (ex : 'DEGS_UF2024_003.xlsx') et
+# peuvent être chargés tels quels par charger_et_combiner_fichiers. Un dossier déjà généré avec
+# les mêmes paramètres est réutilisé (manifeste 'generation.json').
+#
+# Usage : python -m benchmarks.generateur_classeurs --dossier donnees_synthetiques [--lignes 100000]
+#         [--doublons 0.3] [--chaines 0.05] [--lignes-par-fichier 100000]
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+import config
+
+NOM_MANIFESTE = 'generation.json'
+ANNEES = ['2022-2023', '2023-2024', '2024-2025']
+FILTRES_PAR_ANNEE = {
+    '2022-2023': config.NOM_FILTRE_2023,
+    '2023-2024': config.NOM_FILTRE_2024,
+    '2024-2025': config.NOM_FILTRE_2025,
+}
+
+# Briques des noms : un nom est préfixe + racine (+ suffixe), les homonymes existent comme dans les vraies listes
+PREFIXES_NOMS = ['RA', 'RAKOTO', 'RANDRIA', 'ANDRIA', 'RAZAFI', 'RABE', 'RAVELO', 'RASOA', 'RAHARI', 'RAMANANA',
+                 'RAJAONA', 'RATSIMBA', 'RAFANOMEZANTSOA', 'RAMAROSON', 'RAN']
+RACINES_NOMS = ['MANANA', 'NIRINA', 'SOA', 'TIANA', 'HERY', 'VOLOLONA', 'FENO', 'NOMENA', 'MALALA', 'TAHINA',
+                'MAHEFA', 'RIVO', 'JAONA', 'FARA', 'LALAO', 'NDRIANA', 'VELO', 'ARISOA', 'MAMPIONONA', 'HAJA']
+SUFFIXES_NOMS = ['', '', '', 'SON', 'ZAFY', 'NDRAINY', 'NIAINA', 'MANDIMBY', 'HARISOA']
+PRENOMS = ['Fanja', 'Toky', 'Hery', 'Mialy', 'Jean', 'Marie', 'Tiana', 'Haja', 'Lova', 'Njaka', 'Fitiavana',
+           'Rova', 'Andry', 'Miora', 'Nomena', 'Tsiky', 'Jean Claude', 'Marie Claire', 'Éléonore', "N'Aina",
+           'Hasina', 'Fenitra', 'Soloniaina', 'Mamy', 'Voahangy', 'Rindra', 'Faniry', 'Zo', 'Nantenaina', 'Onja']
+LIEUX = ['Fianarantsoa', 'FIANARANTSOA', 'Antananarivo', 'Ambositra', 'Ambalavao', 'Manakara', 'Ihosy',
+         'Farafangana', 'Mananjary', 'Antsirabe', 'Toliara', 'Fianar']
+
+# Composantes, mentions et parcours
+MENTIONS_PAR_COMPOSANTE = {
+    'DEGS': ['DROIT', 'ECONOMIE', 'GESTION', 'SOCIOLOGIE'],
+    'SCIENCES': ['MATHEMATIQUES', 'PHYSIQUE', 'CHIMIE', 'SCIENCES DE LA VIE'],
+    'LETTRES': ['FRANCAIS', 'ANGLAIS', 'HISTOIRE', 'GEOGRAPHIE', 'MALAGASY'],
+    'ENI': ['INFORMATIQUE'],
+    'ENS': ['SCIENCES DE L EDUCATION', 'LETTRES'],
+    'MEDECINE': ['MEDECINE HUMAINE'],
+}
+PARCOURS = ['', 'GENERAL', 'PROFESSIONNEL', 'RECHERCHE', 'GENIE LOGICIEL', 'ADMINISTRATION']
+
+# Niveaux successifs et leurs écritures, libellés de semestre possibles pour chaque niveau
+NIVEAUX = ['L1', 'L2', 'L3', 'M1', 'M2']
+ECRITURES_NIVEAU = ['{}', '{} ', '{}', '{}', ' {}']
+SEMESTRES_PAR_NIVEAU = {
+    'L1': ['S1', 'S2', 'S1 et S2', 's1-s2', 'Semestre 1', 'S1/S2', '', None],
+    'L2': ['S3', 'S4', 'S3 et S4', 's3-s4', 'S3, S4', '', None],
+    'L3': ['S5', 'S6', 'S5, S6', 'S5 S6', 'S5-S6', '', None],
+    'M1': ['S7', 'S8', 'S7 et S8', 'S7/S8', '', None],
+    'M2': ['S9', 'S10', 'S9 S10', 'S9 et S10', '', 'nan'],
+}
+SEXES = {'M': ['M', 'Masculin', 'masculin', 'H'], 'F': ['F', 'Féminin', 'feminin', 'F ']}
+SERIES_BAC = ['A1', 'A2', 'C', 'D', 'L', 'S', 'OSE', 'TECHNIQUE']
+MENTIONS_BAC = ['Passable', 'Assez Bien', 'Bien', 'Très Bien', None]
+
+
+# --- Étudiants ---
+
+def _tirer(rng, valeurs, nb: int) -> np.ndarray:
+    return np.array(valeurs, dtype=object)[rng.integers(0, len(valeurs), nb)]
+
+def generer_etudiants(nb_etudiants: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Identité de référence de chaque étudiant (une ligne par étudiant)."""
+    racines = pd.Series(_tirer(rng, RACINES_NOMS, nb_etudiants)).where(
+        rng.random(nb_etudiants) < 0.5, pd.Series(_tirer(rng, RACINES_NOMS, nb_etudiants)) + _tirer(rng, RACINES_NOMS, nb_etudiants))
+    nom = _tirer(rng, PREFIXES_NOMS, nb_etudiants) + racines + _tirer(rng, SUFFIXES_NOMS, nb_etudiants)
+    deux_prenoms = rng.random(nb_etudiants) < 0.4
+    prenoms = pd.Series(_tirer(rng, PRENOMS, nb_etudiants)).where(
+        ~deux_prenoms, pd.Series(_tirer(rng, PRENOMS, nb_etudiants)) + ' ' + _tirer(rng, PRENOMS, nb_etudiants))
+    sexe = np.where(rng.random(nb_etudiants) < 0.5, 'M', 'F')
+    naissance = pd.Timestamp('1985-01-01') + pd.to_timedelta(rng.integers(0, 20 * 365, nb_etudiants), unit='D')
+
+    # CIN à 12 chiffres (6e chiffre : 1 homme, 2 femme) ; les étudiants mineurs à l'inscription n'en ont pas
+    cin = (rng.integers(10_000, 60_000, nb_etudiants) * 10 + np.where(sexe == 'M', 1, 2)) * 1_000_000 \
+        + rng.integers(0, 1_000_000, nb_etudiants)
+    return pd.DataFrame({
+        'nom': nom.to_numpy(dtype=object),
+        'prenoms': prenoms.to_numpy(dtype=object),
+        'sexe': sexe,
+        'naissance': naissance,
+        'naissance_lieu': _tirer(rng, LIEUX, nb_etudiants),
+        'cin': np.where(rng.random(nb_etudiants) < 0.85, cin, -1),
+        'cin_date': naissance + pd.to_timedelta(18 * 365 + rng.integers(0, 900, nb_etudiants), unit='D'),
+        'cin_lieu': _tirer(rng, LIEUX, nb_etudiants),
+        'telephone': rng.choice([32, 33, 34, 38], nb_etudiants) * 10_000_000 + rng.integers(0, 10_000_000, nb_etudiants),
+        'avec_mail': rng.random(nb_etudiants) < 0.6,
+        'composante': _tirer(rng, list(MENTIONS_PAR_COMPOSANTE), nb_etudiants),
+        'premiere_annee': rng.integers(0, len(ANNEES), nb_etudiants),
+        'premier_niveau': rng.choice(len(NIVEAUX), nb_etudiants, p=[0.45, 0.2, 0.15, 0.12, 0.08]),
+        'bacc_annee': naissance.year + 18 + rng.integers(0, 3, nb_etudiants),
+        'bacc_numero': rng.integers(1_000_000, 9_999_999, nb_etudiants),
+        'bacc_serie': _tirer(rng, SERIES_BAC, nb_etudiants),
+        'bacc_mention': _tirer(rng, MENTIONS_BAC, nb_etudiants),
+    })
+
+
+# --- Écritures des exports ---
+
+def _ecrire_cin(cin: np.ndarray, rng) -> np.ndarray:
+    """CIN en nombre, en texte, espacé par groupes de 3, précédé de 'CIN N°' ou suivi de sa date."""
+    texte = pd.Series(cin).astype(str).str.zfill(12)
+    espace = texte.str[:3] + ' ' + texte.str[3:6] + ' ' + texte.str[6:9] + ' ' + texte.str[9:]
+    genre = rng.integers(0, 6, len(cin))
+    valeurs = np.select(
+        [genre == 0, genre == 1, genre == 2, genre == 3, genre == 4],
+        [cin.astype(object), texte, espace, 'CIN N° ' + texte, texte + ' du 12/03/2015'],
+        default=espace.str.replace(' ', '.', regex=False),
+    ).astype(object)
+    valeurs[cin < 0] = None
+    return valeurs
+
+def _ecrire_telephone(telephone: np.ndarray, rng) -> np.ndarray:
+    """Téléphone en nombre (zéro initial perdu), '034 12 345 67', '+261 34...' ou '0341234567'."""
+    texte = pd.Series(telephone).astype(str)
+    espace = '0' + texte.str[:2] + ' ' + texte.str[2:4] + ' ' + texte.str[4:7] + ' ' + texte.str[7:]
+    genre = rng.integers(0, 4, len(telephone))
+    return np.select(
+        [genre == 0, genre == 1, genre == 2],
+        [telephone.astype(object), espace, '+261 ' + texte.str[:2] + ' ' + texte.str[2:]],
+        default='0' + texte,
+    ).astype(object)
+
+def _ecrire_date(dates: pd.DatetimeIndex, rng, taux_vers: float = 0.0) -> np.ndarray:
+    """Date en cellule Excel, en texte 'jj/mm/aaaa' (avec ou sans heure) ou 'vers AAAA'."""
+    genre = rng.random(len(dates))
+    valeurs = np.array(dates.to_pydatetime(), dtype=object)
+    en_texte = genre < 0.4
+    valeurs[en_texte] = dates[en_texte].strftime('%d/%m/%Y')
+    avec_heure = (genre >= 0.4) & (genre < 0.5)
+    valeurs[avec_heure] = dates[avec_heure].strftime('%d/%m/%Y 00:00')
+    vers = genre >= 1 - taux_vers
+    valeurs[vers] = 'vers ' + pd.Series(dates[vers].year.astype(str)).to_numpy(dtype=object)
+    return valeurs
+
+def _casse_aleatoire(valeurs: pd.Series, rng) -> np.ndarray:
+    """Casse et espaces parasites des saisies manuelles."""
+    genre = rng.integers(0, 5, len(valeurs))
+    return np.select([genre == 0, genre == 1, genre == 2],
+                     [valeurs.str.title(), valeurs.str.lower(), ' ' + valeurs + ' '],
+                     default=valeurs).astype(object)
+
+
+# --- Inscriptions ---
+
+def generer_inscriptions(nb_lignes: int, taux_doublons: float = 0.3, taux_chaines: float = 0.05,
+                         graine: int = 0) -> pd.DataFrame:
+    """
+    Lignes brutes d'inscription (colonne 'annee_universitaire' en plus, qui sert au nommage des
+    fichiers). Une fraction `taux_doublons` des lignes sont des lignes supplémentaires d'étudiants
+    déjà présents (réinscriptions des années suivantes, ou doublons d'une même année). Une fraction
+    `taux_chaines` des étudiants n'ont ni CIN ni date de naissance, et changent alternativement de
+    téléphone et de mail d'une ligne à l'autre : leurs lignes ne se relient que de proche en proche.
+    """
+    rng = np.random.default_rng(graine)
+    nb_etudiants = max(1, int(round(nb_lignes * (1 - taux_doublons))))
+    etudiants = generer_etudiants(nb_etudiants, rng)
+
+    # Chaque étudiant a au moins une ligne ; les lignes supplémentaires sont tirées au hasard
+    numeros = np.concatenate([np.arange(nb_etudiants), rng.integers(0, nb_etudiants, nb_lignes - nb_etudiants)])
+    numeros = numeros[rng.permutation(nb_lignes)]
+    rang = pd.Series(numeros).groupby(numeros).cumcount().to_numpy()
+    e = etudiants.iloc[numeros].reset_index(drop=True)
+    en_chaine = rng.random(nb_etudiants) < taux_chaines
+    chaine = en_chaine[numeros]
+
+    # Année et niveau : une année de plus et un niveau de plus par réinscription (bornés)
+    indice_annee = np.minimum(e['premiere_annee'].to_numpy() + rang, len(ANNEES) - 1)
+    indice_niveau = np.minimum(e['premier_niveau'].to_numpy() + indice_annee - e['premiere_annee'].to_numpy(),
+                               len(NIVEAUX) - 1)
+    niveau = np.array(NIVEAUX, dtype=object)[indice_niveau]
+    semestre = np.empty(nb_lignes, dtype=object)
+    for code, libelles in SEMESTRES_PAR_NIVEAU.items():
+        lignes = niveau == code
+        semestre[lignes] = _tirer(rng, libelles, int(lignes.sum()))
+    ecriture_niveau = _tirer(rng, ECRITURES_NIVEAU, nb_lignes)
+
+    mention = np.array([MENTIONS_PAR_COMPOSANTE[c][i % len(MENTIONS_PAR_COMPOSANTE[c])]
+                        for c, i in zip(e['composante'], numeros)], dtype=object)
+
+    # Identifiants : les étudiants en chaîne changent de téléphone aux rangs impairs et de mail aux rangs pairs
+    telephone = e['telephone'].to_numpy() + np.where(chaine, (rang + 1) // 2 * 7919, 0)
+    version_mail = np.where(chaine, rang // 2, 0)
+    mail = (pd.Series(e['prenoms'].to_numpy(dtype=object)).str.split().str[0].str.lower() + '.'
+            + pd.Series(e['nom'].to_numpy(dtype=object)).str.lower()
+            + np.where(version_mail > 0, pd.Series(version_mail).astype(str), '')
+            + _tirer(rng, ['@gmail.com', '@yahoo.fr', '@univ-fianar.mg'], nb_lignes))
+    mail = mail.where(e['avec_mail'].to_numpy() | chaine)
+
+    cin = np.where(chaine, -1, e['cin'].to_numpy())
+    naissance = _ecrire_date(pd.DatetimeIndex(e['naissance']), rng, taux_vers=0.04)
+    naissance[chaine | (rng.random(nb_lignes) < 0.03)] = None
+
+    df = pd.DataFrame({
+        'annee_universitaire': np.array(ANNEES, dtype=object)[indice_annee],
+        'numero_inscription': pd.Series(rng.integers(1, 99_999, nb_lignes)).astype(str).str.zfill(5)
+                              + _tirer(rng, ['', '/', '-', ' '], nb_lignes) + niveau,
+        'composante': e['composante'].to_numpy(dtype=object),
+        'domaine': np.where(e['composante'] == 'SCIENCES', 'SCIENCES ET TECHNOLOGIES', 'SCIENCES DE LA SOCIETE'),
+        'mention': mention,
+        'parcours': _tirer(rng, PARCOURS, nb_lignes),
+        'id_Parcours': None,
+        'formation': None,
+        'hybride': _tirer(rng, ['C', 'C', 'C', 'H', 'c', None], nb_lignes),
+        'niveau': [ecriture.format(code) for ecriture, code in zip(ecriture_niveau, niveau)],
+        'semestre': semestre,
+        'nom': _casse_aleatoire(pd.Series(e['nom'].to_numpy(dtype=object)), rng),
+        'prenoms': _casse_aleatoire(pd.Series(e['prenoms'].to_numpy(dtype=object)), rng),
+        'sexe': [variantes[i % len(variantes)] for variantes, i in
+                 zip((SEXES[s] for s in e['sexe']), rng.integers(0, 4, nb_lignes))],
+        'naissance_date': naissance,
+        'naissance_lieu': e['naissance_lieu'].to_numpy(dtype=object),
+        'cin': _ecrire_cin(cin, rng),
+        'cin_date': _ecrire_date(pd.DatetimeIndex(e['cin_date']), rng),
+        'cin_lieu': e['cin_lieu'].to_numpy(dtype=object),
+        'nationalite': _tirer(rng, ['MALAGASY', 'Malagasy', 'malgache', None], nb_lignes),
+        'bacc_annee': e['bacc_annee'].to_numpy(),
+        'bacc_numero': e['bacc_numero'].to_numpy(),
+        'bacc_serie': e['bacc_serie'].to_numpy(dtype=object),
+        'bacc_centre': e['naissance_lieu'].to_numpy(dtype=object),
+        'bacc_mention': e['bacc_mention'].to_numpy(dtype=object),
+        'telephone': _ecrire_telephone(telephone, rng),
+        'mail': mail.to_numpy(dtype=object),
+    })
+    df.loc[(cin < 0) & ~chaine, 'cin_date'] = None
+    df.loc[rng.random(nb_lignes) < 0.1, 'telephone'] = None
+    df.loc[chaine, ['cin_date', 'cin_lieu']] = None
+    return df
+
+
+# --- Classeurs ---
+
+def ecrire_classeur(df: pd.DataFrame, chemin: str) -> None:
+    """Écrit un classeur d'une feuille en mode écriture seule d'openpyxl (le plus rapide)."""
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet('Feuil1')
+    feuille.append(list(df.columns))
+    for ligne in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        feuille.append(ligne)
+    classeur.save(chemin)
+
+def generer_classeurs(dossier: str, nb_lignes: int, taux_doublons: float = 0.3, taux_chaines: float = 0.05,
+                      graine: int = 0, lignes_par_fichier: int = 100_000) -> list:
+    """
+    Génère les classeurs d'inscriptions dans `dossier` : un ou plusieurs fichiers par composante et
+    par année universitaire, d'au plus `lignes_par_fichier` lignes (la limite d'une feuille Excel est
+    1 048 576 lignes). Retourne la liste des fichiers ; un dossier déjà généré avec les mêmes
+    paramètres est réutilisé sans rien réécrire.
+    """
+    parametres = {'lignes': nb_lignes, 'doublons': taux_doublons, 'chaines': taux_chaines,
+                  'graine': graine, 'lignes_par_fichier': lignes_par_fichier}
+    chemin_manifeste = os.path.join(dossier, NOM_MANIFESTE)
+    if os.path.exists(chemin_manifeste):
+        with open(chemin_manifeste, 'r', encoding='utf-8') as f:
+            manifeste = json.load(f)
+        fichiers = [os.path.join(dossier, nom) for nom in manifeste['fichiers']]
+        if manifeste['parametres'] == parametres and all(os.path.exists(f) for f in fichiers):
+            print(f"--- ♻️ Classeurs synthétiques réutilisés : {dossier} ({len(fichiers)} fichiers) ---")
+            return fichiers
+
+    os.makedirs(dossier, exist_ok=True)
+    df = generer_inscriptions(nb_lignes, taux_doublons, taux_chaines, graine)
+    fichiers = []
+    for (annee, composante), groupe in df.groupby(['annee_universitaire', 'composante'], sort=True):
+        groupe = groupe.drop(columns=['annee_universitaire'])
+        for numero, debut in enumerate(range(0, len(groupe), lignes_par_fichier), start=1):
+            chemin = os.path.join(dossier, f"{composante}{FILTRES_PAR_ANNEE[annee]}{numero:03d}.xlsx")
+            ecrire_classeur(groupe.iloc[debut:debut + lignes_par_fichier], chemin)
+            fichiers.append(chemin)
+            print(f"  > {os.path.basename(chemin)} ({min(lignes_par_fichier, len(groupe) - debut)} lignes)")
+
+    with open(chemin_manifeste, 'w', encoding='utf-8') as f:
+        json.dump({'parametres': parametres, 'fichiers': [os.path.basename(c) for c in fichiers]}, f, indent=2)
+    return fichiers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des classeurs d'inscriptions synthétiques.")
+    parser.add_argument('--dossier', required=True)
+    parser.add_argument('--lignes', type=int, default=100_000)
+    parser.add_argument('--doublons', type=float, default=0.3)
+    parser.add_argument('--chaines', type=float, default=0.05)
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--lignes-par-fichier', type=int, default=100_000)
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    fichiers = generer_classeurs(args.dossier, args.lignes, args.doublons, args.chaines, args.graine,
+                                 args.lignes_par_fichier)
+    print(f"✅ {len(fichiers)} classeurs dans {args.dossier} ({time.perf_counter() - debut:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
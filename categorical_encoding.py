@@ -0,0 +1,110 @@
+# categorical_encoding.py
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+import config
+
+
+# --- Encodage / décodage ---
+
+def est_categoriel(serie: pd.Series) -> bool:
+    return isinstance(serie.dtype, CategoricalDtype)
+
+def encoder_categoriel(serie: pd.Series) -> pd.Series:
+    """
+    Encode une colonne en catégorie (codes entiers + dictionnaire des modalités).
+    Les modalités sont triées et de type object, quel que soit le type d'origine (object,
+    'string', 'string[pyarrow]') : deux lots encodés séparément restent ainsi concaténables.
+    """
+    if est_categoriel(serie):
+        return serie
+    codes, modalites = pd.factorize(serie, sort=True)
+    modalites = pd.Index(np.asarray(modalites, dtype=object), dtype=object)
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=CategoricalDtype(modalites)),
+                     index=serie.index, name=serie.name)
+
+def encoder_colonnes_categorielles(df: pd.DataFrame, colonnes: list = None) -> pd.DataFrame:
+    """Encode en catégories les colonnes répétitives présentes (par défaut config.COLONNES_CATEGORIELLES)."""
+    colonnes = config.COLONNES_CATEGORIELLES if colonnes is None else colonnes
+    for col in colonnes:
+        if col in df.columns and not est_categoriel(df[col]):
+            df[col] = encoder_categoriel(df[col])
+    return df
+
+def decoder_colonnes_categorielles(df: pd.DataFrame) -> pd.DataFrame:
+    """Ramène les colonnes catégorielles à des chaînes (object), par exemple avant de rejouer un nettoyage."""
+    for col in df.columns:
+        if est_categoriel(df[col]):
+            df[col] = df[col].astype(object).where(df[col].notna(), pd.NA)
+    return df
+
+def concatener_dataframes(dfs: list) -> pd.DataFrame:
+    """
+    pd.concat(dfs, ignore_index=True) qui conserve les colonnes catégorielles : pandas retombe sur
+    le type object dès que les modalités diffèrent d'un DataFrame à l'autre. Les dictionnaires sont
+    d'abord unifiés (union triée des modalités), puis les codes sont simplement concaténés.
+    """
+    colonnes = []
+    for df in dfs:
+        colonnes.extend(col for col in df.columns if est_categoriel(df[col]) and col not in colonnes)
+
+    if len(dfs) > 1:
+        for col in colonnes:
+            for df in dfs:
+                if col in df.columns:
+                    df[col] = encoder_categoriel(df[col])
+            modalites = sorted(set().union(*(df[col].cat.categories for df in dfs if col in df.columns)))
+            type_commun = CategoricalDtype(pd.Index(modalites, dtype=object))
+            for df in dfs:
+                if col in df.columns and df[col].dtype != type_commun:
+                    df[col] = df[col].cat.set_categories(type_commun.categories)
+
+    return pd.concat(dfs, ignore_index=True)
+
+
+# --- Calculs sur les modalités plutôt que sur les lignes ---
+
+def appliquer_sur_modalites(serie: pd.Series, fonction) -> pd.Series:
+    """
+    Applique une transformation vectorisée (Series -> Series) aux seules modalités d'une colonne
+    catégorielle, la valeur manquante comprise (passée comme pd.NA), puis redistribue les résultats
+    par les codes. Pour une colonne non catégorielle, la transformation s'applique directement.
+    """
+    if not est_categoriel(serie):
+        return fonction(serie)
+    valeurs = pd.Series(list(serie.cat.categories) + [pd.NA], dtype=object)
+    resultats = fonction(valeurs).to_numpy(dtype=object)
+    # Le code -1 (valeur manquante) désigne le dernier élément : le résultat calculé pour pd.NA
+    return pd.Series(resultats[serie.cat.codes.to_numpy()], index=serie.index, name=serie.name)
+
+def en_texte(serie: pd.Series) -> pd.Series:
+    """
+    Équivalent de serie.astype(str) calculé une fois par modalité. Une valeur manquante donne
+    '<NA>', comme pour les colonnes de chaînes non encodées (astype(str) donnerait 'nan').
+    """
+    return appliquer_sur_modalites(serie, lambda valeurs: valeurs.astype(str))
+
+
+# --- Rapport mémoire ---
+
+def afficher_economie_memoire(df: pd.DataFrame, colonnes: list = None) -> None:
+    """Affiche, pour chaque colonne catégorielle, la mémoire occupée encodée et en chaînes (object)."""
+    colonnes = config.COLONNES_CATEGORIELLES if colonnes is None else colonnes
+    colonnes = [col for col in colonnes if col in df.columns and est_categoriel(df[col])]
+    if not colonnes:
+        return
+
+    print("\n--- 🗜️ Encodage catégoriel : mémoire par colonne ---")
+    print(f"{'Colonne':<22} {'Modalités':>9} {'Encodée':>10} {'Chaînes':>10} {'Gain':>7}")
+    total_encode = total_texte = 0
+    for col in colonnes:
+        encode = df[col].memory_usage(index=False, deep=True)
+        texte = df[col].astype(object).memory_usage(index=False, deep=True)
+        total_encode += encode
+        total_texte += texte
+        print(f"{col:<22} {len(df[col].cat.categories):>9} {encode / 1024 ** 2:>7.1f} Mo "
+              f"{texte / 1024 ** 2:>7.1f} Mo {1 - encode / texte if texte else 0:>7.0%}")
+    print(f"{'Total':<22} {'':>9} {total_encode / 1024 ** 2:>7.1f} Mo {total_texte / 1024 ** 2:>7.1f} Mo "
+          f"{1 - total_encode / total_texte if total_texte else 0:>7.0%}")
@@ -18,8 +18,121 @@ NOM_FILTRE_2025 = "_UF2025_"
 
 # Noms des fichiers de sortie
 FICHIER_SORTIE_NETTOYEE = '_UFALLTIME__KEYED.xlsx'
-FICHIER_DOUBLONS_ETUDIANTS = 'liste_doublons_etudiants.xlsx'
-FICHIER_DOUBLONS_INSCRIPTIONS = 'liste_doublons_inscriptions.xlsx'
+# Rapports des doublons (nom sans extension, cf. FORMAT_RAPPORT_DOUBLONS)
+FICHIER_DOUBLONS_ETUDIANTS = 'liste_doublons_etudiants'
+FICHIER_DOUBLONS_INSCRIPTIONS = 'liste_doublons_inscriptions'
+
+# --- 2bis. PARAMÈTRES D'EXÉCUTION ---
+
+# Nombre de processus pour la lecture parallèle des fichiers Excel (1 = lecture séquentielle).
+# Borné à 4 : chaque processus garde un classeur entier en mémoire et, sous Windows (spawn),
+# réimporte les modules du pipeline au démarrage.
+NB_PROCESSUS_CHARGEMENT = min(4, os.cpu_count() or 1)
+
+# Cache Parquet des classeurs déjà analysés (nécessite pyarrow).
+# Invalidation manuelle : python workbook_cache.py --invalider [FICHIER ...]
+CACHE_CLASSEURS_ACTIF = True
+DOSSIER_CACHE = os.path.join(DOSSIER_SORTIE, 'cache_classeurs')
+CACHE_TAILLE_MAX_MO = 2048
+
+# Nettoyage incrémental : les lignes nettoyées de chaque fichier source sont conservées dans DOSSIER_SORTIE
+# et seuls les fichiers ajoutés ou modifiés depuis la dernière exécution sont rechargés et nettoyés.
+# Le chaînage des étudiants, les codes et l'explosion par semestre restent recalculés sur toutes les lignes
+# (les codes dépendent de l'ensemble des inscriptions).
+MODE_INCREMENTAL = False
+
+# Mode flux : le nettoyage est appliqué par lots de TAILLE_LOT_NETTOYAGE lignes. Les classeurs sont lus un à un
+# et en entier : la mémoire des données brutes est bornée par un classeur, celle du nettoyage par un lot.
+# Ignoré si MODE_INCREMENTAL est actif.
+MODE_FLUX_PAR_LOTS = False
+TAILLE_LOT_NETTOYAGE = 50000
+
+# Moteur des opérations sur les chaînes (nettoyage et construction des clés) :
+# 'pyarrow' = chaînes Arrow et noyaux compilés (repli automatique sur 'object' si pyarrow est absent),
+# 'object' = chaînes Python. Les deux moteurs produisent les mêmes clés et les mêmes codes.
+MOTEUR_CHAINES = 'pyarrow'
+
+# Nombre de threads pour exécuter en parallèle les étapes de nettoyage indépendantes
+# (graphe déduit des colonnes lues/écrites par chaque étape). 1 = exécution séquentielle.
+NB_FILS_NETTOYAGE = 1
+
+# Mode mémoire économe : chaque étape prend possession du DataFrame reçu (pas de copie défensive)
+# et les DataFrames des étapes précédentes sont libérés dès qu'ils ne sont plus utiles.
+MODE_MEMOIRE_ECONOME = True
+
+# Mémoïsation des étapes de nettoyage appliquées valeur par valeur : nombre maximal de résultats
+# conservés en mémoire (éviction LRU), partagés entre les lots et les fichiers d'une même exécution.
+TAILLE_CACHE_VALEURS_UNIQUES = 500000
+
+# Cache des formes normalisées des colonnes (texte, majuscules, alphanumérique) partagé entre le nettoyage
+# et la création du code étudiant : chaque forme est calculée une fois tant que la colonne ne change pas
+# (une colonne remplacée, ou déclarée écrite par une étape de nettoyage, est recalculée).
+CACHE_FORMES_NORMALISEES_ACTIF = True
+
+# Règle d'exclusion du chaînage des étudiants : une fusion est refusée si les deux groupes portent des CIN
+# ou des dates de naissance différents. Appliquée à la seule clé faible (np_composante_mention) ou, si True,
+# à toutes les clés de chaînage.
+CONTRADICTION_TOUTES_CLES = False
+
+# Portée du test de contradiction de la règle d'exclusion. False (comportement historique) : les clés sont
+# propagées une à une et le test porte sur les lignes qui portent déjà l'id des deux groupes à ce moment,
+# même si la propagation de leur groupe n'est pas terminée : deux CIN différents peuvent alors être réunis.
+# True : le test porte sur les groupes complets formés par les autres clés (plus strict, et plus rapide).
+CONTRADICTION_GROUPE_ENTIER = False
+
+# Nombre de processus pour le chaînage des étudiants (1 = un seul processus). Les lignes sont réparties
+# en lots par nom (nom_prenoms_standard) chaînés en parallèle ; les codes étudiants sont identiques.
+NB_PROCESSUS_CHAINAGE = 1
+
+# Appariement approché des noms (optionnel) : deux lignes qui partagent une date de naissance, un CIN, un
+# téléphone ou un mail, et dont les noms se ressemblent (fautes de frappe, nom et prénoms inversés), sont
+# chaînées si leur similarité atteint le seuil. Les comparaisons sont limitées aux blocs de lignes de même
+# attribut et de même préfixe phonétique ; les blocs plus grands que TAILLE_MAX_BLOC_APPROCHE sont ignorés.
+APPARIEMENT_APPROCHE_ACTIF = False
+SEUIL_SIMILARITE_NOMS = 0.92
+TAILLE_MAX_BLOC_APPROCHE = 100
+
+# Clés de chaînage des étudiants stockées sous forme d'empreintes 64 bits (collisions détectées sur les
+# textes sources) : 'siphash' (hachage de pandas, rapide) ou tout algorithme de hashlib ('SHA256'...).
+# Le registre des codes étudiants indexe ces empreintes : changer d'algorithme impose un nouveau registre.
+ALGORITHME_HACHAGE_CLES = 'siphash'
+
+# Registre persistant des codes étudiants (SQLite) : chaque code attribué est conservé avec les clés de
+# chaînage fortes de ses inscriptions. Les exécutions suivantes retrouvent les étudiants connus par ces
+# clés et ne numérotent que les nouveaux : un code n'est jamais réattribué ni renuméroté, et une nouvelle
+# année peut être traitée seule sans recharger l'historique.
+REGISTRE_ETUDIANTS_ACTIF = False
+FICHIER_REGISTRE_ETUDIANTS = os.path.join(DOSSIER_SORTIE, 'registre_etudiants.sqlite')
+
+# Règles de survie de la consolidation des champs étudiants (étape 7), par colonne : 'premier' (par défaut,
+# première valeur renseignée dans l'ordre de chargement), 'plus_recent', 'plus_frequent', 'plus_long' ou
+# ('priorite_source', colonne, [valeurs par ordre de priorité]). Voir consolidation_engine.REGLES_SURVIE.
+# Ex : {'telephone': 'plus_recent', 'mail': 'plus_recent', 'naissance_lieu': 'plus_frequent', 'adresse': 'plus_long'}
+REGLES_CONSOLIDATION = {}
+
+# Rapports des doublons écrits par main.py dans DOSSIER_SORTIE, avec les exports : lignes sources regroupées
+# sous un même code étudiant, avec le lien (ligne liée et clé de chaînage) qui les rattache, et inscriptions
+# semestrielles en double (ligne conservée et lignes supprimées). Format 'parquet' (CSV si pyarrow est absent) ou 'csv'.
+RAPPORT_DOUBLONS_ACTIF = True
+FORMAT_RAPPORT_DOUBLONS = 'parquet'
+
+# Rapport d'exécution (durée, temps CPU, pic mémoire, lignes en entrée/sortie par étape), écrit en JSON
+# et en CSV dans DOSSIER_SORTIE. Le rapport précédent est conservé avec le suffixe '_precedent' ;
+# comparaison : python run_profiler.py rapport_execution_precedent.json rapport_execution.json
+PROFILAGE_ACTIF = True
+# Pic d'allocation par étape mesuré avec tracemalloc, en plus de la variation de RSS.
+# Coûteux : le code Python pur (export openpyxl) devient plusieurs fois plus lent.
+PROFILAGE_MEMOIRE = False
+FICHIER_RAPPORT_EXECUTION = 'rapport_execution'
+
+# Encodage catégoriel (codes entiers + dictionnaire des modalités) des colonnes très répétitives,
+# de la fin du nettoyage jusqu'à l'exportation. L'explosion par semestre les multiplie jusqu'à 16 fois.
+ENCODAGE_CATEGORIEL_ACTIF = True
+COLONNES_CATEGORIELLES = [
+    'institution_id', 'institution_nom', 'institution_type',
+    'composante', 'domaine', 'mention', 'parcours', 'id_Parcours',
+    'formation', 'niveau', 'semestre_id', 'sexe', 'annee_universitaire'
+]
 
 # --- 3. COLONNES ATTENDUES ET STRUCTURE ---
 
@@ -60,4 +173,19 @@ COLONNES_ATTENDUES = [
     
     # COLONNES OPTIONNELLES/COMMENTÉES
     #'redoublement', 'boursier','taux_bourse', 'adresse', 'pere_nom', 'pere_profession', 'mere_nom', 'mere_profession'
-]
\ No newline at end of file
+]
+
+# --- 4. LECTURE DES CLASSEURS SOURCES ---
+
+# Colonnes sources lues en plus de COLONNES_ATTENDUES (alias reconnus par le nettoyage)
+COLONNES_SOURCES_ALIAS = ['tel', 'num_inscription', 'inscription', 'hybride']
+
+# Colonnes textuelles lues directement avec le type 'str'.
+# Les colonnes numériques ou de dates (cin, telephone, numero_inscription, bacc_annee, bacc_numero,
+# naissance_date, cin_date) restent inférées par pandas : leur nettoyage dépend du type lu.
+COLONNES_LECTURE_TEXTE = [
+    'composante', 'domaine', 'mention', 'parcours', 'id_Parcours',
+    'formation', 'formation_master', 'niveau', 'semestre', 'hybride',
+    'nom', 'prenoms', 'sexe', 'naissance_lieu', 'cin_lieu', 'nationalite',
+    'bacc_serie', 'bacc_serie_technique', 'bacc_centre', 'bacc_mention', 'mail'
+]
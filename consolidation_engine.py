@@ -0,0 +1,132 @@
+# consolidation_engine.py
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from categorical_encoding import est_categoriel
+from run_profiler import compter
+
+# Règles de survie : quelle valeur d'un groupe (étudiant) est propagée à toutes ses lignes.
+#   'premier'         : première valeur renseignée dans l'ordre des lignes (ordre de chargement)
+#   'plus_recent'     : valeur renseignée de l'année universitaire la plus récente
+#   'plus_frequent'   : valeur renseignée la plus fréquente du groupe
+#   'plus_long'       : valeur renseignée la plus longue (en caractères)
+#   'priorite_source' : valeur de la ligne dont la colonne source est la mieux classée,
+#                       ex : ('priorite_source', 'composante', ['FAC_DEGS', 'FAC_SCIENCES'])
+# En cas d'égalité, la première ligne du groupe l'emporte.
+REGLES_SURVIE = ('premier', 'plus_recent', 'plus_frequent', 'plus_long', 'priorite_source')
+REGLE_PAR_DEFAUT = 'premier'
+
+
+# --- Index des groupes ---
+
+def indexer_groupes(groupes: pd.Series) -> dict:
+    """
+    Index calculé une seule fois pour toutes les agrégations par groupe : numéro de groupe de chaque
+    ligne, ordre des lignes trié par groupe (stable : l'ordre des lignes est conservé dans un groupe)
+    et début de chaque groupe dans cet ordre.
+    """
+    codes, _ = pd.factorize(groupes, use_na_sentinel=False)
+    ordre = np.argsort(codes, kind='stable')
+    codes_tries = codes[ordre]
+    debuts = np.flatnonzero(np.r_[True, codes_tries[1:] != codes_tries[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+    return {'codes': codes, 'ordre': ordre, 'debuts': debuts, 'nb_groupes': len(debuts)}
+
+def diffuser(index: dict, valeurs_par_groupe) -> np.ndarray:
+    """Valeur de son groupe pour chaque ligne."""
+    return np.asarray(valeurs_par_groupe)[index['codes']]
+
+def minimum_par_groupe(index: dict, valeurs: pd.Series) -> pd.Series:
+    """Minimum de chaque groupe diffusé à ses lignes (équivalent de transform('min'))."""
+    if not pd.api.types.is_numeric_dtype(valeurs) or valeurs.isna().any() or not len(valeurs):
+        return valeurs.groupby(index['codes']).transform('min')
+    tableau = valeurs.to_numpy()
+    minimums = np.minimum.reduceat(tableau[index['ordre']], index['debuts'])
+    return pd.Series(diffuser(index, minimums), index=valeurs.index, name=valeurs.name)
+
+
+# --- Choix de la valeur survivante ---
+
+def _valeurs_renseignees(serie: pd.Series) -> np.ndarray:
+    """Lignes porteuses d'une valeur : ni manquante, ni chaîne vide."""
+    renseignees = serie.notna().to_numpy()
+    if serie.dtype == 'object' or serie.dtype.name == 'string':
+        renseignees &= (serie != '').to_numpy(dtype=bool, na_value=False)
+    return renseignees
+
+def _rangs(df: pd.DataFrame, serie: pd.Series, renseignees: np.ndarray, index: dict, regle,
+           colonne_annee: str) -> np.ndarray:
+    """Rang de chaque ligne selon la règle (le plus petit l'emporte) ; None pour 'premier'."""
+    nom, *parametres = regle if isinstance(regle, (tuple, list)) else (regle,)
+    if nom == 'premier':
+        return None
+    if nom == 'plus_recent':
+        if colonne_annee not in df.columns:
+            return None
+        annees = pd.to_numeric(df[colonne_annee], errors='coerce').to_numpy(dtype=float)
+        return -np.nan_to_num(annees, nan=-np.inf)
+    if nom == 'plus_frequent':
+        codes_valeurs, _ = pd.factorize(serie, use_na_sentinel=True)
+        combinaisons = index['codes'].astype(np.int64) * (codes_valeurs.max(initial=0) + 1) + codes_valeurs
+        _, inverses, comptes = np.unique(np.where(renseignees, combinaisons, -1), return_inverse=True, return_counts=True)
+        return -comptes[inverses.ravel()]
+    if nom == 'plus_long':
+        return -serie.astype(str).str.len().to_numpy()
+    if nom == 'priorite_source':
+        colonne_source, priorites = parametres
+        if colonne_source not in df.columns:
+            return None
+        rang_par_valeur = {valeur: rang for rang, valeur in enumerate(priorites)}
+        return df[colonne_source].astype(object).map(rang_par_valeur).fillna(len(priorites)).to_numpy()
+    raise ValueError(f"Règle de survie inconnue : {nom!r} (attendu : {', '.join(REGLES_SURVIE)})")
+
+def lignes_survivantes(index: dict, renseignees: np.ndarray, rangs: np.ndarray = None) -> np.ndarray:
+    """
+    Pour chaque groupe, la position de la ligne retenue (-1 si aucune valeur n'est renseignée) :
+    la première ligne renseignée de l'ordre trié, ou la ligne de plus petit rang puis de plus
+    petite position.
+    """
+    if rangs is None:
+        positions = index['ordre'][renseignees[index['ordre']]]
+    else:
+        lignes = np.flatnonzero(renseignees)
+        positions = lignes[np.lexsort((lignes, rangs[lignes], index['codes'][lignes]))]
+
+    groupes = index['codes'][positions]
+    premieres = np.r_[True, groupes[1:] != groupes[:-1]] if len(groupes) else np.empty(0, dtype=bool)
+    survivantes = np.full(index['nb_groupes'], -1, dtype=np.int64)
+    survivantes[groupes[premieres]] = positions[premieres]
+    return survivantes
+
+
+# --- Consolidation ---
+
+def consolider_colonnes(df: pd.DataFrame, colonnes: list, index: dict, regles: dict = None,
+                        colonne_annee: str = 'annee_debut') -> pd.DataFrame:
+    """
+    Propage à toutes les lignes de chaque groupe la valeur survivante de chaque colonne, selon la
+    règle configurée pour la colonne (REGLE_PAR_DEFAUT sinon). Les chaînes vides comptent comme
+    des valeurs manquantes. Une colonne texte consolidée prend son type le plus précis
+    (convert_dtypes), une colonne catégorielle perd la modalité vide.
+    """
+    regles = regles or {}
+    for col in tqdm(colonnes, desc="Consolidation des valeurs non-NA"):
+        if col not in df.columns:
+            continue
+        serie = df[col]
+        est_texte = serie.dtype == 'object' or serie.dtype.name == 'string'
+        if est_categoriel(serie) and '' in serie.cat.categories:
+            serie = serie.cat.remove_categories([''])
+
+        renseignees = _valeurs_renseignees(serie)
+        regle = regles.get(col, REGLE_PAR_DEFAUT)
+        survivantes = lignes_survivantes(index, renseignees, _rangs(df, serie, renseignees, index, regle, colonne_annee))
+        if regle != REGLE_PAR_DEFAUT:
+            compter('colonnes_regle_specifique')
+
+        valeurs = serie.array.take(diffuser(index, survivantes), allow_fill=True)
+        df[col] = pd.Series(valeurs, index=df.index, name=col)
+        if est_texte:
+            df[col] = df[col].convert_dtypes()
+    return df
@@ -2,70 +2,216 @@ import pandas as pd
 import glob
 import re
 import os
+import io
+import sys
+import hashlib
+from contextlib import contextmanager, redirect_stdout
 from tqdm import tqdm
 import numpy as np
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from collections import OrderedDict
+
+import config
+import workbook_cache
+from categorical_encoding import encoder_colonnes_categorielles, decoder_colonnes_categorielles, concatener_dataframes
+from run_profiler import mesurer
+import string_engine
+from normalized_columns import forme_normalisee, invalider_formes
+
+
+# Colonnes sources réellement utilisées par le nettoyage et la codification (projection à la lecture)
+COLONNES_UTILES_CHARGEMENT = set(config.COLONNES_ATTENDUES) | set(config.COLONNES_SOURCES_ALIAS)
+TYPES_LECTURE = {col: str for col in config.COLONNES_LECTURE_TEXTE}
+
+# Signature de la lecture des classeurs : toute modification de lire_fichier_excel
+# qui change le DataFrame produit doit changer cette valeur (invalide le cache).
+SIGNATURE_LECTURE = 'feuille0:v2:' + hashlib.sha256(
+    repr((sorted(COLONNES_UTILES_CHARGEMENT), sorted(TYPES_LECTURE))).encode('utf-8')
+).hexdigest()[:16]
+
+# Projection calculée une seule fois par disposition d'en-tête distincte
+_PROJECTIONS_PAR_ENTETE = {}
 
 # --- Fonctions de chargement et combinaison ---
 
-def charger_et_combiner_fichiers(dossier_path: str, filtre_2023: str, filtre_2024: str, filtre_2025: str) -> pd.DataFrame:
+def determiner_annee_universitaire(fichier: str, filtre_2023: str, filtre_2024: str, filtre_2025: str):
     """
-    Recherche les fichiers Excel contenant les chaînes de filtre spécifiées (2023, 2024, 2025),
-    les charge, leur assigne l'année universitaire correspondante, et les combine.
-    Affiche le nom des fichiers chargés.
+    Attribue l'année universitaire d'un fichier à partir de son nom (du plus récent au plus ancien).
+    Retourne None si aucun filtre ne correspond.
+    """
+    if re.search(filtre_2025, fichier, re.IGNORECASE):
+        return '2024-2025'
+    elif re.search(filtre_2024, fichier, re.IGNORECASE):
+        return '2023-2024'
+    elif re.search(filtre_2023, fichier, re.IGNORECASE):
+        return '2022-2023'
+    return None
+
+def determiner_projection(entete: tuple):
+    """
+    Détermine, pour une disposition d'en-tête donnée, les colonnes sources à lire
+    (colonnes attendues et alias comme 'tel', 'num_inscription', 'inscription', 'hybride')
+    et leurs types déclarés. Le résultat est mémorisé par en-tête.
+    """
+    if entete not in _PROJECTIONS_PAR_ENTETE:
+        colonnes_a_lire = [col for col in entete if col in COLONNES_UTILES_CHARGEMENT]
+        types = {col: TYPES_LECTURE[col] for col in colonnes_a_lire if col in TYPES_LECTURE}
+        _PROJECTIONS_PAR_ENTETE[entete] = (colonnes_a_lire, types)
+    return _PROJECTIONS_PAR_ENTETE[entete]
+
+def lire_fichier_excel(fichier: str, annee_universitaire: str) -> pd.DataFrame:
+    """
+    Lit la première feuille d'un fichier Excel et l'étiquette avec son année universitaire.
+    Seules les colonnes utiles sont lues (les colonnes textuelles avec un type 'str' déclaré) et
+    les lignes sans nom sont écartées dès la lecture.
+    Fonction de niveau module pour pouvoir être exécutée dans un processus de travail (ProcessPoolExecutor).
+    """
+    with pd.ExcelFile(fichier) as classeur:
+        feuille = classeur.sheet_names[0]
+        entete = tuple(classeur.parse(feuille, nrows=0).columns)
+        colonnes_a_lire, types = determiner_projection(entete)
+        df = classeur.parse(feuille, usecols=colonnes_a_lire, dtype=types)
+
+    # Suppression des lignes sans nom (lignes vides ou inexploitables pour la codification)
+    if 'nom' in df.columns:
+        nom_renseigne = df['nom'].notna() & (df['nom'].astype(str).str.strip() != '')
+        df = df.loc[nom_renseigne].reset_index(drop=True)
+
+    df['annee_universitaire'] = annee_universitaire
+    return df
+
+def lister_fichiers_sources(dossier_path: str, filtre_2023: str, filtre_2024: str, filtre_2025: str) -> list:
+    """
+    Recherche récursivement les fichiers Excel contenant les chaînes de filtre spécifiées (2023, 2024, 2025).
+    Retourne la liste triée des chemins (ordre déterministe).
     """
     # Recherche récursive de fichiers
-    file_pattern_2023 = os.path.join(dossier_path, f"**\*{filtre_2023}*.xlsx")
-    file_pattern_2024 = os.path.join(dossier_path, f"**\*{filtre_2024}*.xlsx")
-    file_pattern_2025 = os.path.join(dossier_path, f"**\*{filtre_2025}*.xlsx") # Ajout du filtre 2025
+    file_pattern_2023 = os.path.join(dossier_path, '**', f"*{filtre_2023}*.xlsx")
+    file_pattern_2024 = os.path.join(dossier_path, '**', f"*{filtre_2024}*.xlsx")
+    file_pattern_2025 = os.path.join(dossier_path, '**', f"*{filtre_2025}*.xlsx") # Ajout du filtre 2025
 
     fichiers_excel_2023 = glob.glob(file_pattern_2023, recursive=True)
     fichiers_excel_2024 = glob.glob(file_pattern_2024, recursive=True)
     fichiers_excel_2025 = glob.glob(file_pattern_2025, recursive=True) # Recherche des fichiers 2025
     
-    # Combinaison des listes de fichiers (en utilisant set pour éviter les doublons)
-    fichiers_excel = list(set(fichiers_excel_2023 + fichiers_excel_2024 + fichiers_excel_2025))
+    # Combinaison des listes de fichiers (set pour éviter les doublons, tri pour un ordre déterministe)
+    return sorted(set(fichiers_excel_2023 + fichiers_excel_2024 + fichiers_excel_2025))
+
+def attribuer_annees_universitaires(fichiers_excel: list, filtre_2023: str, filtre_2024: str, filtre_2025: str) -> dict:
+    """Associe chaque fichier à son année universitaire (fichier -> année). Les fichiers sans année sont ignorés."""
+    annees_par_fichier = {}
+    for fichier in fichiers_excel:
+        annee_universitaire = determiner_annee_universitaire(fichier, filtre_2023, filtre_2024, filtre_2025)
+        if annee_universitaire:
+            annees_par_fichier[fichier] = annee_universitaire
+        else:
+            tqdm.write(f"⚠️ Fichier ignoré : {os.path.basename(fichier)} ne correspond à aucun filtre d'année universitaire.")
+    return annees_par_fichier
+
+def charger_fichiers(annees_par_fichier: dict, nb_processus: int = 1, dossier_cache: str = None, taille_max_cache_mo: int = None) -> dict:
+    """
+    Charge chaque fichier (fichier -> année universitaire) et retourne un dictionnaire fichier -> DataFrame,
+    dans l'ordre de 'annees_par_fichier'. Les fichiers en erreur sont signalés et absents du résultat.
+
+    Si nb_processus > 1, les fichiers sont lus en parallèle dans un pool de processus.
+    Si dossier_cache est fourni, les classeurs déjà analysés lors d'une exécution précédente
+    (même chemin, taille, date de modification / hash du contenu) sont relus depuis le cache
+    Parquet ; seuls les fichiers nouveaux ou modifiés sont relus depuis Excel.
+    """
+    dfs_par_fichier = {} # Résultats indexés par chemin, remis dans l'ordre d'entrée à la fin
+
+    # Consultation du cache des classeurs déjà analysés
+    utiliser_cache = dossier_cache is not None and workbook_cache.cache_disponible()
+    if dossier_cache is not None and not utiliser_cache:
+        print("⚠️ pyarrow n'est pas installé : le cache des classeurs est désactivé.")
+    index_cache = workbook_cache.charger_index(dossier_cache) if utiliser_cache else {}
+    fichiers_a_lire = {}
+
+    for fichier, annee_universitaire in annees_par_fichier.items():
+        df_cache = None
+        if utiliser_cache:
+            df_cache = workbook_cache.lire_depuis_cache(index_cache, dossier_cache, fichier, SIGNATURE_LECTURE)
+        if df_cache is not None:
+            dfs_par_fichier[fichier] = df_cache
+            tqdm.write(f"  > Fichier en cache : {os.path.basename(fichier)} ({annee_universitaire}, {len(df_cache)} lignes)")
+        else:
+            fichiers_a_lire[fichier] = annee_universitaire
+
+    if utiliser_cache:
+        print(f"--- 📦 Cache : {len(dfs_par_fichier)} fichier(s) réutilisé(s), {len(fichiers_a_lire)} à relire ---")
+        # Empreintes prises avant la lecture : un classeur modifié pendant son analyse ne sera pas
+        # mis en cache sous sa nouvelle empreinte
+        empreintes = {fichier: workbook_cache.calculer_empreinte(fichier) for fichier in fichiers_a_lire}
+
+    def enregistrer_resultat(fichier, df):
+        dfs_par_fichier[fichier] = df
+        if utiliser_cache:
+            workbook_cache.ecrire_dans_cache(index_cache, dossier_cache, fichier, df, SIGNATURE_LECTURE,
+                                             empreintes[fichier])
+        # AFFICHAGE DU NOM DU FICHIER CHARGÉ (Utilisation de tqdm.write pour ne pas perturber la barre de progression)
+        tqdm.write(f"  > Fichier chargé : {os.path.basename(fichier)} ({annees_par_fichier[fichier]}, {len(df)} lignes)")
+
+    if nb_processus > 1 and len(fichiers_a_lire) > 1:
+        print(f"--- ⚙️ Lecture parallèle sur {nb_processus} processus ---")
+        with ProcessPoolExecutor(max_workers=nb_processus) as executor:
+            futures = {
+                executor.submit(lire_fichier_excel, fichier, annee): fichier
+                for fichier, annee in fichiers_a_lire.items()
+            }
+            # Utilisation de tqdm pour la barre de progression (au fil des fichiers terminés)
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Chargement et combinaison des données"):
+                fichier = futures[future]
+                try:
+                    enregistrer_resultat(fichier, future.result())
+                except Exception as e:
+                    tqdm.write(f"⚠️ Erreur lors du chargement de {os.path.basename(fichier)}: {e}")
+    else:
+        # Utilisation de tqdm pour la barre de progression
+        for fichier, annee_universitaire in tqdm(fichiers_a_lire.items(), desc="Chargement et combinaison des données"):
+            try:
+                # Lecture de la première feuille
+                enregistrer_resultat(fichier, lire_fichier_excel(fichier, annee_universitaire))
+            except Exception as e:
+                tqdm.write(f"⚠️ Erreur lors du chargement de {os.path.basename(fichier)}: {e}")
+
+    if utiliser_cache:
+        if taille_max_cache_mo is not None:
+            evincees = workbook_cache.evincer_entrees(index_cache, dossier_cache, taille_max_cache_mo * 1024 * 1024)
+            if evincees:
+                print(f"--- 📦 Cache : {evincees} entrée(s) évincée(s) (limite {taille_max_cache_mo} Mo) ---")
+        workbook_cache.sauver_index(index_cache, dossier_cache)
+
+    return {fichier: dfs_par_fichier[fichier] for fichier in annees_par_fichier if fichier in dfs_par_fichier}
+
+def charger_et_combiner_fichiers(dossier_path: str, filtre_2023: str, filtre_2024: str, filtre_2025: str, nb_processus: int = 1,
+                                 dossier_cache: str = None, taille_max_cache_mo: int = None) -> pd.DataFrame:
+    """
+    Recherche les fichiers Excel contenant les chaînes de filtre spécifiées (2023, 2024, 2025),
+    les charge, leur assigne l'année universitaire correspondante, et les combine.
+    Affiche le nom des fichiers chargés.
+
+    Le résultat combiné suit toujours l'ordre trié des chemins de fichiers, quel que soit
+    l'ordre dans lequel les processus de lecture terminent (voir charger_fichiers).
+    """
+    fichiers_excel = lister_fichiers_sources(dossier_path, filtre_2023, filtre_2024, filtre_2025)
 
     if not fichiers_excel:
         print(f"❌ Aucun fichier Excel trouvé dans {dossier_path} avec les motifs spécifiés.")
         return pd.DataFrame()
 
     print(f"--- 📂 {len(fichiers_excel)} Fichiers à traiter (incluant les sous-dossiers) ---")
-    liste_dfs = []
-    fichiers_charges_par_annee = {} # Pour le récapitulatif
 
-    # Utilisation de tqdm pour la barre de progression
-    for fichier in tqdm(fichiers_excel, desc="Chargement et combinaison des données"):
-        annee_universitaire = None
-        nom_fichier = os.path.basename(fichier)
-        
-        # Attribution de l'année universitaire basée sur le nom du fichier (du plus récent au plus ancien)
-        if re.search(filtre_2025, fichier, re.IGNORECASE):
-            annee_universitaire = '2024-2025'
-        elif re.search(filtre_2024, fichier, re.IGNORECASE):
-            annee_universitaire = '2023-2024'
-        elif re.search(filtre_2023, fichier, re.IGNORECASE):
-            annee_universitaire = '2022-2023'
-        
-        if annee_universitaire:
-            try:
-                # Lecture de la première feuille
-                df = pd.read_excel(fichier, sheet_name=0)
-                df['annee_universitaire'] = annee_universitaire
-                liste_dfs.append(df)
-                
-                # Enregistrement pour le récapitulatif
-                if annee_universitaire not in fichiers_charges_par_annee:
-                    fichiers_charges_par_annee[annee_universitaire] = []
-                fichiers_charges_par_annee[annee_universitaire].append(nom_fichier)
-                
-                # AFFICHAGE DU NOM DU FICHIER CHARGÉ (Utilisation de tqdm.write pour ne pas perturber la barre de progression)
-                tqdm.write(f"  > Fichier chargé : {nom_fichier} ({annee_universitaire}, {len(df)} lignes)")
+    # Attribution de l'année universitaire basée sur le nom du fichier
+    annees_par_fichier = attribuer_annees_universitaires(fichiers_excel, filtre_2023, filtre_2024, filtre_2025)
+    dfs_par_fichier = charger_fichiers(annees_par_fichier, nb_processus, dossier_cache, taille_max_cache_mo)
 
-            except Exception as e:
-                tqdm.write(f"⚠️ Erreur lors du chargement de {nom_fichier}: {e}")
-        else:
-            tqdm.write(f"⚠️ Fichier ignoré : {nom_fichier} ne correspond à aucun filtre d'année universitaire.")
+    # Recombinaison dans l'ordre trié des fichiers (indépendant de l'ordre de fin des processus)
+    liste_dfs = list(dfs_par_fichier.values())
 
+    fichiers_charges_par_annee = {} # Pour le récapitulatif
+    for fichier in dfs_par_fichier:
+        fichiers_charges_par_annee.setdefault(annees_par_fichier[fichier], []).append(os.path.basename(fichier))
 
     df_final = pd.concat(liste_dfs, ignore_index=True)
     
@@ -80,15 +226,291 @@ def charger_et_combiner_fichiers(dossier_path: str, filtre_2023: str, filtre_202
     print(f"\n✅ Total des lignes chargées après combinaison : {len(df_final)}")
     return df_final
 
+def iterer_lots_bruts(dossier_path: str, filtre_2023: str, filtre_2024: str, filtre_2025: str, taille_lot: int,
+                      dossier_cache: str = None, taille_max_cache_mo: int = None):
+    """
+    Générateur de lots de lignes brutes (au plus 'taille_lot' lignes chacun), fichier par fichier
+    dans l'ordre trié des chemins. Chaque classeur est lu en entier puis découpé : la mémoire des
+    données brutes est bornée par un classeur (un seul à la fois), pas par la taille d'un lot.
+    """
+    fichiers_excel = lister_fichiers_sources(dossier_path, filtre_2023, filtre_2024, filtre_2025)
+    if not fichiers_excel:
+        print(f"❌ Aucun fichier Excel trouvé dans {dossier_path} avec les motifs spécifiés.")
+        return
+
+    print(f"--- 📂 {len(fichiers_excel)} Fichiers à traiter par lots de {taille_lot} lignes ---")
+    annees_par_fichier = attribuer_annees_universitaires(fichiers_excel, filtre_2023, filtre_2024, filtre_2025)
+
+    for fichier, annee_universitaire in annees_par_fichier.items():
+        df_fichier = charger_fichiers({fichier: annee_universitaire}, 1, dossier_cache, taille_max_cache_mo).get(fichier)
+        if df_fichier is None:
+            continue
+        for debut in range(0, len(df_fichier), taille_lot):
+            yield df_fichier.iloc[debut:debut + taille_lot]
+        del df_fichier
+
+# --------------------------------------------------------------------------
+# --- Mémoïsation par valeurs uniques ---
+
+# Résultats déjà calculés : (nom_cache, clé de la valeur) -> résultat. Éviction LRU.
+_CACHE_VALEURS_UNIQUES = OrderedDict()
+# Type (dtype) du dernier résultat calculé pour chaque nom_cache (dict colonne -> dtype pour un DataFrame)
+_TYPES_RESULTATS = {}
+_ABSENT = object()
+# Les étapes de nettoyage indépendantes peuvent s'exécuter dans des threads (nettoyer_donnees)
+_VERROU_CACHE = threading.Lock()
+
+def _cle_valeur(valeur):
+    """
+    Clé de cache d'une valeur brute. Le type fait partie de la clé (1, 1.0, '1' et True se
+    nettoient différemment) ; les valeurs manquantes sont distinguées par leur représentation
+    ('nan', 'None', '<NA>', 'NaT'), comme le fait astype(str).
+    """
+    if pd.api.types.is_scalar(valeur) and pd.isna(valeur):
+        return ('NA', str(valeur))
+    return (type(valeur), valeur)
+
+def _codes_types(valeurs) -> np.ndarray:
+    """
+    Code du type Python de chaque valeur d'une colonne object, ou None si toutes les valeurs ont le même
+    type. pd.factorize et groupby confondent les valeurs égales de types différents (1, 1.0 et True ;
+    None et NaN), qu'une étape appliquée ligne à ligne distingue : ces codes permettent de les séparer.
+    """
+    if np.asarray(valeurs).dtype != object:
+        return None
+    codes, types = pd.factorize(np.frompyfunc(type, 1, 1)(np.asarray(valeurs, dtype=object)))
+    return codes if len(types) > 1 else None
+
+def _scalaires(serie: pd.Series):
+    """Itère sur les valeurs d'une colonne de résultats (scalaires numpy pour les types numpy, plus rapide)."""
+    if isinstance(serie.dtype, np.dtype):
+        return serie.to_numpy()
+    return serie.array
+
+def _depuis_scalaires(valeurs: list, dtype):
+    """Reconstruit un tableau pandas à partir de résultats conservés dans le cache."""
+    try:
+        return pd.array(valeurs, dtype=dtype)
+    except (TypeError, ValueError):
+        return pd.array(valeurs, dtype=object)
+
+def _resoudre_par_cache(nom_cache: str, cles: list, calculer):
+    """
+    Retourne les résultats alignés sur `cles` (pd.Series, ou pd.DataFrame si l'étape calcule plusieurs
+    colonnes), en ne calculant (calculer(positions)) que les clés absentes du cache, puis met à jour
+    le cache LRU. Dans le cache, le résultat d'une clé est un scalaire, ou un tuple (un par colonne).
+    """
+    positions_trouvees, trouves, manquantes = [], [], []
+    with _VERROU_CACHE:
+        for i, cle in enumerate(cles):
+            cle_cache = (nom_cache, cle)
+            resultat = _CACHE_VALEURS_UNIQUES.get(cle_cache, _ABSENT)
+            if resultat is _ABSENT:
+                manquantes.append(i)
+            else:
+                _CACHE_VALEURS_UNIQUES.move_to_end(cle_cache)
+                positions_trouvees.append(i)
+                trouves.append(resultat)
+        types = _TYPES_RESULTATS.get(nom_cache)
+
+    morceaux = []
+    if manquantes or not cles:
+        calcules = calculer(manquantes)
+        if isinstance(calcules, pd.DataFrame):
+            types = calcules.dtypes.to_dict()
+            resultats = zip(*(_scalaires(calcules[col]) for col in calcules.columns))
+        else:
+            types = calcules.dtype
+            resultats = _scalaires(calcules)
+        with _VERROU_CACHE:
+            _TYPES_RESULTATS[nom_cache] = types
+            for i, resultat in zip(manquantes, resultats):
+                _CACHE_VALEURS_UNIQUES[(nom_cache, cles[i])] = resultat
+        morceaux.append((manquantes, calcules.reset_index(drop=True)))
+
+    if trouves:
+        if isinstance(types, dict):
+            trouves = pd.DataFrame({
+                col: _depuis_scalaires([resultat[j] for resultat in trouves], dtype)
+                for j, (col, dtype) in enumerate(types.items())
+            })
+        else:
+            trouves = pd.Series(_depuis_scalaires(trouves, types))
+        morceaux.append((positions_trouvees, trouves))
+
+    taille_max = config.TAILLE_CACHE_VALEURS_UNIQUES
+    with _VERROU_CACHE:
+        while len(_CACHE_VALEURS_UNIQUES) > taille_max:
+            _CACHE_VALEURS_UNIQUES.popitem(last=False)
+
+    if len(morceaux) == 1:
+        return morceaux[0][1]
+    ordre = np.argsort(np.concatenate([positions for positions, _ in morceaux]), kind='stable')
+    return pd.concat([tableau for _, tableau in morceaux], ignore_index=True).iloc[ordre].reset_index(drop=True)
+
+def _assembler_resultats(resultats, codes: np.ndarray, index: pd.Index, nom):
+    """Redistribue les résultats des valeurs uniques sur toutes les lignes (codes = position de la valeur unique)."""
+    if isinstance(resultats, pd.DataFrame):
+        return pd.DataFrame({col: resultats[col].array.take(codes) for col in resultats.columns}, index=index)
+    return pd.Series(resultats.array.take(codes), index=index, name=nom)
+
+def appliquer_par_valeurs_uniques(serie: pd.Series, fonction, nom_cache: str):
+    """
+    Applique une étape de nettoyage aux seules valeurs distinctes d'une colonne, puis redistribue
+    les résultats sur toutes les lignes.
+
+    `fonction` reçoit une pd.Series (valeurs uniques, même type que `serie`) et retourne une pd.Series
+    de même longueur (ou un pd.DataFrame, pour calculer plusieurs colonnes en une fois) ; le résultat
+    de chaque valeur ne doit dépendre que de cette valeur. Les résultats sont conservés dans un cache
+    LRU borné (config.TAILLE_CACHE_VALEURS_UNIQUES) : une valeur brute déjà rencontrée (lot ou fichier
+    précédent) n'est jamais renettoyée. `nom_cache` identifie l'étape (et ses paramètres éventuels,
+    ex : le préfixe appliqué).
+    """
+    codes, valeurs_uniques = pd.factorize(serie, use_na_sentinel=True)
+    valeurs_uniques = pd.Series(valeurs_uniques, name=serie.name)
+    masque_valeurs = codes != -1
+    types = _codes_types(serie.array[masque_valeurs])
+    if types is not None:
+        # Sépare les valeurs égales de types différents (1, 1.0, True), que factorize regroupe
+        codes_valeurs, _ = pd.factorize(codes[masque_valeurs].astype(np.int64) * (types.max() + 1) + types)
+        _, premiers = np.unique(codes_valeurs, return_index=True)
+        valeurs_uniques = pd.Series(serie.array[masque_valeurs].take(premiers), name=serie.name)
+        codes = codes.copy()
+        codes[masque_valeurs] = codes_valeurs
+    objets = valeurs_uniques.to_numpy(dtype=object)
+    cles = list(zip(map(type, objets), objets))
+
+    # Valeurs manquantes : factorize les regroupe, alors qu'astype(str) distingue NaN, None, pd.NA et NaT.
+    # On conserve un représentant par représentation.
+    masque_na = codes == -1
+    if masque_na.any():
+        valeurs_na = serie.array[masque_na]
+        representations = np.frompyfunc(str, 1, 1)(np.asarray(valeurs_na, dtype=object))
+        positions_na, cles_na = pd.factorize(representations)
+        _, premiers = np.unique(positions_na, return_index=True)
+        representants = pd.Series(valeurs_na.take(premiers), name=serie.name)
+        codes = codes.copy()
+        codes[masque_na] = len(valeurs_uniques) + positions_na
+        valeurs_uniques = pd.concat([valeurs_uniques, representants], ignore_index=True)
+        cles += [('NA', cle) for cle in cles_na]
+
+    resultats = _resoudre_par_cache(
+        nom_cache, cles,
+        lambda positions: fonction(valeurs_uniques.iloc[positions].reset_index(drop=True))
+    )
+    return _assembler_resultats(resultats, codes, serie.index, serie.name)
+
+def appliquer_par_combinaisons_uniques(df: pd.DataFrame, fonction, nom_cache: str) -> pd.Series:
+    """
+    Variante multi-colonnes d'appliquer_par_valeurs_uniques : `fonction` reçoit le DataFrame des
+    combinaisons distinctes des colonnes de `df` et retourne une pd.Series (une valeur par combinaison).
+    """
+    colonnes = [df[col] for col in df.columns]
+    # Les valeurs égales de types différents (1 et 1.0, None et NaN) forment des combinaisons distinctes
+    types = [_codes_types(df[col].array) for col in df.columns]
+    colonnes += [pd.Series(codes, index=df.index) for codes in types if codes is not None]
+    codes = df.groupby(colonnes, sort=False, dropna=False).ngroup().to_numpy()
+    _, premieres_lignes = np.unique(codes, return_index=True)
+    combinaisons = df.iloc[premieres_lignes].reset_index(drop=True)
+    cles = [tuple(_cle_valeur(v) for v in ligne) for ligne in combinaisons.itertuples(index=False, name=None)]
+
+    resultats = _resoudre_par_cache(
+        nom_cache, cles,
+        lambda positions: fonction(combinaisons.iloc[positions].reset_index(drop=True))
+    )
+    return _assembler_resultats(resultats, codes, df.index, None)
+
+def vider_cache_valeurs_uniques() -> None:
+    """Vide le cache des résultats par valeur unique."""
+    with _VERROU_CACHE:
+        _CACHE_VALEURS_UNIQUES.clear()
+        _TYPES_RESULTATS.clear()
+
+# --------------------------------------------------------------------------
+# --- Déclaration des étapes de nettoyage (colonnes lues / écrites) ---
+
+TOUTES_COLONNES = '*'
+
+def declarer_colonnes(lit=(), ecrit=(), lit_optionnel=()):
+    """
+    Décorateur déclarant les colonnes qu'une étape de nettoyage lit et écrit (création, modification
+    ou suppression). Chaque élément est un nom de colonne, un tuple de noms alternatifs (la première
+    colonne présente est utilisée, ex : ('telephone', 'tel')) ou TOUTES_COLONNES pour une étape qui
+    touche toutes les colonnes d'un type (elle s'exécute alors seule, après les étapes qui la précèdent).
+    Les colonnes de `lit` sont requises : l'étape est ignorée si l'une d'elles est absente.
+    Ces déclarations servent à nettoyer_donnees pour construire le graphe des dépendances.
+    """
+    def decorer(fonction):
+        fonction.colonnes_lues = tuple(lit)
+        fonction.colonnes_lues_optionnelles = tuple(lit_optionnel)
+        fonction.colonnes_ecrites = tuple(ecrit)
+        return fonction
+    return decorer
+
+def _noms_colonnes(declarations) -> set:
+    """Ensemble des noms de colonnes cités par des déclarations (alternatives comprises)."""
+    noms = set()
+    for declaration in declarations:
+        noms.update(declaration if isinstance(declaration, tuple) else (declaration,))
+    return noms
+
+def _colonnes_manquantes(etape, colonnes: pd.Index) -> list:
+    """Colonnes requises par l'étape absentes du DataFrame (pour une alternative : aucune présente)."""
+    manquantes = []
+    for declaration in etape.colonnes_lues:
+        if declaration == TOUTES_COLONNES:
+            continue
+        alternatives = declaration if isinstance(declaration, tuple) else (declaration,)
+        if not any(col in colonnes for col in alternatives):
+            manquantes.append(' | '.join(alternatives))
+    return manquantes
+
+def _en_conflit(etape_a, etape_b) -> bool:
+    """Deux étapes sont en conflit si l'une écrit une colonne que l'autre lit ou écrit."""
+    lues_a = _noms_colonnes(etape_a.colonnes_lues + etape_a.colonnes_lues_optionnelles)
+    lues_b = _noms_colonnes(etape_b.colonnes_lues + etape_b.colonnes_lues_optionnelles)
+    ecrites_a = _noms_colonnes(etape_a.colonnes_ecrites)
+    ecrites_b = _noms_colonnes(etape_b.colonnes_ecrites)
+    if TOUTES_COLONNES in (lues_a | ecrites_a | lues_b | ecrites_b):
+        return True
+    return bool(ecrites_a & (lues_b | ecrites_b)) or bool(ecrites_b & lues_a)
+
+def construire_graphe_etapes(etapes: list) -> dict:
+    """
+    Graphe des dépendances entre étapes : étape -> ensemble des étapes qui doivent la précéder.
+    Une étape dépend de toute étape antérieure (dans l'ordre de référence `etapes`) avec laquelle
+    elle est en conflit ; deux étapes sans conflit peuvent s'exécuter dans n'importe quel ordre.
+    """
+    return {
+        etape: {precedente for precedente in etapes[:position] if _en_conflit(precedente, etape)}
+        for position, etape in enumerate(etapes)
+    }
+
+def etapes_en_aval(etapes: list, graphe: dict, depart) -> list:
+    """L'étape `depart` et toutes celles qui en dépendent, directement ou non (dans l'ordre de référence)."""
+    selection = {depart}
+    for etape in etapes:
+        if graphe[etape] & selection:
+            selection.add(etape)
+    return [etape for etape in etapes if etape in selection]
+
+
 # --------------------------------------------------------------------------
 # --- Fonctions de Nettoyage Spécifiques ---
 
+@declarer_colonnes(lit=[TOUTES_COLONNES], ecrit=[TOUTES_COLONNES])
 def nettoyer_colonnes_texte(df: pd.DataFrame) -> pd.DataFrame:
     """Nettoie les colonnes de type texte (suppression des espaces et gestion de 'nan')."""
     colonnes_texte = df.select_dtypes(include=['object']).columns
 
     print("\n--- 🧹 Nettoyage Général des Colonnes Texte ---")
-    for col in tqdm(colonnes_texte, desc="Suppression des espaces (strip)"):
+    for col in tqdm(colonnes_texte, desc="Suppression des espaces (strip)", disable=_AFFICHAGE['silencieux']):
+        if string_engine.moteur_arrow():
+            # Mêmes opérations par les noyaux Arrow : la colonne reste en chaînes Arrow pour la suite
+            texte = string_engine.en_arrow(df[col])
+            texte = string_engine.supprimer_espaces(string_engine.remplacer_texte(texte, 'nan', ''))
+            df[col] = string_engine.en_serie(string_engine.vide_en_nul(texte), df.index)
+            continue
         df[col] = df[col].astype(str).str.replace('nan', '', regex=False).str.strip() 
         # Remplace les chaînes vides résultantes par la valeur manquante standard de Pandas
         # NOTE: Nous utilisons pd.NA ici pour le nettoyage général.
@@ -97,6 +519,7 @@ def nettoyer_colonnes_texte(df: pd.DataFrame) -> pd.DataFrame:
     print("✅ Espaces en début/fin et chaînes 'nan' traités.")
     return df
 
+@declarer_colonnes(lit=['annee_universitaire'], ecrit=['annee_universitaire'])
 def traiter_annee_universitaire(df: pd.DataFrame) -> pd.DataFrame:
     """
     Assure le type et gère les NaN pour la colonne 'annee_universitaire'.
@@ -105,13 +528,18 @@ def traiter_annee_universitaire(df: pd.DataFrame) -> pd.DataFrame:
     print("\n--- 🎓 Traitement de l'Année Universitaire ---")
 
     if 'annee_universitaire' in df.columns:
-        # Convertir en chaîne, supprimer les espaces de bord et mettre en majuscule
-        df['annee_universitaire'] = df['annee_universitaire'].astype(str).str.strip().str.upper()
-        
-        # Supprimer TOUS les espaces internes pour l'uniformité du hachage
-        df['annee_universitaire'] = df['annee_universitaire'].apply(
-            lambda x: re.sub(r'\s+', '', str(x)) if pd.notna(x) else x
-        ).replace('NAN', pd.NA).replace('', pd.NA) # Nettoyer les 'NAN' et les chaînes vides restantes
+        def uniformiser_annee(valeurs: pd.Series) -> pd.Series:
+            # Convertir en chaîne, supprimer les espaces de bord et mettre en majuscule
+            valeurs = valeurs.astype(str).str.strip().str.upper()
+            # Supprimer TOUS les espaces internes pour l'uniformité du hachage
+            valeurs = valeurs.str.replace(r'\s+', '', regex=True)
+            # Nettoyer les 'NAN' et les chaînes vides restantes
+            return valeurs.replace('NAN', pd.NA).replace('', pd.NA)
+
+        # Calcul sur les valeurs distinctes uniquement (quelques années pour toutes les lignes)
+        df['annee_universitaire'] = appliquer_par_valeurs_uniques(
+            df['annee_universitaire'], uniformiser_annee, 'annee_universitaire'
+        )
         
         # Gestion des NaN
         condition_nan_ou_vide = df['annee_universitaire'].isna()
@@ -124,6 +552,7 @@ def traiter_annee_universitaire(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+@declarer_colonnes(lit=['bacc_annee'], ecrit=['bacc_annee'])
 def traiter_annee_bac(df: pd.DataFrame) -> pd.DataFrame:
     """Convertit la colonne 'bacc_annee' en entier (nullable), gérant les erreurs."""
     print("\n--- 🎓 Traitement de l'Année du BAC (bacc_annee) ---")
@@ -145,6 +574,7 @@ def traiter_annee_bac(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+@declarer_colonnes(lit=['bacc_numero'], ecrit=['bacc_numero'])
 def nettoyer_bacc_numero(df: pd.DataFrame) -> pd.DataFrame:
     """
     Nettoie la colonne 'bacc_numero'. Ne conserve que les valeurs composées de 7 chiffres exacts,
@@ -173,6 +603,94 @@ def nettoyer_bacc_numero(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+# --- Analyse des dates ---
+
+# Formats explicites essayés dans l'ordre, chacun en une passe vectorisée sur les valeurs textuelles
+# restantes. Ils donnent exactement la même date que l'analyse générique (dayfirst=True), qui traite
+# les formats avec heure ou séparateurs variés date par date (dateutil) ; les formats ambigus pour
+# l'analyse générique (années sur 2 chiffres, mois en toutes lettres...) sont laissés au repli.
+FORMATS_DATES = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%d/%m/%Y',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%Y/%m/%d',
+]
+
+# Numéros de série Excel (jours depuis le 30/12/1899) acceptés : du 01/01/1910 au 31/12/9999.
+# Les petits nombres ne sont pas des dates plausibles : un entier de 1900 à 2100 est une année
+# saisie seule (comme le texte '1995', il donne le 1er janvier), les autres deviennent NaT.
+ORIGINE_SERIE_EXCEL = '1899-12-30'
+SERIE_EXCEL_MIN, SERIE_EXCEL_MAX = 3653, 2958465
+ANNEE_SEULE_MIN, ANNEE_SEULE_MAX = 1900, 2100
+
+def _regex_format_date(format_date: str) -> str:
+    """Regex des textes pouvant correspondre à un format strptime (ex : '%d/%m/%Y' -> '\\d{1,2}/\\d{1,2}/\\d{4}')."""
+    directives = {'%d': r'\d{1,2}', '%m': r'\d{1,2}', '%Y': r'\d{4}', '%H': r'\d{1,2}', '%M': r'\d{1,2}', '%S': r'\d{1,2}'}
+    morceaux = re.split(r'(%[dmYHMS])', format_date)
+    return ''.join(directives.get(morceau, re.escape(morceau)) for morceau in morceaux)
+
+def analyser_dates(valeurs: pd.Series) -> pd.Series:
+    """
+    Convertit une colonne de dates brutes (objets date Excel, numéros de série Excel, textes
+    'jj/mm/aaaa'...) en datetime64. Les valeurs non identifiables deviennent NaT.
+
+    1. Les objets date/heure sont repris tels quels.
+    2. Les nombres sont décodés comme numéros de série Excel (à partir de 1910) ; les entiers de
+       1900 à 2100 sont des années seules (1er janvier, comme le texte '1995').
+    3. Les textes sont essayés avec chaque format de FORMATS_DATES, par passes vectorisées.
+    4. Les textes restants passent par l'analyse générique (format='mixed', dayfirst=True).
+    Prévu pour être appliqué aux valeurs distinctes (appliquer_par_valeurs_uniques).
+    """
+    valeurs = valeurs.reset_index(drop=True).astype(object)
+    resultat = pd.Series(pd.NaT, index=valeurs.index, dtype='datetime64[ns]')
+    types = valeurs.map(type)
+
+    # 1. Objets date/heure
+    est_date = valeurs.map(lambda v: isinstance(v, (pd.Timestamp, np.datetime64)) or hasattr(v, 'year'))
+    if est_date.any():
+        resultat[est_date] = pd.to_datetime(valeurs[est_date], errors='coerce')
+
+    # 2. Numéros de série Excel et années seules (les autres nombres restent NaT)
+    est_nombre = types.isin([int, float, np.int64, np.float64]) & valeurs.notna()
+    if est_nombre.any():
+        nombres = valeurs[est_nombre].astype(float)
+        est_serie = est_nombre.copy()
+        est_serie.loc[est_nombre] = nombres.between(SERIE_EXCEL_MIN, SERIE_EXCEL_MAX).to_numpy()
+        resultat[est_serie] = pd.to_datetime(
+            valeurs[est_serie].astype(float), unit='D', origin=ORIGINE_SERIE_EXCEL
+        ).dt.round('s')
+        est_annee = est_nombre.copy()
+        est_annee.loc[est_nombre] = (nombres.between(ANNEE_SEULE_MIN, ANNEE_SEULE_MAX) & (nombres % 1 == 0)).to_numpy()
+        resultat[est_annee] = pd.to_datetime(valeurs[est_annee].astype(float).astype(int).astype(str), format='%Y')
+
+    # 3. Formats explicites, dans l'ordre de FORMATS_DATES. Un filtre regex (vectorisé) écarte d'abord
+    # les textes qui ne peuvent pas avoir ce format : seuls les candidats passent par l'analyse stricte.
+    restants = ~(est_date | est_nombre) & types.eq(str)
+    textes = _chaines_vectorisees(valeurs[restants])
+    for format_date in FORMATS_DATES:
+        if textes.empty:
+            break
+        candidats = textes[textes.str.fullmatch(_regex_format_date(format_date))]
+        dates = pd.to_datetime(candidats.astype(object), format=format_date, errors='coerce').dropna()
+        resultat[dates.index] = dates
+        textes = textes.drop(dates.index)
+
+    # 4. Repli : analyse générique, valeur par valeur, pour le reste (textes libres...)
+    restants = ~(est_date | est_nombre) & resultat.isna() & valeurs.notna()
+    if restants.any():
+        resultat[restants] = pd.to_datetime(valeurs[restants], errors='coerce', dayfirst=True, format='mixed')
+
+    return resultat
+
+def extraire_annee_vers(valeurs: pd.Series) -> pd.Series:
+    """Extrait l'année des mentions textuelles du type 'vers 1990' (float, NaN sinon)."""
+    return valeurs.astype(str).str.extract(r'vers\s*(\d{4})', flags=re.IGNORECASE)[0].astype('float')
+
+@declarer_colonnes(lit=['naissance_date'], ecrit=['naissance_date', 'naissance_annee', 'naissance_mois', 'naissance_jour'])
 def traiter_naissance_date(df: pd.DataFrame) -> pd.DataFrame:
     """
     Traite 'naissance_date': extrait l'année des mentions textuelles ("vers 1990")
@@ -181,14 +699,18 @@ def traiter_naissance_date(df: pd.DataFrame) -> pd.DataFrame:
     print("\n--- 📅 Traitement de la Date de Naissance ('naissance_date') ---")
     if 'naissance_date' in df.columns:
         # Gère les cas "vers 1990" en extrayant l'année
-        df['annee_vers'] = df['naissance_date'].astype(str).str.extract(r'vers\s*(\d{4})', flags=re.IGNORECASE).astype('float')
-
-        # Convertit la colonne de date principale, en gérant les erreurs
-        df['naissance_date_clean'] = pd.to_datetime(
+        # et convertit la colonne de date principale, en gérant les erreurs. Chaque valeur est analysée
+        # indépendamment (résultat local à la ligne), une seule fois par valeur distincte
+        dates = appliquer_par_valeurs_uniques(
             df['naissance_date'],
-            errors='coerce',
-            dayfirst=True 
+            lambda valeurs: pd.DataFrame({
+                'naissance_date_clean': analyser_dates(valeurs),
+                'annee_vers': extraire_annee_vers(valeurs),
+            }),
+            'naissance_date'
         )
+        df['annee_vers'] = dates['annee_vers']
+        df['naissance_date_clean'] = dates['naissance_date_clean']
 
         df['naissance_annee'] = df['naissance_date_clean'].dt.year.astype('float')
         df['naissance_mois'] = df['naissance_date_clean'].dt.month.astype('float')
@@ -211,6 +733,7 @@ def traiter_naissance_date(df: pd.DataFrame) -> pd.DataFrame:
         print("⚠️ Colonne 'naissance_date' non trouvée.")
     return df
 
+@declarer_colonnes(lit=['cin_date'], ecrit=['cin_date'])
 def traiter_cin_date(df: pd.DataFrame) -> pd.DataFrame:
     """
     Traite 'cin_date': conversion stricte en date (dayfirst=True). 
@@ -220,11 +743,8 @@ def traiter_cin_date(df: pd.DataFrame) -> pd.DataFrame:
     
     if 'cin_date' in df.columns:
         # Convertit la colonne en date. 'errors='coerce'' met NaT (qui devient pd.NA) si non identifiable.
-        df['cin_date'] = pd.to_datetime(
-            df['cin_date'],
-            errors='coerce', # <-- Met NaT si la date est non identifiable
-            dayfirst=True 
-        )
+        # Analyse valeur par valeur (pas de format déduit de la première ligne), une seule fois par valeur distincte
+        df['cin_date'] = appliquer_par_valeurs_uniques(df['cin_date'], analyser_dates, 'dates')
         # S'assurer que le type est bien datetime nullable
         df['cin_date'] = df['cin_date'].convert_dtypes() 
         
@@ -235,23 +755,25 @@ def traiter_cin_date(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+@declarer_colonnes(lit=['sexe'], ecrit=['sexe'])
 def standardiser_sexe(df: pd.DataFrame) -> pd.DataFrame:
     """Standardise la colonne 'sexe' en 'Féminin' ou 'Masculin', en conservant les valeurs manquantes."""
     print("\n--- ♀️♂️ Standardisation de la Colonne 'sexe' ---")
     
     if 'sexe' in df.columns:
-        col_sexe = df['sexe'].astype(str).str.upper().str.strip()
-        col_sexe = col_sexe.replace('NAN', pd.NA)
+        def standardiser(valeurs: pd.Series) -> pd.Series:
+            col_sexe = valeurs.astype(str).str.upper().str.strip()
+            col_sexe = col_sexe.replace('NAN', pd.NA)
 
-        # Assumer que toutes les valeurs non vides par défaut sont Masculin, sauf correction
-        df['sexe_standard'] = np.where(col_sexe.notna(), 'Masculin', col_sexe)
-        
-        # Correction pour les cas féminins (F, FÉMININ, etc.)
-        condition_feminin = col_sexe.str.contains(r'F|FÉMININ', na=False) 
-        df.loc[condition_feminin, 'sexe_standard'] = 'Féminin'
-        
-        df['sexe'] = df['sexe_standard'].convert_dtypes()
-        df = df.drop(columns=['sexe_standard'], errors='ignore')
+            # Assumer que toutes les valeurs non vides par défaut sont Masculin, sauf correction
+            sexe_standard = pd.Series(np.where(col_sexe.notna(), 'Masculin', col_sexe), index=valeurs.index)
+
+            # Correction pour les cas féminins (F, FÉMININ, etc.)
+            condition_feminin = col_sexe.str.contains(r'F|FÉMININ', na=False)
+            sexe_standard[condition_feminin] = 'Féminin'
+            return sexe_standard
+
+        df['sexe'] = appliquer_par_valeurs_uniques(df['sexe'], standardiser, 'sexe').convert_dtypes()
         
         print("✅ Colonne 'sexe' standardisée.")
     else:
@@ -259,6 +781,7 @@ def standardiser_sexe(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+@declarer_colonnes(lit=['hybride', 'formation'], ecrit=['formation', 'hybride'])
 def traiter_formation_hybride(df: pd.DataFrame) -> pd.DataFrame:
     """Utilise la colonne 'hybride' (C ou H) pour renseigner la colonne 'formation'."""
     print("\n--- 🔄 Renseignement de 'formation' par 'hybride' ---")
@@ -282,6 +805,7 @@ def traiter_formation_hybride(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+@declarer_colonnes(ecrit=['institution_id', 'institution_nom', 'institution_type'])
 def ajouter_colonnes_institutionnelles(df: pd.DataFrame) -> pd.DataFrame:
     """
     Ajoute les colonnes institutionnelles constantes (ID, Nom, Type)
@@ -307,6 +831,7 @@ def ajouter_colonnes_institutionnelles(df: pd.DataFrame) -> pd.DataFrame:
     print(f"✅ Colonnes institutionnelles créées : ID={INSTITUTION_ID}, Nom={INSTITUTION_NOM}, Type={INSTITUTION_TYPE}.")
     return df
 
+@declarer_colonnes(lit=['composante', 'institution_id'], ecrit=['composante'])
 def prefixer_composante(df: pd.DataFrame) -> pd.DataFrame:
     """
     Préfixe la colonne 'composante' par 'institution_id' suivi d'un underscore,
@@ -316,31 +841,37 @@ def prefixer_composante(df: pd.DataFrame) -> pd.DataFrame:
     print(f"\n--- 🔗 Préfixage de '{col}' par 'institution_id' ---")
 
     if col in df.columns and 'institution_id' in df.columns:
-        # Assurer que 'composante' est un type de chaîne pour le nettoyage
-        df[col] = df[col].astype(str).str.upper().str.strip()
-
         # Créer le préfixe
         # On utilise iloc[0] car institution_id est constant sur toutes les lignes
         prefixe = df['institution_id'].iloc[0] + '_'
-        
-        # Identifier les valeurs non nulles dans 'composante' (après nettoyage)
-        condition_non_na = df[col].notna() & (df[col] != 'NAN') & (df[col] != '')
 
-        # Appliquer le préfixe
-        df.loc[condition_non_na, col] = prefixe + df.loc[condition_non_na, col]
-        
-        # Mettre les valeurs qui étaient nulles/vides après nettoyage à pd.NA
-        df.loc[~condition_non_na, col] = pd.NA
+        def prefixer(valeurs: pd.Series) -> pd.Series:
+            # Assurer que 'composante' est un type de chaîne pour le nettoyage
+            valeurs = valeurs.astype(str).str.upper().str.strip()
+
+            # Identifier les valeurs non nulles dans 'composante' (après nettoyage)
+            condition_non_na = valeurs.notna() & (valeurs != 'NAN') & (valeurs != '')
+
+            # Appliquer le préfixe ; les valeurs nulles/vides après nettoyage deviennent pd.NA
+            return pd.DataFrame({
+                'composante': (prefixe + valeurs).where(condition_non_na, pd.NA),
+                'prefixee': condition_non_na,
+            })
+
+        # Calcul sur les composantes distinctes uniquement (le préfixe fait partie de la clé de cache)
+        resultats = appliquer_par_valeurs_uniques(df[col], prefixer, f'composante:{prefixe}')
+        df[col] = resultats['composante'].to_numpy()
         
         df[col] = df[col].convert_dtypes()
         
-        valeurs_prefixees = condition_non_na.sum()
+        valeurs_prefixees = int(resultats['prefixee'].sum())
         print(f"✅ {col} préfixé avec succès. ({valeurs_prefixees} lignes mises à jour)")
     else:
         print(f"⚠️ Colonne '{col}' ou 'institution_id' manquante. Traitement ignoré.")
         
     return df
 
+@declarer_colonnes(lit=['id_Parcours', 'composante', 'mention', 'parcours'], ecrit=['id_Parcours'])
 def imputer_id_parcours(df: pd.DataFrame) -> pd.DataFrame:
     """Impute les valeurs manquantes de 'id_Parcours' par concaténation: composante_mention_parcours."""
     print("\n--- 🧩 Imputation de 'id_Parcours' ---")
@@ -353,16 +884,20 @@ def imputer_id_parcours(df: pd.DataFrame) -> pd.DataFrame:
     # NOTE: La colonne 'composante' doit être déjà préfixée à cette étape.
     condition_manquant = df['id_Parcours'].isna() 
 
-    sources = df.loc[condition_manquant, ['composante', 'mention', 'parcours']].copy()
-    
-    # Prétraitement des sources pour la concaténation
-    sources = sources.fillna('').astype(str).apply(lambda x: x.str.upper().str.strip())
-    
-    # Concaténation. Si 'composante' est déjà préfixée, l'id_Parcours imputé le sera aussi.
-    nouveaux_ids = sources['composante'] + '_' + sources['mention'] + '_' + sources['parcours']
-    
-    # Supprime les IDs inutiles comme "__" ou "_"
-    nouveaux_ids = nouveaux_ids.str.replace(r'(_+)', '_', regex=True).str.strip('_').replace('', pd.NA)
+    def construire_ids(sources: pd.DataFrame) -> pd.Series:
+        # Prétraitement des sources pour la concaténation
+        sources = sources.fillna('').astype(str).apply(lambda x: x.str.upper().str.strip())
+
+        # Concaténation. Si 'composante' est déjà préfixée, l'id_Parcours imputé le sera aussi.
+        nouveaux_ids = sources['composante'] + '_' + sources['mention'] + '_' + sources['parcours']
+
+        # Supprime les IDs inutiles comme "__" ou "_"
+        return nouveaux_ids.str.replace(r'(_+)', '_', regex=True).str.strip('_').replace('', pd.NA)
+
+    # Calcul sur les combinaisons (composante, mention, parcours) distinctes uniquement
+    nouveaux_ids = appliquer_par_combinaisons_uniques(
+        df.loc[condition_manquant, ['composante', 'mention', 'parcours']], construire_ids, 'id_Parcours'
+    )
 
     df.loc[condition_manquant, 'id_Parcours'] = nouveaux_ids
     
@@ -373,6 +908,7 @@ def imputer_id_parcours(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
+@declarer_colonnes(lit=['id_Parcours', 'institution_id'], ecrit=['id_Parcours'])
 def prefixer_id_parcours_final(df: pd.DataFrame) -> pd.DataFrame:
     """
     Préfixe la colonne 'id_Parcours' par 'institution_id' suivi d'un underscore,
@@ -411,6 +947,30 @@ def prefixer_id_parcours_final(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+def _chaines_vectorisees(serie: pd.Series) -> pd.Series:
+    """
+    Convertit une colonne en texte exactement comme astype(str) ('nan' pour les valeurs manquantes),
+    en chaînes Arrow avec le moteur 'pyarrow' (config.MOTEUR_CHAINES) : les opérations .str y sont
+    exécutées en code compilé au lieu d'une boucle Python par ligne.
+    """
+    if string_engine.moteur_arrow():
+        return string_engine.en_serie(string_engine.en_arrow(serie), serie.index, serie.name)
+    return serie.astype(str)
+
+def formater_cin(serie: pd.Series) -> pd.Series:
+    """
+    Version vectorisée du formatage CIN : garde les 12 premiers chiffres trouvés et
+    les formate en 'XXX-XXX-XXX-XXX'. Les valeurs ayant moins de 12 chiffres deviennent NA.
+    """
+    # 1. Nettoyage : retirer les caractères non numériques, puis extraction des 12 premiers chiffres
+    cin_extrait = _chaines_vectorisees(serie).str.replace(r'[^\d]', '', regex=True).str[:12]
+
+    # 2. Validation (12 chiffres exacts) et formatage de la colonne entière par une seule regex
+    condition_valide = cin_extrait.str.len() == 12
+    cin_formate = cin_extrait.str.replace(r'^(\d{3})(\d{3})(\d{3})(\d{3})$', r'\1-\2-\3-\4', regex=True)
+    return cin_formate.where(condition_valide, pd.NA).astype(object)
+
+@declarer_colonnes(lit=['cin'], ecrit=['cin'])
 def nettoyer_et_formater_cin(df: pd.DataFrame) -> pd.DataFrame:
     """
     Nettoie le CIN, extrait les 12 premiers chiffres trouvés (même au milieu d'un texte), 
@@ -419,28 +979,10 @@ def nettoyer_et_formater_cin(df: pd.DataFrame) -> pd.DataFrame:
     print("\n--- 🆔 Nettoyage et Formatage Robuste du CIN ---")
     
     if 'cin' in df.columns:
+        df['cin'] = formater_cin(df['cin'])
         
-        # 1. Nettoyage : retirer les caractères non numériques
-        df['cin_clean'] = df['cin'].astype(str).str.replace(r'[^\d]', '', regex=True)
-        
-        # 2. Extraction des 12 premiers chiffres
-        df['cin_extrait'] = df['cin_clean'].str[:12]
-        
-        # 3. Validation et Formatage
-        def formater_cin_tiret(chaine):
-            # La validation : si la chaîne n'a pas 12 caractères, elle est invalide
-            if pd.isna(chaine) or len(chaine) != 12:
-                return pd.NA
-            
-            # Formater en groupes de trois séparés par un tiret
-            return f"{chaine[0:3]}-{chaine[3:6]}-{chaine[6:9]}-{chaine[9:12]}"
-
-        # 4. Application de la fonction
-        df['cin'] = df['cin_extrait'].apply(formater_cin_tiret)
-        
-        # 5. Finalisation
+        # Finalisation
         df['cin'] = df['cin'].convert_dtypes()
-        df = df.drop(columns=['cin_clean', 'cin_extrait'], errors='ignore')
         
         val_nulles = df['cin'].isna().sum()
         print(f"✅ Colonne 'cin' nettoyée et formatée. {val_nulles} valeurs ont été mises à NA car moins de 12 chiffres trouvés.")
@@ -449,6 +991,27 @@ def nettoyer_et_formater_cin(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+def formater_telephone(serie: pd.Series) -> pd.Series:
+    """
+    Version vectorisée de la normalisation du téléphone : supprime le préfixe international 261,
+    normalise à 10 chiffres (ajout d'un '0' si 9 chiffres) et formate en '0XX XX XXX XX'.
+    Toute autre longueur devient NA.
+    """
+    # 1. Nettoyage : retirer tous les caractères non numériques
+    chiffres = _chaines_vectorisees(serie).str.replace(r'[^\d]', '', regex=True)
+
+    # 2. Suppression du préfixe international 261
+    chiffres_locaux = chiffres.str.replace(r'^261', '', regex=True)
+
+    # 3. Normalisation à 10 chiffres (ajout du '0' initial aux numéros de 9 chiffres) et validation
+    numero_normalise = chiffres_locaux.str.replace(r'^(\d{9})$', r'0\1', regex=True)
+    condition_valide = numero_normalise.str.len() == 10
+
+    # 4. Formatage : 0XX XX XXX XX
+    numero_formate = numero_normalise.str.replace(r'^(\d{3})(\d{2})(\d{3})(\d{2})$', r'\1 \2 \3 \4', regex=True)
+    return numero_formate.where(condition_valide, pd.NA).astype(object)
+
+@declarer_colonnes(lit=[('telephone', 'tel')], ecrit=[('telephone', 'tel')])
 def nettoyer_et_formater_telephone(df: pd.DataFrame) -> pd.DataFrame:
     """
     Nettoie la colonne 'telephone' : supprime les préfixes internationaux,
@@ -463,37 +1026,10 @@ def nettoyer_et_formater_telephone(df: pd.DataFrame) -> pd.DataFrame:
     print("\n--- 📞 Nettoyage et Formatage du Numéro de Téléphone ---")
 
     if col_name:
+        df[col_name] = formater_telephone(df[col_name])
         
-        # 1. Nettoyage : retirer tous les caractères non numériques
-        df['tel_clean'] = df[col_name].astype(str).str.replace(r'[^\d]', '', regex=True)
-        
-        # 2. Gestion du préfixe international (+261 ou 261) et formatage
-        def normaliser_numero(chaine):
-            if pd.isna(chaine) or not chaine:
-                return pd.NA
-            
-            chaine_locale = chaine
-            # Suppression du préfixe international 261
-            if chaine.startswith('261'):
-                chaine_locale = chaine[3:] 
-            
-            # Validation et Normalisation à 10 chiffres
-            if len(chaine_locale) == 9:
-                numero_normalise = '0' + chaine_locale
-            elif len(chaine_locale) == 10:
-                numero_normalise = chaine_locale
-            else:
-                return pd.NA
-                
-            # Formater : 0XX XX XXX XX
-            return f"{numero_normalise[0:3]} {numero_normalise[3:5]} {numero_normalise[5:8]} {numero_normalise[8:10]}"
-            
-        # 3. Application de la fonction
-        df[col_name] = df['tel_clean'].apply(normaliser_numero)
-        
-        # 4. Finalisation
+        # Finalisation
         df[col_name] = df[col_name].convert_dtypes()
-        df = df.drop(columns=['tel_clean'], errors='ignore')
         
         val_nulles = df[col_name].isna().sum()
         print(f"✅ Colonne '{col_name}' nettoyée, normalisée et formatée. {val_nulles} valeurs mises à NA.")
@@ -502,6 +1038,8 @@ def nettoyer_et_formater_telephone(df: pd.DataFrame) -> pd.DataFrame:
         
     return df
 
+@declarer_colonnes(lit=[('numero_inscription', 'num_inscription', 'inscription')], lit_optionnel=['mention'],
+                   ecrit=[('numero_inscription', 'num_inscription', 'inscription')])
 def nettoyer_et_formater_num_inscription(df: pd.DataFrame) -> pd.DataFrame:
     """
     Standardise la colonne 'numero_inscription' (priorité), 'num_inscription' ou 'inscription' :
@@ -531,11 +1069,11 @@ def nettoyer_et_formater_num_inscription(df: pd.DataFrame) -> pd.DataFrame:
             mention_prefixe = pd.Series([''] * len(df), index=df.index)
         else:
             # Nettoyage et préparation du préfixe
-            mention_prefixe = df[prefixe_col].astype(str).str.upper().str.strip()
+            mention_prefixe = forme_normalisee(df[prefixe_col], 'majuscules')
             # Remplacer les NaN/NULL par des chaînes vides pour la concaténation
             mention_prefixe = mention_prefixe.replace('NAN', '').fillna('') 
-            # Ajouter le '_' uniquement si la mention existe et n'est pas vide
-            mention_prefixe = mention_prefixe.apply(lambda x: x + '_' if x else '')
+            # Ajouter le '_' uniquement si la mention existe et n'est pas vide (vectorisé)
+            mention_prefixe = (mention_prefixe + '_').where(mention_prefixe != '', '')
             
         # --- B. Nettoyage du Numéro d'Inscription ---
         # On travaille sur une copie temporaire pour la manipulation des valeurs non nulles
@@ -575,10 +1113,51 @@ def nettoyer_et_formater_num_inscription(df: pd.DataFrame) -> pd.DataFrame:
 
 # --- Nouvelle Fonction pour le Semestre ---
 
-def traiter_colonne_semestre(df: pd.DataFrame) -> pd.DataFrame:
+# Mapping Niveau -> Semestres à remplir (règle : L1 -> S01, S02, etc.)
+MAPPING_NIVEAU_SEMESTRE = {
+    'L1': [1, 2], 'L2': [3, 4], 'L3': [5, 6],
+    'M1': [7, 8], 'M2': [9, 10],
+    'D1': [11, 12], 'D2': [13, 14], 'D3': [15, 16]
+}
+
+# Même mapping sous forme de masques 16 bits (bit i-1 à 1 pour le semestre Si)
+MASQUES_PAR_NIVEAU = {
+    niveau: sum(1 << (i - 1) for i in semestres) for niveau, semestres in MAPPING_NIVEAU_SEMESTRE.items()
+}
+
+COLONNES_SEMESTRES = [f'S{i:02d}' for i in range(1, 17)]
+
+def masque_semestres(valeur: str) -> int:
+    """Masque 16 bits des semestres S1 à S16 cités dans un texte déjà standardisé (ex : 'S1 S2' -> 0b11)."""
+    masque = 0
+    for s in re.findall(r'S(\d{1,2})', valeur, re.IGNORECASE):
+        if 1 <= int(s) <= 16:
+            masque |= 1 << (int(s) - 1)
+    return masque
+
+def calculer_masques_semestres(semestre: pd.Series) -> np.ndarray:
     """
-    Crée les 16 colonnes binaires S01 à S16 basées sur la colonne 'semestre'.
+    Convertit la colonne 'semestre' en masques 16 bits (uint16), en un seul passage.
+    Le texte n'est analysé qu'une fois par valeur distincte (quelques dizaines de libellés
+    pour des centaines de milliers de lignes), puis les masques sont redistribués par indexation.
+    """
+    codes, valeurs_uniques = pd.factorize(semestre, use_na_sentinel=False)
+
+    # Nettoyage et standardisation du contenu (S1, S2, S3 et S5, s1-s2, etc.)
+    valeurs_propres = pd.Series(valeurs_uniques, dtype=object).astype(str).str.upper().str.strip().replace('NAN', '')
+    # Remplacer les séparateurs non-alphanumériques par un espace ('S1 et S2', 'S3, S5', 'S1-S2' -> 'S1 S2'...)
+    valeurs_propres = valeurs_propres.str.replace(r'[^A-Z0-9]', ' ', regex=True)
+
+    masques_uniques = np.fromiter((masque_semestres(v) for v in valeurs_propres), dtype=np.uint16,
+                                  count=len(valeurs_propres))
+    return masques_uniques[codes]
+
+@declarer_colonnes(lit=['semestre', 'niveau'], ecrit=COLONNES_SEMESTRES + ['semestres_masque'])
+def traiter_colonne_semestre(df: pd.DataFrame, creer_colonnes_binaires: bool = True) -> pd.DataFrame:
+    """
+    Calcule le masque 16 bits des semestres ('semestres_masque') à partir de la colonne 'semestre'.
     Impute les valeurs manquantes en fonction de la colonne 'niveau'.
+    Crée ensuite les 16 colonnes binaires S01 à S16 dérivées du masque (si creer_colonnes_binaires).
     """
     print("\n--- 📚 Création des Colonnes Binaires de Semestre (S01-S16) ---")
 
@@ -586,119 +1165,249 @@ def traiter_colonne_semestre(df: pd.DataFrame) -> pd.DataFrame:
         print("⚠️ Colonnes 'semestre' ou 'niveau' manquantes. Traitement ignoré.")
         return df
 
-    # 1. Initialisation des 16 colonnes binaires à 0 (type entier nullable)
-    semestre_cols = [f'S{i:02d}' for i in range(1, 17)]
-    for col in semestre_cols:
-        df[col] = pd.Series(0, dtype='Int64')
+    # 1. Masque des semestres identifiés dans 'semestre'
+    masques = calculer_masques_semestres(df['semestre'])
+
+    # 2. Imputation par 'niveau' pour les lignes où AUCUN semestre n'a été identifié
+    # (colonne 'semestre' vide ou illisible), par consultation de la table des masques
+    codes_niveau, niveaux_uniques = pd.factorize(df['niveau'], use_na_sentinel=False)
+    niveaux_propres = pd.Series(niveaux_uniques, dtype=object).astype(str).str.upper().str.strip()
+    masques_niveau = niveaux_propres.map(MASQUES_PAR_NIVEAU).fillna(0).to_numpy(dtype=np.uint16)[codes_niveau]
+    condition_imputation = (masques == 0) & (masques_niveau != 0)
+    masques = np.where(condition_imputation, masques_niveau, masques)
+    lignes_imputees = int(condition_imputation.sum())
+
+    df['semestres_masque'] = masques
+
+    # 3. Colonnes binaires S01 à S16 (bit i-1 du masque pour Si)
+    if creer_colonnes_binaires:
+        bits = (masques[:, None] >> np.arange(16, dtype=np.uint16)) & 1
+        df_bits = pd.DataFrame(bits, index=df.index, columns=COLONNES_SEMESTRES).astype('Int64')
+        df = df.drop(columns=COLONNES_SEMESTRES, errors='ignore')
+        df = pd.concat([df, df_bits], axis=1)
+        print(f"✅ Colonnes binaires S01 à S16 créées et remplies. {lignes_imputees} lignes imputées par le niveau.")
+    else:
+        print(f"✅ Masque des semestres calculé. {lignes_imputees} lignes imputées par le niveau.")
 
-    # 2. Traitement des valeurs existantes dans 'semestre'
-    
-    # 2.1 Nettoyage et standardisation du contenu (S1, S2, S3 et S5, s1-s2, etc.)
-    semestre_propre = df['semestre'].astype(str).str.upper().str.strip().replace('NAN', '')
-    
-    # Remplacer les séparateurs non-alphanumériques par un seul séparateur (par exemple, un espace)
-    # Ceci transforme 'S1 et S2', 'S3, S5', 'S1-S2' en 'S1 S2', 'S3 S5', 'S1 S2' (après le nettoyage de 'S')
-    semestre_propre = semestre_propre.str.replace(r'[^A-Z0-9]', ' ', regex=True)
-    
-    # Remplacer S suivi de 1 ou 2 chiffres
-    # On isole chaque semestre (ex: 'S1 S2' devient ['S1', 'S2'])
-    def extraire_semestres(valeur):
-        if pd.isna(valeur) or not valeur:
-            return set()
-        
-        # Trouver toutes les occurrences de S suivi d'un ou deux chiffres
-        matches = re.findall(r'S(\d{1,2})', valeur, re.IGNORECASE)
-        
-        # Convertir en numéros et garantir qu'ils sont entre 1 et 16
-        semestres = {int(s) for s in matches if 1 <= int(s) <= 16}
-        return semestres
-
-    df['semestres_identifies'] = semestre_propre.apply(extraire_semestres)
-
-    # 2.2 Remplissage des colonnes binaires
-    for i in range(1, 17):
-        col_name = f'S{i:02d}'
-        # Si 'i' est dans l'ensemble de semestres identifiés, mettre 1
-        df.loc[df['semestres_identifies'].apply(lambda s: i in s), col_name] = 1
-
-    # 3. Imputation par 'niveau' pour les lignes où AUCUN semestre n'a été identifié (colonne 'semestre' était vide ou illisible)
-    condition_pas_de_semestre = df['semestres_identifies'].apply(len) == 0
-
-    # Mapping Niveau -> Semestres à remplir (basé sur votre règle : L1 -> S01, S02, etc.)
-    mapping_niveau_semestre = {
-        'L1': [1, 2], 'L2': [3, 4], 'L3': [5, 6], 
-        'M1': [7, 8], 'M2': [9, 10], 
-        'D1': [11, 12], 'D2': [13, 14], 'D3': [15, 16]
-    }
-    
-    # Nettoyage et standardisation de la colonne 'niveau'
-    niveau_propre = df['niveau'].astype(str).str.upper().str.strip().replace('NAN', '')
-    
-    lignes_imputees = 0
-    for niveau, semestres in mapping_niveau_semestre.items():
-        # Condition : Pas de semestre trouvé ET Niveau correspond
-        condition_imputation = condition_pas_de_semestre & (niveau_propre == niveau)
-        
-        if condition_imputation.any():
-            lignes_imputees += condition_imputation.sum()
-            for i in semestres:
-                col_name = f'S{i:02d}'
-                df.loc[condition_imputation, col_name] = 1
-
-    print(f"✅ Colonnes binaires S01 à S16 créées et remplies. {lignes_imputees} lignes imputées par le niveau.")
-    
-    # Suppression de la colonne temporaire
-    df = df.drop(columns=['semestres_identifies'], errors='ignore')
-    
+    return df
+
+@declarer_colonnes(lit_optionnel=config.COLONNES_CATEGORIELLES, ecrit=config.COLONNES_CATEGORIELLES)
+def encoder_colonnes_repetitives(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Encode en catégories les colonnes très répétitives (config.COLONNES_CATEGORIELLES) une fois
+    nettoyées : le chaînage, l'explosion par semestre et le dédoublonnage travaillent ensuite sur
+    les codes entiers plutôt que sur des chaînes.
+    """
+    if not config.ENCODAGE_CATEGORIEL_ACTIF:
+        return df
+    print("\n--- 🗜️ Encodage catégoriel des colonnes répétitives ---")
+    df = encoder_colonnes_categorielles(df)
+    print("✅ Colonnes encodées : " + ', '.join(col for col in config.COLONNES_CATEGORIELLES if col in df.columns))
     return df
 
 # --------------------------------------------------------------------------
 # --- Fonction Orchestratrice Principale ---
 
-def nettoyer_donnees(df: pd.DataFrame) -> pd.DataFrame:
+# Ordre de référence des étapes (ordre historique d'exécution). Le graphe des dépendances est déduit
+# des colonnes déclarées par chaque étape (voir declarer_colonnes) : une étape n'attend que celles
+# dont elle dépend, et les résultats sont toujours réintégrés dans cet ordre.
+ETAPES_NETTOYAGE = [
+    ajouter_colonnes_institutionnelles, # Avant tout nettoyage/imputation
+    nettoyer_colonnes_texte,            # Nettoyage général des textes
+    prefixer_composante,                # Intègre l'ID de l'institution (utilisé par imputer_id_parcours)
+    traiter_annee_universitaire,
+    traiter_annee_bac,
+    nettoyer_bacc_numero,
+    traiter_naissance_date,
+    traiter_cin_date,
+    standardiser_sexe,
+    traiter_formation_hybride,
+    imputer_id_parcours,                # Utilise la composante préfixée
+    prefixer_id_parcours_final,         # Pour les valeurs qui n'ont pas été imputées
+    nettoyer_et_formater_cin,
+    nettoyer_et_formater_telephone,
+    nettoyer_et_formater_num_inscription,
+    traiter_colonne_semestre,
+    encoder_colonnes_repetitives,       # Toujours en dernier : les étapes travaillent sur des chaînes
+]
+GRAPHE_NETTOYAGE = construire_graphe_etapes(ETAPES_NETTOYAGE)
+
+def trouver_etape(nom_ou_fonction):
+    """Retrouve une étape de ETAPES_NETTOYAGE par son nom de fonction (ou la fonction elle-même)."""
+    for etape in ETAPES_NETTOYAGE:
+        if etape is nom_ou_fonction or etape.__name__ == nom_ou_fonction:
+            return etape
+    raise ValueError(f"Étape de nettoyage inconnue : {nom_ou_fonction!r}")
+
+def _etape_ignoree(etape, colonnes: pd.Index) -> bool:
+    """Signale et retourne True si une colonne requise par l'étape est absente."""
+    manquantes = _colonnes_manquantes(etape, colonnes)
+    if manquantes:
+        print(f"\n⏭️ Étape '{etape.__name__}' ignorée : colonne(s) absente(s) ({', '.join(manquantes)}).")
+    return bool(manquantes)
+
+def _colonnes_de_travail(etape, colonnes: pd.Index) -> list:
+    """Colonnes existantes que l'étape lit ou écrit (sous-ensemble transmis à l'étape en mode concurrent)."""
+    noms = _noms_colonnes(etape.colonnes_lues + etape.colonnes_lues_optionnelles + etape.colonnes_ecrites)
+    return [col for col in colonnes if col in noms]
+
+def _reintegrer(df: pd.DataFrame, etape, colonnes_travail: list, resultat: pd.DataFrame) -> pd.DataFrame:
+    """Reporte dans df les colonnes créées, modifiées ou supprimées par une étape exécutée sur un sous-ensemble."""
+    if TOUTES_COLONNES in etape.colonnes_ecrites:
+        return resultat
+    ecrites = _noms_colonnes(etape.colonnes_ecrites)
+    for col in resultat.columns:
+        if col in ecrites or col not in colonnes_travail:
+            df[col] = resultat[col]
+    supprimees = [col for col in colonnes_travail if col not in resultat.columns]
+    return df.drop(columns=supprimees) if supprimees else df
+
+def _invalider_formes_ecrites(etape) -> None:
+    """Oublie les formes normalisées des colonnes que l'étape a pu modifier sur place."""
+    invalider_formes(None if TOUTES_COLONNES in etape.colonnes_ecrites else _noms_colonnes(etape.colonnes_ecrites))
+
+def _executer_graphe(df: pd.DataFrame, etapes: list, nb_fils: int) -> pd.DataFrame:
+    """
+    Exécute les étapes dans un pool de threads : chaque étape démarre dès que toutes celles dont elle
+    dépend ont été réintégrées, et travaille sur une copie de ses seules colonnes. Les résultats sont
+    réintégrés dans l'ordre de référence, ce qui donne le même DataFrame (valeurs et ordre des colonnes)
+    qu'une exécution séquentielle.
+    """
+    dependances = {etape: GRAPHE_NETTOYAGE[etape] & set(etapes) for etape in etapes}
+    reintegrees = set()
+    resultats = {} # étape -> (colonnes de travail, résultat), ou None si l'étape est ignorée
+    en_cours = {}  # future -> étape
+    prochaine = 0  # position (dans 'etapes') de la prochaine étape à réintégrer
+
+    with ThreadPoolExecutor(max_workers=nb_fils) as executor:
+        while prochaine < len(etapes):
+            # 1. Lancement des étapes dont toutes les dépendances sont réintégrées
+            lancees = set(en_cours.values())
+            for etape in etapes:
+                if etape in reintegrees or etape in resultats or etape in lancees:
+                    continue
+                if not dependances[etape] <= reintegrees:
+                    continue
+                if _etape_ignoree(etape, df.columns):
+                    resultats[etape] = None
+                elif TOUTES_COLONNES in etape.colonnes_ecrites:
+                    # Étape globale : toutes les autres étapes en dépendent ou la précèdent, elle s'exécute seule
+                    en_cours[executor.submit(mesurer, etape, df)] = etape
+                else:
+                    colonnes_travail = _colonnes_de_travail(etape, df.columns)
+                    sous_df = df[colonnes_travail].copy(deep=False)
+                    en_cours[executor.submit(lambda e=etape, d=sous_df, c=colonnes_travail: (c, mesurer(e, d)))] = etape
+
+            # 2. Réintégration, dans l'ordre de référence, des étapes terminées
+            while prochaine < len(etapes) and etapes[prochaine] in resultats:
+                etape = etapes[prochaine]
+                if resultats[etape] is not None:
+                    colonnes_travail, resultat = resultats[etape]
+                    df = _reintegrer(df, etape, colonnes_travail, resultat)
+                    _invalider_formes_ecrites(etape)
+                del resultats[etape]
+                reintegrees.add(etape)
+                prochaine += 1
+
+            # 3. Attente de la fin d'au moins une étape en cours
+            if prochaine < len(etapes) and en_cours:
+                terminees, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                for future in terminees:
+                    etape = en_cours.pop(future)
+                    resultat = future.result()
+                    resultats[etape] = (None, resultat) if TOUTES_COLONNES in etape.colonnes_ecrites else resultat
+
+    return df
+
+# Affichage des étapes de nettoyage. En mode silencieux, seules les lignes qui commencent par l'un de
+# ces préfixes (colonne absente, étape ignorée, erreur) sont écrites sur la sortie standard.
+_AFFICHAGE = {'silencieux': False}
+PREFIXES_AVERTISSEMENT = ('⚠️', '❌', '⏭️')
+
+class _SortieAvertissements(io.TextIOBase):
+    """Sortie standard filtrée : ne transmet que les lignes d'avertissement (cf. PREFIXES_AVERTISSEMENT)."""
+
+    def __init__(self, sortie):
+        self.sortie = sortie
+        self.tampon = ''
+        self.verrou = threading.Lock() # Les étapes indépendantes écrivent depuis plusieurs threads
+
+    def write(self, texte: str) -> int:
+        with self.verrou:
+            *lignes, self.tampon = (self.tampon + texte).split('\n')
+            for ligne in lignes:
+                if ligne.lstrip().startswith(PREFIXES_AVERTISSEMENT):
+                    self.sortie.write(ligne + '\n')
+        return len(texte)
+
+@contextmanager
+def _progression_masquee():
+    """Masque les messages de progression et les barres tqdm des étapes ; la sortie d'erreur n'est pas touchée."""
+    _AFFICHAGE['silencieux'] = True
+    try:
+        with redirect_stdout(_SortieAvertissements(sys.stdout)):
+            yield
+    finally:
+        _AFFICHAGE['silencieux'] = False
+
+def nettoyer_donnees(df: pd.DataFrame, a_partir_de=None, nb_fils: int = None, silencieux: bool = False) -> pd.DataFrame:
     """
-    Fonction principale de nettoyage, orchestrant les sous-étapes.
+    Fonction principale de nettoyage, orchestrant les sous-étapes (ETAPES_NETTOYAGE).
+
+    - Les étapes dont une colonne requise est absente sont ignorées.
+    - a_partir_de (nom de fonction) : ne rejoue que cette étape et celles qui en dépendent,
+      par exemple après la correction d'une étape sur un DataFrame déjà nettoyé en amont.
+    - nb_fils > 1 (par défaut config.NB_FILS_NETTOYAGE) : les étapes indépendantes s'exécutent
+      en parallèle dans des threads ; le résultat est identique à l'exécution séquentielle.
+    - silencieux : seuls les avertissements des étapes sont affichés (colonne absente, étape
+      ignorée), sans les messages de progression ni les barres ; les warnings restent affichés.
     """
     if df.empty:
         return df
+    if silencieux and not _AFFICHAGE['silencieux']:
+        with _progression_masquee():
+            return nettoyer_donnees(df, a_partir_de, nb_fils)
+
+    # Un DataFrame déjà nettoyé (reprise) est ramené aux chaînes attendues par les étapes
+    df = decoder_colonnes_categorielles(df)
+
+    etapes = ETAPES_NETTOYAGE
+    if a_partir_de is not None:
+        depart = trouver_etape(a_partir_de)
+        etapes = etapes_en_aval(ETAPES_NETTOYAGE, GRAPHE_NETTOYAGE, depart)
+        print(f"\n--- 🔁 Reprise du nettoyage à partir de '{depart.__name__}' : "
+              f"{', '.join(etape.__name__ for etape in etapes)} ---")
+
+    nb_fils = config.NB_FILS_NETTOYAGE if nb_fils is None else nb_fils
+    if nb_fils > 1:
+        return _executer_graphe(df, etapes, nb_fils)
+
+    # Exécution séquentielle des étapes de nettoyage, dans l'ordre de référence
+    for etape in etapes:
+        if not _etape_ignoree(etape, df.columns):
+            df = mesurer(etape, df)
+            _invalider_formes_ecrites(etape)
 
-    # Exécution séquentielle des étapes de nettoyage
-    
-    # Étape 0 : Ajout des colonnes institutionnelles (avant tout nettoyage/imputation)
-    df = ajouter_colonnes_institutionnelles(df)
-    
-    # Étape 1 : Nettoyage général des textes
-    df = nettoyer_colonnes_texte(df)
-    
-    # --- NOUVEAU: Préfixage de la composante (pour intégrer l'ID de l'institution) ---
-    df = prefixer_composante(df)
-    
-    # Nettoyage et uniformisation des années
-    df = traiter_annee_universitaire(df) 
-    df = traiter_annee_bac(df)
-    
-    # Nettoyage du numéro de bac
-    df = nettoyer_bacc_numero(df) 
-
-    # --- Nettoyage des dates séparé (selon la demande) ---
-    df = traiter_naissance_date(df)
-    df = traiter_cin_date(df)
-    # -----------------------------------------------------
+    return df
 
-    df = standardiser_sexe(df)
-    df = traiter_formation_hybride(df)
-    
-    # Imputation de id_Parcours (utilise la composante préfixée si nécessaire)
-    df = imputer_id_parcours(df)
-    
-    # --- NOUVEAU: Préfixage final de id_Parcours (pour les valeurs qui n'ont pas été imputées) ---
-    df = prefixer_id_parcours_final(df)
-    
-    df = nettoyer_et_formater_cin(df)
-    df = nettoyer_et_formater_telephone(df)
-    df = nettoyer_et_formater_num_inscription(df)
-    
-    # Étape Semestre
-    df = traiter_colonne_semestre(df)
+def nettoyer_donnees_par_lots(lots) -> pd.DataFrame:
+    """
+    Mode flux : applique nettoyer_donnees lot par lot sur un itérable de DataFrames (voir iterer_lots_bruts).
+    Toutes les étapes de nettoyage sont locales à la ligne : le nettoyage travaille sur un lot à la fois
+    et seul le résultat nettoyé est accumulé pour les étapes globales (chaînage des étudiants,
+    dédoublonnage semestriel). Avec iterer_lots_bruts, la mémoire des données brutes reste bornée par
+    un classeur (chargé entier puis découpé en lots).
+    Le détail des étapes n'est affiché que pour le premier lot ; les suivants n'affichent que les avertissements.
+    """
+    lots_nettoyes = []
+    nb_lignes = 0
+    for numero, lot in enumerate(tqdm(lots, desc="Nettoyage par lots", unit="lot")):
+        lots_nettoyes.append(mesurer(nettoyer_donnees, lot, silencieux=numero > 0))
+        nb_lignes += len(lot)
+        del lot
+
+    if not lots_nettoyes:
+        return pd.DataFrame()
 
-    return df
\ No newline at end of file
+    print(f"\n✅ {len(lots_nettoyes)} lots nettoyés ({nb_lignes} lignes).")
+    return concatener_dataframes(lots_nettoyes)
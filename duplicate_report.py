@@ -0,0 +1,152 @@
+# duplicate_report.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from run_profiler import compter
+
+# --- Dépendance optionnelle : sans pyarrow, les rapports sont écrits en CSV ---
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+FORMATS_RAPPORT = ('parquet', 'csv')
+
+# Colonnes lues pour chaque ligne des rapports (celles qui existent dans le DataFrame)
+COLONNES_RAPPORT_ETUDIANTS = [
+    'annee_universitaire', 'numero_inscription', 'composante', 'mention', 'niveau',
+    'nom', 'prenoms', 'sexe', 'naissance_date', 'naissance_lieu', 'cin', 'telephone', 'mail'
+]
+COLONNES_RAPPORT_INSCRIPTIONS = ['numero_inscription', 'composante', 'mention', 'niveau', 'semestre', 'nom', 'prenoms']
+
+
+# --- Graphe des liens ---
+
+def liste_aretes(morceaux: list, cles: list) -> pd.DataFrame:
+    """
+    Liste compacte des liens acceptés par le chaînage, à partir des morceaux (sources, cibles, clé)
+    enregistrés au fil des clés et des tours : positions des deux lignes (int32 tant que possible)
+    et nom de la clé (catégoriel, un octet par lien).
+    """
+    sources = np.concatenate([morceau[0] for morceau in morceaux] + [np.empty(0, dtype=np.int64)])
+    cibles = np.concatenate([morceau[1] for morceau in morceaux] + [np.empty(0, dtype=np.int64)])
+    numeros = np.concatenate([np.full(len(morceau[0]), cles.index(morceau[2]), dtype=np.int8) for morceau in morceaux]
+                             + [np.empty(0, dtype=np.int8)])
+    type_lignes = np.int32 if max(sources.max(initial=0), cibles.max(initial=0)) < np.iinfo(np.int32).max else np.int64
+    compter('liens_enregistres', len(sources))
+    return pd.DataFrame({
+        'ligne_a': sources.astype(type_lignes),
+        'ligne_b': cibles.astype(type_lignes),
+        'cle': pd.Categorical.from_codes(numeros, categories=cles),
+    })
+
+
+def extraire_lignes_liees(df: pd.DataFrame, aretes: pd.DataFrame, colonnes: list = None) -> tuple:
+    """
+    Lignes extrémités d'au moins un lien (colonnes du rapport, code étudiant et numéro de ligne), lues
+    avant que la consolidation n'uniformise les valeurs, et liens renumérotés dans cet extrait :
+    (liens, lignes) se passent à rapport_doublons_etudiants comme (aretes, df).
+    """
+    colonnes = [col for col in (colonnes or COLONNES_RAPPORT_ETUDIANTS) if col in df.columns]
+    positions = np.unique(np.concatenate([aretes['ligne_a'].to_numpy(), aretes['ligne_b'].to_numpy()]))
+    lignes = df.iloc[positions][['code_etudiant', 'id_temporaire'] + colonnes].reset_index(drop=True)
+    liens = aretes.assign(ligne_a=np.searchsorted(positions, aretes['ligne_a'].to_numpy()).astype(aretes['ligne_a'].dtype),
+                          ligne_b=np.searchsorted(positions, aretes['ligne_b'].to_numpy()).astype(aretes['ligne_b'].dtype))
+    return liens, lignes
+
+
+# --- Rapports ---
+
+def rapport_doublons_etudiants(df: pd.DataFrame, aretes: pd.DataFrame, colonnes: list = None) -> pd.DataFrame:
+    """
+    Une ligne par ligne source rattachée à un étudiant qui en a plusieurs, lue directement dans le
+    graphe des liens : toute ligne d'un groupe de plus d'une ligne est l'extrémité d'au moins un lien.
+    Chaque ligne porte son code étudiant, la taille du groupe, et un lien qui la rattache (ligne liée
+    et clé). Les lignes sont lues en une seule indexation, sans regrouper le DataFrame complet.
+    """
+    colonnes = [col for col in (colonnes or COLONNES_RAPPORT_ETUDIANTS) if col in df.columns]
+    extremites = np.concatenate([aretes['ligne_a'].to_numpy(), aretes['ligne_b'].to_numpy()]).astype(np.int64)
+    liees = np.concatenate([aretes['ligne_b'].to_numpy(), aretes['ligne_a'].to_numpy()]).astype(np.int64)
+    codes_cles = np.tile(aretes['cle'].cat.codes.to_numpy(), 2)
+
+    # Premier lien de chaque ligne (tri stable : l'ordre d'enregistrement des clés est conservé)
+    ordre = np.argsort(extremites, kind='stable')
+    extremites, liees, codes_cles = extremites[ordre], liees[ordre], codes_cles[ordre]
+    premiers = np.r_[True, extremites[1:] != extremites[:-1]] if len(extremites) else np.empty(0, dtype=bool)
+    lignes = extremites[premiers]
+
+    numeros_lignes = df['id_temporaire'].to_numpy()
+    codes_etudiants = df['code_etudiant'].to_numpy()[lignes]
+    rapport = df.iloc[lignes][colonnes].reset_index(drop=True)
+    rapport.insert(0, 'code_etudiant', codes_etudiants)
+    codes_groupes, _ = pd.factorize(codes_etudiants)
+    rapport.insert(1, 'taille_groupe', np.bincount(codes_groupes)[codes_groupes] if len(codes_groupes) else codes_groupes)
+    rapport.insert(2, 'ligne', numeros_lignes[lignes])
+    rapport.insert(3, 'ligne_liee', numeros_lignes[liees[premiers]])
+    rapport.insert(4, 'cle_lien', pd.Categorical.from_codes(codes_cles[premiers], categories=aretes['cle'].cat.categories))
+
+    compter('lignes_rapport_doublons', len(rapport))
+    return rapport.sort_values(['code_etudiant', 'ligne'], kind='stable', ignore_index=True)
+
+def rapport_doublons_inscriptions(df: pd.DataFrame, cle_contrainte: list, candidates: np.ndarray,
+                                  conservees: np.ndarray, colonnes: list = None) -> pd.DataFrame:
+    """
+    Inscriptions semestrielles qui partagent leur clé de contrainte, avec la ligne conservée et les
+    lignes supprimées. Seules les lignes candidates (étudiants présents sur plusieurs lignes sources,
+    les seuls qui peuvent produire un doublon) sont examinées.
+    """
+    colonnes = [col for col in (colonnes or COLONNES_RAPPORT_INSCRIPTIONS) if col in df.columns and col not in cle_contrainte]
+    positions = np.flatnonzero(candidates)
+    en_double = df.iloc[positions].duplicated(subset=cle_contrainte, keep=False).to_numpy()
+    positions = positions[en_double]
+
+    rapport = df.iloc[positions][cle_contrainte + colonnes].reset_index(drop=True)
+    rapport.insert(len(cle_contrainte), 'conservee', conservees[positions])
+    compter('lignes_rapport_doublons', len(rapport))
+    return rapport.sort_values(cle_contrainte, kind='stable', ignore_index=True)
+
+
+# --- Écriture ---
+
+def ecrire_rapports_doublons(doublons: dict, dossier: str, format_fichier: str = 'parquet',
+                             nom_etudiants: str = 'liste_doublons_etudiants',
+                             nom_inscriptions: str = 'liste_doublons_inscriptions') -> list:
+    """
+    Construit et écrit les rapports des doublons à partir de ce que les étapes ont conservé dans
+    `doublons` : 'etudiants' -> (liens, lignes) de extraire_lignes_liees, 'inscriptions' -> (lignes
+    candidates, clé de contrainte, masque des lignes conservées). Retourne les chemins écrits.
+    """
+    chemins = []
+    if 'etudiants' in doublons:
+        aretes, lignes = doublons['etudiants']
+        chemins.append(ecrire_rapport(rapport_doublons_etudiants(lignes, aretes), dossier, nom_etudiants, format_fichier))
+    if 'inscriptions' in doublons:
+        lignes, cle_contrainte, conservees = doublons['inscriptions']
+        rapport = rapport_doublons_inscriptions(lignes, cle_contrainte, np.ones(len(lignes), dtype=bool), conservees)
+        chemins.append(ecrire_rapport(rapport, dossier, nom_inscriptions, format_fichier))
+    return chemins
+
+def ecrire_rapport(rapport: pd.DataFrame, dossier: str, nom_base: str, format_fichier: str = 'parquet') -> str:
+    """
+    Écrit un rapport de doublons dans `dossier` (créé si besoin) en Parquet ou en CSV (UTF-8 avec
+    BOM, lisible par Excel) et retourne le chemin. Sans pyarrow, le Parquet est remplacé par un CSV.
+    """
+    if format_fichier not in FORMATS_RAPPORT:
+        raise ValueError(f"Format de rapport inconnu : {format_fichier!r} (attendu : {', '.join(FORMATS_RAPPORT)})")
+    if format_fichier == 'parquet' and pyarrow is None:
+        print("⚠️ pyarrow n'est pas installé : le rapport des doublons est écrit en CSV.")
+        format_fichier = 'csv'
+
+    os.makedirs(dossier, exist_ok=True)
+    chemin = os.path.join(dossier, f"{nom_base}.{format_fichier}")
+    if format_fichier == 'parquet':
+        # Les colonnes texte mêlant plusieurs types (cellules Excel) sont écrites comme chaînes
+        mixtes = [col for col in rapport.columns if rapport[col].dtype == 'object']
+        rapport.astype({col: 'string' for col in mixtes}).to_parquet(chemin, index=False)
+    else:
+        rapport.to_csv(chemin, index=False, encoding='utf-8-sig')
+    print(f"📝 Rapport des doublons : {chemin} ({len(rapport)} lignes)")
+    return chemin
@@ -0,0 +1,152 @@
+# fuzzy_matching.py
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+import config
+from normalized_columns import forme_normalisee
+from run_profiler import compter
+from union_find import composantes_connexes
+
+# Attributs d'identité qui doivent être identiques pour comparer deux noms : l'appariement approché
+# ne relâche que le nom, comme les clés np_naissance, np_cin, np_telephone et np_mail.
+COLONNES_BLOCAGE = ['naissance_date', 'cin', 'telephone', 'mail']
+LONGUEUR_PREFIXE = 4
+
+
+# --- Normalisation des noms ---
+
+def decouper_nom(nom_complet: str) -> list:
+    """Mots du nom complet en majuscules, sans accents ni caractères hors A-Z."""
+    sans_accents = unicodedata.normalize('NFKD', nom_complet).encode('ascii', 'ignore').decode('ascii')
+    mots = re.sub(r'[^A-Z]+', ' ', sans_accents.upper()).split()
+    return [mot for mot in mots if len(mot) > 1]
+
+def forme_phonetique(mot: str) -> str:
+    """
+    Forme approximative d'un mot pour le blocage, adaptée aux noms malgaches et aux prénoms français :
+    'Y' s'écrit pour 'I' (RAKOTONIRINY / RAKOTONIRINI), les lettres doublées sont réduites (RAVELOSSON),
+    et un 'S', 'E' ou 'X' final muet est retiré (JEANS / JEAN).
+    """
+    mot = mot.replace('Y', 'I')
+    mot = ''.join(c for i, c in enumerate(mot) if i == 0 or c != mot[i - 1])
+    if len(mot) > 3 and mot[-1] in 'SEX':
+        mot = mot[:-1]
+    return mot
+
+def texte_comparaison(mots: list) -> str:
+    """Mots triés : l'ordre nom / prénoms n'influence pas la similarité."""
+    return ' '.join(sorted(mots))
+
+def similarite(texte_a: str, texte_b: str) -> float:
+    """Ratio de difflib (0 à 1) entre deux noms, avec les bornes rapides avant le calcul complet."""
+    comparateur = SequenceMatcher(None, texte_a, texte_b, autojunk=False)
+    if comparateur.real_quick_ratio() < config.SEUIL_SIMILARITE_NOMS:
+        return comparateur.real_quick_ratio()
+    if comparateur.quick_ratio() < config.SEUIL_SIMILARITE_NOMS:
+        return comparateur.quick_ratio()
+    return comparateur.ratio()
+
+
+# --- Index de blocage ---
+
+def _noms_complets(df: pd.DataFrame) -> pd.Series:
+    """Nom et prénoms en majuscules (formes partagées, cf. normalized_columns), NA si le nom manque."""
+    nom = forme_normalisee(df['nom'], 'majuscules').astype(object)
+    if 'prenoms' in df.columns:
+        prenoms = forme_normalisee(df['prenoms'], 'majuscules').astype(object).where(df['prenoms'].notna(), '')
+    else:
+        prenoms = ''
+    return (nom + ' ' + prenoms).where(df['nom'].notna())
+
+def _prefixes_par_nom(noms_uniques: np.ndarray) -> tuple:
+    """
+    Pour chaque nom distinct : le code de son texte de comparaison et ses clés de blocage (préfixe
+    phonétique de chaque mot, ce qui couvre l'inversion nom / prénoms et les fautes en fin de mot).
+    Retourne (codes de texte par nom, textes distincts, codes de nom, codes de préfixe) ; un nom
+    apparaît une fois par préfixe distinct.
+    """
+    textes, noms, prefixes = [], [], []
+    for code, nom_complet in enumerate(noms_uniques):
+        mots = decouper_nom(nom_complet)
+        textes.append(texte_comparaison(mots))
+        for prefixe in {forme_phonetique(mot)[:LONGUEUR_PREFIXE] for mot in mots}:
+            noms.append(code)
+            prefixes.append(prefixe)
+    codes_textes, textes_distincts = pd.factorize(pd.Series(textes, dtype=object))
+    codes_prefixes, _ = pd.factorize(pd.Series(prefixes, dtype=object))
+    return (codes_textes.astype(np.int64), np.asarray(textes_distincts, dtype=object),
+            np.array(noms, dtype=np.int64), codes_prefixes.astype(np.int64))
+
+def paires_candidates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Paires de lignes (positions ligne_a < ligne_b) de noms différents qui partagent un attribut de
+    COLONNES_BLOCAGE et un préfixe phonétique. Les blocs de plus de TAILLE_MAX_BLOC_APPROCHE lignes
+    (valeurs de remplissage, dates par défaut...) sont ignorés : le nombre de comparaisons reste
+    proportionnel au nombre de lignes.
+    """
+    codes_noms, noms_uniques = pd.factorize(_noms_complets(df), use_na_sentinel=True)
+    textes_par_nom, textes, noms_prefixes, codes_prefixes = _prefixes_par_nom(np.asarray(noms_uniques, dtype=object))
+
+    # Lignes × préfixes de leur nom
+    lignes_nommees = np.flatnonzero(codes_noms >= 0)
+    table_prefixes = pd.DataFrame({'nom': noms_prefixes, 'prefixe': codes_prefixes})
+    lignes_prefixes = pd.DataFrame({'ligne': lignes_nommees, 'nom': codes_noms[lignes_nommees]}) \
+        .merge(table_prefixes, on='nom')
+
+    paires = []
+    for col in COLONNES_BLOCAGE:
+        if col not in df.columns:
+            continue
+        valeurs = forme_normalisee(df[col], 'alphanumerique', vides_en_na=True).where(df[col].notna())
+        codes_valeurs, _ = pd.factorize(valeurs, use_na_sentinel=True)
+
+        blocs = lignes_prefixes.assign(valeur=codes_valeurs[lignes_prefixes['ligne'].to_numpy()])
+        blocs = blocs[blocs['valeur'] >= 0]
+        taille = blocs.groupby(['valeur', 'prefixe'])['ligne'].transform('size')
+        compter('lignes_blocs_approches_ignorees', int((taille > config.TAILLE_MAX_BLOC_APPROCHE).sum()))
+        blocs = blocs[(taille > 1) & (taille <= config.TAILLE_MAX_BLOC_APPROCHE)]
+
+        couples = blocs.merge(blocs, on=['valeur', 'prefixe'], suffixes=('_a', '_b'))
+        couples = couples[(couples['ligne_a'] < couples['ligne_b']) & (couples['nom_a'] != couples['nom_b'])]
+        paires.append(couples[['ligne_a', 'ligne_b', 'nom_a', 'nom_b']])
+
+    if not paires:
+        return pd.DataFrame(columns=['ligne_a', 'ligne_b', 'similarite'])
+    paires = pd.concat(paires, ignore_index=True).drop_duplicates(subset=['ligne_a', 'ligne_b'])
+
+    # Similarité calculée une fois par couple de textes de comparaison distincts (1 s'ils sont égaux)
+    paires['texte_a'] = textes_par_nom[paires['nom_a'].to_numpy()]
+    paires['texte_b'] = textes_par_nom[paires['nom_b'].to_numpy()]
+    couples = paires.loc[paires['texte_a'] != paires['texte_b'], ['texte_a', 'texte_b']].drop_duplicates()
+    compter('comparaisons_noms', len(couples))
+    couples['similarite'] = [similarite(textes[a], textes[b]) for a, b in zip(couples['texte_a'], couples['texte_b'])]
+    paires = paires.merge(couples, on=['texte_a', 'texte_b'], how='left')
+    paires['similarite'] = paires['similarite'].fillna(1.0)
+    return paires[['ligne_a', 'ligne_b', 'similarite']]
+
+
+# --- Clé de chaînage ---
+
+def cle_nom_approche(df: pd.DataFrame) -> pd.Series:
+    """
+    Clé de chaînage issue de l'appariement approché : les lignes reliées par des paires de similarité
+    au moins égale à SEUIL_SIMILARITE_NOMS reçoivent le même numéro (composantes connexes), les autres
+    NA. Elle est chaînée comme clé contrôlée (règle d'exclusion sur CIN et date de naissance).
+    """
+    if 'nom' not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype='Int64')
+
+    paires = paires_candidates(df)
+    retenues = paires[paires['similarite'] >= config.SEUIL_SIMILARITE_NOMS]
+    compter('paires_approchees_retenues', len(retenues))
+
+    racines = composantes_connexes(len(df), retenues['ligne_a'].to_numpy(), retenues['ligne_b'].to_numpy())
+    reliees = np.zeros(len(df), dtype=bool)
+    reliees[retenues['ligne_a'].to_numpy()] = True
+    reliees[retenues['ligne_b'].to_numpy()] = True
+    return pd.Series(racines, index=df.index, dtype='Int64').where(reliees)
@@ -0,0 +1,171 @@
+# incremental_manager.py
+
+import os
+import json
+import hashlib
+
+import pandas as pd
+
+import config
+import workbook_cache
+from categorical_encoding import concatener_dataframes
+from run_profiler import mesurer
+from data_cleaner import (
+    SIGNATURE_LECTURE,
+    lister_fichiers_sources,
+    attribuer_annees_universitaires,
+    charger_fichiers,
+    nettoyer_donnees
+)
+
+NOM_FICHIER_MANIFESTE = 'manifeste_incremental.json'
+NOM_DOSSIER_NETTOYES = 'nettoyage_incremental'
+
+# Version du nettoyage : à incrémenter à chaque modification des étapes de ETAPES_NETTOYAGE (ou des
+# fonctions et constantes qu'elles utilisent) qui change les lignes nettoyées. Les lignes conservées
+# par une autre version sont renettoyées.
+VERSION_NETTOYAGE = 2
+
+# Paramètres de config qui changent les lignes nettoyées (valeurs ou types des colonnes) : leurs valeurs
+# entrent dans la signature du manifeste. Les colonnes lues sont couvertes par SIGNATURE_LECTURE ; les
+# paramètres d'exécution (NB_FILS_NETTOYAGE, tailles de cache) n'en font pas partie.
+CONFIG_NETTOYAGE = ('ENCODAGE_CATEGORIEL_ACTIF', 'COLONNES_CATEGORIELLES', 'MOTEUR_CHAINES')
+
+
+def signature_manifeste() -> str:
+    """Signature de la lecture et du nettoyage ayant produit les lignes nettoyées en stock."""
+    valeurs_config = {nom: getattr(config, nom) for nom in CONFIG_NETTOYAGE}
+    empreinte_config = hashlib.sha256(repr(sorted(valeurs_config.items())).encode('utf-8')).hexdigest()[:16]
+    return f'{SIGNATURE_LECTURE}|nettoyage:v{VERSION_NETTOYAGE}:{empreinte_config}'
+
+def charger_manifeste(dossier_sortie: str) -> dict:
+    """Charge le manifeste de la dernière exécution. Retourne un manifeste vide s'il est absent ou obsolète."""
+    chemin = os.path.join(dossier_sortie, NOM_FICHIER_MANIFESTE)
+    manifeste_vide = {'signature': signature_manifeste(), 'fichiers': {}}
+    if not os.path.exists(chemin):
+        return manifeste_vide
+    try:
+        with open(chemin, 'r', encoding='utf-8') as f:
+            manifeste = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Manifeste illisible ({e}). Reconstruction complète.")
+        return manifeste_vide
+    if manifeste.get('signature') != signature_manifeste():
+        print("⚠️ Le nettoyage a changé depuis la dernière exécution. Reconstruction complète.")
+        return manifeste_vide
+    return manifeste
+
+def sauver_manifeste(manifeste: dict, dossier_sortie: str) -> None:
+    """Écrit le manifeste de façon atomique."""
+    chemin = os.path.join(dossier_sortie, NOM_FICHIER_MANIFESTE)
+    chemin_tmp = chemin + '.tmp'
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, indent=1)
+    os.replace(chemin_tmp, chemin)
+
+def fichier_inchange(fichier: str, entree: dict, dossier_nettoyes: str) -> bool:
+    """Compare le fichier source à son entrée du manifeste (taille, date, puis hash du contenu si la date diffère)."""
+    if entree is None or not os.path.exists(os.path.join(dossier_nettoyes, entree['fichier_nettoye'])):
+        return False
+    empreinte = workbook_cache.calculer_empreinte(fichier, avec_hash=False)
+    if empreinte['taille'] != entree['taille']:
+        return False
+    if empreinte['mtime_ns'] != entree['mtime_ns']:
+        if workbook_cache.calculer_hash_contenu(fichier) != entree['sha256']:
+            return False
+        entree['mtime_ns'] = empreinte['mtime_ns']
+    return True
+
+def _nom_fichier_nettoye(fichier: str) -> str:
+    return hashlib.sha256(os.path.abspath(fichier).encode('utf-8')).hexdigest()[:32] + '.pkl'
+
+def charger_et_nettoyer_incremental(dossier_path: str, filtre_2023: str, filtre_2024: str, filtre_2025: str,
+                                    dossier_sortie: str, nb_processus: int = 1,
+                                    dossier_cache: str = None, taille_max_cache_mo: int = None) -> pd.DataFrame:
+    """
+    Équivalent incrémental de charger_et_combiner_fichiers + nettoyer_donnees : seul le nettoyage
+    est incrémental.
+
+    Le nettoyage est appliqué fichier par fichier et les lignes nettoyées de chaque fichier source
+    sont conservées sur disque. Un manifeste (chemin, taille, date, hash, fichier nettoyé) décrit les
+    fichiers ayant alimenté la dernière sortie :
+    - seuls les fichiers ajoutés ou modifiés sont relus et nettoyés ;
+    - les lignes des fichiers supprimés sont retirées ;
+    - les lignes des fichiers inchangés sont reprises telles quelles.
+    Les lignes sont recombinées dans l'ordre trié des fichiers : le résultat est identique à celui
+    d'une reconstruction complète (manifeste vide), qui nettoie elle aussi chaque fichier séparément.
+
+    Les étapes globales (chaînage des étudiants, explosion par semestre) restent recalculées sur
+    l'ensemble des lignes par l'appelant : les codes dépendent de toutes les inscriptions.
+    """
+    dossier_nettoyes = os.path.join(dossier_sortie, NOM_DOSSIER_NETTOYES)
+    os.makedirs(dossier_nettoyes, exist_ok=True)
+
+    fichiers_excel = lister_fichiers_sources(dossier_path, filtre_2023, filtre_2024, filtre_2025)
+    if not fichiers_excel:
+        print(f"❌ Aucun fichier Excel trouvé dans {dossier_path} avec les motifs spécifiés.")
+        return pd.DataFrame()
+
+    annees_par_fichier = attribuer_annees_universitaires(fichiers_excel, filtre_2023, filtre_2024, filtre_2025)
+    manifeste = charger_manifeste(dossier_sortie)
+    anciens = manifeste['fichiers']
+
+    # 1. Classement des fichiers : inchangés, ajoutés/modifiés, supprimés
+    cles_courantes = {os.path.abspath(fichier): fichier for fichier in annees_par_fichier}
+    supprimes = [cle for cle in anciens if cle not in cles_courantes]
+    a_nettoyer = {
+        fichier: annee for fichier, annee in annees_par_fichier.items()
+        if not (anciens.get(os.path.abspath(fichier), {}).get('annee') == annee
+                and fichier_inchange(fichier, anciens.get(os.path.abspath(fichier)), dossier_nettoyes))
+    }
+
+    print(f"--- 🔁 Nettoyage incrémental : {len(annees_par_fichier) - len(a_nettoyer)} fichier(s) inchangé(s), "
+          f"{len(a_nettoyer)} ajouté(s)/modifié(s), {len(supprimes)} supprimé(s) ---")
+
+    # 2. Retrait des lignes des fichiers supprimés
+    for cle in supprimes:
+        entree = anciens.pop(cle)
+        chemin = os.path.join(dossier_nettoyes, entree['fichier_nettoye'])
+        if os.path.exists(chemin):
+            os.remove(chemin)
+        print(f"  > Lignes retirées : {os.path.basename(cle)} ({entree['nb_lignes']} lignes)")
+
+    # 3. Chargement et nettoyage des seuls fichiers ajoutés ou modifiés
+    if a_nettoyer:
+        dfs_bruts = charger_fichiers(a_nettoyer, nb_processus, dossier_cache, taille_max_cache_mo)
+        for fichier, df_brut in dfs_bruts.items():
+            print(f"\n--- 🧽 Nettoyage de {os.path.basename(fichier)} ---")
+            df_nettoye = mesurer(nettoyer_donnees, df_brut)
+            nom_nettoye = _nom_fichier_nettoye(fichier)
+            df_nettoye.to_pickle(os.path.join(dossier_nettoyes, nom_nettoye))
+
+            entree = workbook_cache.calculer_empreinte(fichier)
+            entree.update({
+                'annee': a_nettoyer[fichier],
+                'fichier_nettoye': nom_nettoye,
+                'nb_lignes': len(df_nettoye),
+            })
+            anciens[os.path.abspath(fichier)] = entree
+
+        # Un fichier modifié devenu illisible ne doit pas laisser d'anciennes lignes
+        for fichier in a_nettoyer:
+            if fichier not in dfs_bruts:
+                entree = anciens.pop(os.path.abspath(fichier), None)
+                if entree:
+                    chemin = os.path.join(dossier_nettoyes, entree['fichier_nettoye'])
+                    if os.path.exists(chemin):
+                        os.remove(chemin)
+
+    sauver_manifeste(manifeste, dossier_sortie)
+
+    # 4. Recombinaison dans l'ordre trié des fichiers (identique à une reconstruction complète)
+    liste_dfs = [
+        pd.read_pickle(os.path.join(dossier_nettoyes, anciens[cle]['fichier_nettoye']))
+        for cle in cles_courantes if cle in anciens
+    ]
+    if not liste_dfs:
+        return pd.DataFrame()
+
+    df_nettoye = concatener_dataframes(liste_dfs)
+    print(f"\n✅ Total des lignes nettoyées après recombinaison : {len(df_nettoye)}")
+    return df_nettoye
@@ -3,11 +3,66 @@
 import pandas as pd
 import numpy as np
 
-def gerer_code_inscription_par_semestre(df: pd.DataFrame) -> pd.DataFrame:
+import config
+from categorical_encoding import appliquer_sur_modalites, en_texte
+from run_profiler import profiler
+
+# --- Explosion par semestre ---
+
+def lignes_et_semestres(df: pd.DataFrame, semestre_cols: list) -> tuple:
+    """
+    Paires (position de la ligne, numéro du semestre 0-15) des semestres inscrits, lues dans le masque
+    16 bits 'semestres_masque' (ou, à défaut, dans les colonnes S01-S16 égales à 1). Les paires sont
+    ordonnées semestre par semestre puis ligne par ligne, comme le faisait df.melt.
+    """
+    if 'semestres_masque' in df.columns and df['semestres_masque'].notna().all():
+        masques = df['semestres_masque'].to_numpy(dtype=np.uint16)
+    else:
+        masques = np.zeros(len(df), dtype=np.uint16)
+        for numero, col in enumerate(semestre_cols):
+            if col in df.columns:
+                inscrit = (df[col] == 1).to_numpy(dtype=bool, na_value=False)
+                masques |= inscrit.astype(np.uint16) << np.uint16(numero)
+
+    bits = (masques[None, :] >> np.arange(len(semestre_cols), dtype=np.uint16)[:, None]) & 1
+    semestres, lignes = np.nonzero(bits)
+    return lignes, semestres
+
+def exploser_par_semestre(df: pd.DataFrame, semestre_cols: list) -> pd.DataFrame:
+    """
+    Une ligne par semestre inscrit, avec toutes les colonnes de df sauf S01-S16 et la colonne
+    'semestre_id' (S01...). Les lignes sont rassemblées en une seule indexation (take) : seul le
+    résultat est alloué, au lieu du tableau 16 fois plus haut de melt. Les colonnes S01-S16 sont
+    retirées de df (une colonne Int64 par bloc : sans copie des autres colonnes).
+    Mêmes lignes, même ordre et même index que df.melt suivi du filtre inscrit == 1.
+    """
+    lignes, semestres = lignes_et_semestres(df, semestre_cols)
+    for col in semestre_cols:
+        if col in df.columns:
+            del df[col]
+
+    df_semestres = df.take(lignes)
+    df_semestres.index = semestres * len(df) + lignes
+
+    etiquettes = np.array(semestre_cols, dtype=object)
+    if config.ENCODAGE_CATEGORIEL_ACTIF:
+        # Modalités = semestres présents, triés (comme encoder_categoriel), sans factoriser les chaînes
+        presents = np.unique(semestres)
+        df_semestres['semestre_id'] = pd.Categorical.from_codes(
+            np.searchsorted(presents, semestres),
+            dtype=pd.CategoricalDtype(pd.Index(etiquettes[presents], dtype=object)),
+        )
+    else:
+        df_semestres['semestre_id'] = etiquettes[semestres]
+    return df_semestres
+
+
+def gerer_code_inscription_par_semestre(df: pd.DataFrame, doublons: dict = None) -> pd.DataFrame:
     """
     Transforme les inscriptions de niveau annuel à niveau semestriel (explosion).
     Crée un identifiant unique (code_inscription) basé sur la contrainte d'unicité 
-    semestrielle et supprime les doublons.
+    semestrielle et supprime les doublons. Si `doublons` est un dictionnaire, les lignes candidates
+    au dédoublonnage et le masque des lignes conservées y sont conservés sous 'inscriptions'.
     
     La clé d'unicité est: code_etudiant + annee_universitaire + id_Parcours + Semestre (SXX).
     Le format du code_inscription est: 'code_etudiant_2X-2X_id_Parcours_SXX'.
@@ -31,19 +86,10 @@ def gerer_code_inscription_par_semestre(df: pd.DataFrame) -> pd.DataFrame:
 
     print("\n--- ÉTAPE 1 : EXPLOSION DES LIGNES PAR SEMESTRE INSCRIT ---")
     
-    # 2.1 Utiliser melt pour transformer les colonnes SXX en lignes
-    # On récupère toutes les colonnes qui ne sont PAS des SXX pour les garder comme identifiants
-    id_vars_list = [col for col in df.columns if col not in semestre_cols]
-    
-    df_melted = df.melt(
-        id_vars=id_vars_list,
-        value_vars=semestre_cols,
-        var_name='semestre_id',
-        value_name='inscrit'
-    )
-    
-    # 2.2 Filtrer pour ne garder que les inscriptions (où SXX vaut 1)
-    df_semestres = df_melted[df_melted['inscrit'] == 1].copy()
+    with profiler('explosion_semestres', lignes_entree=len(df)) as mesure:
+        # Paires (ligne, semestre) lues dans le masque des semestres, puis une seule indexation des lignes
+        df_semestres = exploser_par_semestre(df, semestre_cols)
+        mesure['lignes_sortie'] = len(df_semestres)
     
     lignes_explosees = len(df_semestres)
     print(f"🔥 Lignes après explosion (Semestres inscrits) : {lignes_explosees}.")
@@ -53,17 +99,27 @@ def gerer_code_inscription_par_semestre(df: pd.DataFrame) -> pd.DataFrame:
     print("\n--- ÉTAPE 2 : SUPPRESSION DES DOUBLONS SUR LA CONTRAINTE SEMESTRIELLE ---")
     
     # Clé de CONTRAINTE (code_etudiant + annee_universitaire + id_Parcours + semestre_id)
-    df_semestres['cle_contrainte'] = (
-        df_semestres['code_etudiant'].astype(str).fillna('NA_ID') + 
-        df_semestres['annee_universitaire'].astype(str).fillna('NA_ANNEE') + 
-        df_semestres['id_Parcours'].astype(str).fillna('NA_PARC') +
-        df_semestres['semestre_id'].astype(str).fillna('NA_SEME')
-    )
+    # Le dédoublonnage porte directement sur les colonnes de la clé : les colonnes catégorielles
+    # y sont comparées par leurs codes entiers, sans construire de clé concaténée en chaînes.
+    cle_contrainte = ['code_etudiant', 'annee_universitaire', 'id_Parcours', 'semestre_id']
     
     lignes_avant_dedup = len(df_semestres)
     
-    # Suppression des doublons (si deux fichiers sources donnent la même inscription semestrielle)
-    df_final = df_semestres.drop_duplicates(subset=['cle_contrainte'], keep='first').copy()
+    with profiler('dedoublonnage_semestriel', lignes_entree=lignes_avant_dedup) as mesure:
+        # Suppression des doublons (si deux fichiers sources donnent la même inscription semestrielle).
+        # Une ligne source ne donne qu'une ligne par semestre : seuls les étudiants présents sur plusieurs
+        # lignes sources peuvent avoir des doublons, la recherche se limite à leurs lignes.
+        candidates = df_semestres['code_etudiant'].isin(
+            df['code_etudiant'][df['code_etudiant'].duplicated()].unique()).to_numpy()
+        conservees = np.ones(len(df_semestres), dtype=bool)
+        conservees[candidates] = ~df_semestres[candidates].duplicated(subset=cle_contrainte, keep='first').to_numpy()
+        df_final = df_semestres[conservees]
+        mesure['lignes_sortie'] = len(df_final)
+
+    if doublons is not None:
+        # Lignes candidates et masque des lignes conservées, pour le rapport des doublons
+        doublons['inscriptions'] = (df_semestres[candidates].reset_index(drop=True), cle_contrainte, conservees[candidates])
+    del df_semestres
     
     lignes_supprimees = lignes_avant_dedup - len(df_final)
 
@@ -84,20 +140,24 @@ def gerer_code_inscription_par_semestre(df: pd.DataFrame) -> pd.DataFrame:
         except:
             return 'ERR_A'
 
-    df_final['annee_courte'] = df_final['annee_universitaire'].apply(format_annee_courte)
-    
-    # Assemblage du code final : 'code_etudiant_2X-2X_id_Parcours_SXX'
-    df_final['code_inscription'] = (
-        df_final['code_etudiant'].astype(str) + '_' +
-        df_final['annee_courte'].astype(str) + '_' +
-        df_final['id_Parcours'].astype(str) + '_' +
-        df_final['semestre_id'].astype(str)
-    )
+    with profiler('generation_code_inscription'):
+        # Calculé une fois par année distincte quand la colonne est catégorielle
+        df_final['annee_courte'] = appliquer_sur_modalites(
+            df_final['annee_universitaire'], lambda annees: annees.apply(format_annee_courte)
+        )
+    
+        # Assemblage du code final : 'code_etudiant_2X-2X_id_Parcours_SXX'
+        df_final['code_inscription'] = (
+            df_final['code_etudiant'].astype(str) + '_' +
+            df_final['annee_courte'].astype(str) + '_' +
+            en_texte(df_final['id_Parcours']) + '_' +
+            en_texte(df_final['semestre_id'])
+        )
     
     # --- 5. Nettoyage final ---
     
     # Suppression des colonnes temporaires et des colonnes SXX originales
-    colonnes_a_supprimer = ['cle_contrainte', 'inscrit', 'annee_courte'] + semestre_cols
+    colonnes_a_supprimer = ['inscrit', 'annee_courte'] + semestre_cols
     df_final = df_final.drop(columns=colonnes_a_supprimer, errors='ignore')
     
     # Mise à jour du nom de la colonne de semestre pour correspondre aux COLONNES_ATTENDUES si nécessaire
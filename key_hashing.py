@@ -0,0 +1,69 @@
+# key_hashing.py
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+from pandas.util import hash_array
+
+from run_profiler import compter
+
+# Hachage rapide de pandas (SipHash-2-4, clé fixe) ; tout autre nom est un algorithme de hashlib
+ALGORITHME_SIPHASH = 'siphash'
+
+
+# --- Hachage des valeurs distinctes ---
+
+def _hacher_textes(textes: np.ndarray, algorithme: str) -> np.ndarray:
+    """Empreinte 64 bits signée de chaque texte, avec l'algorithme demandé (tronqué à 8 octets)."""
+    if algorithme.lower() == ALGORITHME_SIPHASH:
+        return hash_array(textes, categorize=False).view(np.int64)
+    try:
+        hashlib.new(algorithme)
+    except ValueError:
+        raise ValueError(f"Algorithme de hachage inconnu : {algorithme!r} "
+                         f"(attendu : '{ALGORITHME_SIPHASH}' ou un algorithme de hashlib)") from None
+    return np.fromiter(
+        (int.from_bytes(hashlib.new(algorithme, texte.encode('utf-8')).digest()[:8], 'little', signed=True)
+         for texte in textes),
+        dtype=np.int64, count=len(textes),
+    )
+
+def _resoudre_collisions(textes: np.ndarray, hachages: np.ndarray, algorithme: str) -> np.ndarray:
+    """
+    Détecte les textes distincts de même empreinte et rehache les suivants avec un sel (#1, #2...)
+    jusqu'à ce que chaque texte ait une empreinte propre. Les textes en collision sont départagés
+    dans l'ordre trié des textes, pas dans l'ordre des lignes : le plus petit garde son empreinte,
+    et l'empreinte d'un texte ne dépend pas de l'ordre de chargement (clés du registre).
+    """
+    ordre = np.argsort(textes.astype(str), kind='stable')
+    sel = 0
+    while True:
+        en_collision = np.empty(len(hachages), dtype=bool)
+        en_collision[ordre] = pd.Series(hachages[ordre]).duplicated(keep='first').to_numpy()
+        if not en_collision.any():
+            return hachages
+        sel += 1
+        compter('collisions_cles_hachees', int(en_collision.sum()))
+        print(f"⚠️ {int(en_collision.sum())} collision(s) d'empreinte sur les clés de chaînage : rehachage (sel #{sel}).")
+        hachages = hachages.copy()
+        sales = np.array([f'#{sel}:{texte}' for texte in textes[en_collision]], dtype=object)
+        hachages[en_collision] = _hacher_textes(sales, algorithme)
+
+
+# --- Clés hachées ---
+
+def hacher_cle(serie: pd.Series, algorithme: str = 'SHA256') -> pd.Series:
+    """
+    Remplace une clé de chaînage texte par son empreinte 64 bits (Int64, NA conservés) : les
+    regroupements se font sur des entiers et la colonne occupe 9 octets par ligne. L'empreinte est
+    calculée une fois par valeur distincte, et les collisions sont détectées sur les textes sources.
+    """
+    codes, valeurs = pd.factorize(serie, use_na_sentinel=True)
+    textes = np.asarray(valeurs, dtype=object)
+    hachages = _resoudre_collisions(textes, _hacher_textes(textes, algorithme), algorithme)
+
+    manquantes = codes < 0
+    entiers = np.zeros(len(codes), dtype=np.int64)
+    entiers[~manquantes] = hachages[codes[~manquantes]]
+    return pd.Series(pd.arrays.IntegerArray(entiers, manquantes), index=serie.index, name=serie.name)
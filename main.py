@@ -8,13 +8,30 @@ try:
     # Module pour le nettoyage des champs (standardisation, formatage)
     from data_cleaner import (
         charger_et_combiner_fichiers,
-        nettoyer_donnees 
+        nettoyer_donnees,
+        iterer_lots_bruts,
+        nettoyer_donnees_par_lots
     )
     # CORRECTION APPLIQUÉE : On revient au nom de fonction attendu 'gerer_code_etudiant_et_consolider'
     from student_code_manager import gerer_code_etudiant_et_consolider 
     
     # MODIFICATION CLÉ : Remplacement du module inscription_code_manager par inscription_semestre_code_manager
     from inscription_semestre_code_manager import gerer_code_inscription_par_semestre
+
+    # Nettoyage incrémental : seuls les fichiers ajoutés ou modifiés sont rechargés et nettoyés
+    from incremental_manager import charger_et_nettoyer_incremental
+
+    # Mesure de la mémoire résidente (RSS) par étape
+    from memory_monitor import suivre_etape, afficher_rapport_memoire
+
+    # Rapport de l'encodage catégoriel des colonnes répétitives
+    from categorical_encoding import afficher_economie_memoire
+
+    # Rapport d'exécution par étape (durée, CPU, mémoire, lignes)
+    from run_profiler import demarrer_profilage, mesurer, profiler, ecrire_rapport
+
+    # Formes normalisées des colonnes partagées entre nettoyage et codes étudiants
+    from normalized_columns import vider_cache_formes
     
     print("✅ Configuration et tous les gestionnaires de données importés.")
 except ImportError as e:
@@ -32,38 +49,112 @@ def main():
     print("🚀 Démarrage du Pipeline de Traitement de Données 🎓")
     print("==================================================")
 
-    # 1. Chargement et combinaison des données brutes
-    print("\n\n--- ÉTAPE 1/4 : CHARGEMENT ET COMBINAISON ---")
-    df_brut = charger_et_combiner_fichiers(
-        dossier_path=config.DOSSIER_PATH,
-        filtre_2023=config.NOM_FILTRE_2023,
-        filtre_2024=config.NOM_FILTRE_2024,
-        # NOUVEAU : Ajout du filtre 2025 pour la nouvelle année universitaire
-        filtre_2025=config.NOM_FILTRE_2025 
-    )
+    # Mode mémoire économe : chaque étape prend possession de son entrée (pas de copie défensive)
+    # et les DataFrames précédents sont libérés (del) dès que l'étape suivante a produit le sien.
+    econome = config.MODE_MEMOIRE_ECONOME
+    rapport_memoire = []
+
+    if config.PROFILAGE_ACTIF:
+        demarrer_profilage(suivre_memoire=config.PROFILAGE_MEMOIRE)
+
+    if config.MODE_INCREMENTAL:
+        # 1-2. Chargement et nettoyage limités aux fichiers ajoutés ou modifiés depuis la dernière exécution
+        print("\n\n--- ÉTAPES 1-2/4 : CHARGEMENT ET NETTOYAGE INCRÉMENTAUX ---")
+        with suivre_etape("1-2. Chargement et nettoyage incrémentaux", rapport_memoire):
+            df_nettoye = mesurer(
+                charger_et_nettoyer_incremental,
+                dossier_path=config.DOSSIER_PATH,
+                filtre_2023=config.NOM_FILTRE_2023,
+                filtre_2024=config.NOM_FILTRE_2024,
+                filtre_2025=config.NOM_FILTRE_2025,
+                dossier_sortie=config.DOSSIER_SORTIE,
+                nb_processus=config.NB_PROCESSUS_CHARGEMENT,
+                dossier_cache=config.DOSSIER_CACHE if config.CACHE_CLASSEURS_ACTIF else None,
+                taille_max_cache_mo=config.CACHE_TAILLE_MAX_MO
+            )
 
-    if df_brut.empty:
-        print("❌ Le traitement est arrêté car aucune donnée n'a été chargée.")
-        return
+        if df_nettoye.empty:
+            print("❌ Le traitement est arrêté car aucune donnée n'a été chargée.")
+            return
+    elif config.MODE_FLUX_PAR_LOTS:
+        # 1-2. Chargement et nettoyage en flux, lot par lot (mémoire bornée par un classeur brut et un lot nettoyé)
+        print("\n\n--- ÉTAPES 1-2/4 : CHARGEMENT ET NETTOYAGE PAR LOTS ---")
+        with suivre_etape("1-2. Chargement et nettoyage par lots", rapport_memoire):
+            lots_bruts = iterer_lots_bruts(
+                dossier_path=config.DOSSIER_PATH,
+                filtre_2023=config.NOM_FILTRE_2023,
+                filtre_2024=config.NOM_FILTRE_2024,
+                filtre_2025=config.NOM_FILTRE_2025,
+                taille_lot=config.TAILLE_LOT_NETTOYAGE,
+                dossier_cache=config.DOSSIER_CACHE if config.CACHE_CLASSEURS_ACTIF else None,
+                taille_max_cache_mo=config.CACHE_TAILLE_MAX_MO
+            )
+            df_nettoye = mesurer(nettoyer_donnees_par_lots, lots_bruts)
+
+        if df_nettoye.empty:
+            print("❌ Le traitement est arrêté car aucune donnée n'a été chargée.")
+            return
+
+        print(f"\n✅ Total des lignes après nettoyage des champs : {len(df_nettoye)}")
+    else:
+        # 1. Chargement et combinaison des données brutes
+        print("\n\n--- ÉTAPE 1/4 : CHARGEMENT ET COMBINAISON ---")
+        with suivre_etape("1. Chargement et combinaison", rapport_memoire):
+            df_brut = mesurer(
+                charger_et_combiner_fichiers,
+                dossier_path=config.DOSSIER_PATH,
+                filtre_2023=config.NOM_FILTRE_2023,
+                filtre_2024=config.NOM_FILTRE_2024,
+                # NOUVEAU : Ajout du filtre 2025 pour la nouvelle année universitaire
+                filtre_2025=config.NOM_FILTRE_2025,
+                # Lecture parallèle des classeurs (nombre de processus configurable)
+                nb_processus=config.NB_PROCESSUS_CHARGEMENT,
+                # Cache des classeurs : seuls les fichiers nouveaux ou modifiés sont relus
+                dossier_cache=config.DOSSIER_CACHE if config.CACHE_CLASSEURS_ACTIF else None,
+                taille_max_cache_mo=config.CACHE_TAILLE_MAX_MO
+            )
+
+        if df_brut.empty:
+            print("❌ Le traitement est arrêté car aucune donnée n'a été chargée.")
+            return
     
-    print(f"✅ Total des lignes brutes chargées : {len(df_brut)}")
+        print(f"✅ Total des lignes brutes chargées : {len(df_brut)}")
 
-    # 2. Nettoyage des données (champs)
-    print("\n\n--- ÉTAPE 2/4 : EXÉCUTION DU NETTOYAGE DES CHAMPS (data_cleaner) ---")
-    df_nettoye = nettoyer_donnees(df_brut.copy()) 
+        # 2. Nettoyage des données (champs)
+        print("\n\n--- ÉTAPE 2/4 : EXÉCUTION DU NETTOYAGE DES CHAMPS (data_cleaner) ---")
+        with suivre_etape("2. Nettoyage des champs", rapport_memoire):
+            df_nettoye = mesurer(nettoyer_donnees, df_brut if econome else df_brut.copy())
+            if econome:
+                del df_brut
     
-    print(f"\n✅ Total des lignes après nettoyage des champs : {len(df_nettoye)}")
+        print(f"\n✅ Total des lignes après nettoyage des champs : {len(df_nettoye)}")
     
+    # Liens et lignes conservés par les étapes 3 et 4 pour les rapports des doublons, écrits avec les exports
+    doublons = {} if config.RAPPORT_DOUBLONS_ACTIF else None
+
     # 3. Gestion des Codes Étudiants et Consolidation
     print("\n\n--- ÉTAPE 3/4 : CRÉATION DU CODE ÉTUDIANT ET CONSOLIDATION (student_code_manager) ---")
-    df_intermediaire = gerer_code_etudiant_et_consolider(df_nettoye.copy()) 
+    with suivre_etape("3. Codes étudiants et consolidation", rapport_memoire):
+        df_intermediaire = mesurer(gerer_code_etudiant_et_consolider, df_nettoye if econome else df_nettoye.copy(),
+                                   hash_algorithm=config.ALGORITHME_HACHAGE_CLES, doublons=doublons)
+        if econome:
+            del df_nettoye
+    # Les formes normalisées partagées entre nettoyage et codes étudiants ne servent plus
+    vider_cache_formes()
     
     print(f"\n✅ Total des lignes après gestion des codes étudiants : {len(df_intermediaire)}") 
     
     # 4. Gestion des Codes d'Inscription par Semestre et Suppression des Doublons
     print("\n\n--- ÉTAPE 4/4 : CRÉATION DU CODE INSCRIPTION PAR SEMESTRE ET SUPPRESSION DES DOUBLONS ---")
     # MODIFICATION CLÉ : Appel à la nouvelle fonction semestrielle
-    df_final = gerer_code_inscription_par_semestre(df_intermediaire.copy()) 
+    with suivre_etape("4. Codes d'inscription par semestre", rapport_memoire):
+        df_final = mesurer(gerer_code_inscription_par_semestre, df_intermediaire if econome else df_intermediaire.copy(),
+                           doublons=doublons)
+        if econome:
+            del df_intermediaire
+
+    if config.ENCODAGE_CATEGORIEL_ACTIF:
+        afficher_economie_memoire(df_final)
 
     # 5. Finalisation et Exportation
     
@@ -72,7 +163,9 @@ def main():
     # Sécurité : ne garder que les colonnes attendues dans le bon ordre
     colonnes_a_exporter = [col for col in config.COLONNES_ATTENDUES if col in df_final.columns]
     
-    df_export = df_final[colonnes_a_exporter].copy()
+    df_export = df_final[colonnes_a_exporter] if econome else df_final[colonnes_a_exporter].copy()
+    if econome:
+        del df_final
     
     # Assurer l'existence du dossier de sortie
     if not os.path.exists(config.DOSSIER_SORTIE):
@@ -84,7 +177,8 @@ def main():
 
     # Exportation
     try:
-        df_export.to_excel(chemin_sortie, index=False)
+        with suivre_etape("5. Exportation", rapport_memoire), profiler('exportation', lignes_entree=len(df_export)):
+            df_export.to_excel(chemin_sortie, index=False)
         print("\n==================================================")
         print(f"🎉 Succès ! Données nettoyées et codées exportées à :")
         print(f"➡️ **{chemin_sortie}**")
@@ -93,6 +187,29 @@ def main():
     except Exception as e:
         print(f"\n❌ Erreur lors de l'exportation du fichier : {e}")
 
+    # Rapports des doublons, à côté du fichier exporté
+    if doublons is not None:
+        with profiler('rapports_doublons'):
+            ecrire_rapports_doublons(doublons, config.DOSSIER_SORTIE, config.FORMAT_RAPPORT_DOUBLONS,
+                                     config.FICHIER_DOUBLONS_ETUDIANTS, config.FICHIER_DOUBLONS_INSCRIPTIONS)
+        del doublons
+
+    afficher_rapport_memoire(rapport_memoire)
+
+    if config.PROFILAGE_ACTIF:
+        chemin_json, chemin_csv = ecrire_rapport(
+            config.DOSSIER_SORTIE,
+            config.FICHIER_RAPPORT_EXECUTION,
+            parametres={
+                'mode_incremental': config.MODE_INCREMENTAL,
+                'mode_flux_par_lots': config.MODE_FLUX_PAR_LOTS,
+                'nb_processus_chargement': config.NB_PROCESSUS_CHARGEMENT,
+                'nb_fils_nettoyage': config.NB_FILS_NETTOYAGE,
+                'lignes_exportees': len(df_export),
+            }
+        )
+        print(f"\n📝 Rapport d'exécution : {chemin_json} (et {os.path.basename(chemin_csv)})")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+# memory_monitor.py
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+# --- Dépendance optionnelle : sans psutil, la mémoire est lue dans /proc (Linux) ---
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+CHEMIN_STATUS = '/proc/self/status'
+CHEMIN_CLEAR_REFS = '/proc/self/clear_refs'
+INTERVALLE_ECHANTILLONNAGE = 0.05 # secondes, quand le pic ne peut pas être lu dans le noyau
+
+
+# --- Lecture de la mémoire résidente (RSS) ---
+
+def _lire_status(champ: str):
+    """Valeur (en octets) d'un champ de /proc/self/status (ex : 'VmRSS', 'VmHWM'), None si indisponible."""
+    try:
+        with open(CHEMIN_STATUS, 'r') as f:
+            for ligne in f:
+                if ligne.startswith(champ + ':'):
+                    return int(ligne.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def rss_courant():
+    """Mémoire résidente actuelle du processus, en octets (None si elle ne peut pas être mesurée)."""
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss
+    return _lire_status('VmRSS')
+
+def _reinitialiser_pic_noyau() -> bool:
+    """
+    Remet à zéro le pic de RSS tenu par le noyau (VmHWM), pour mesurer le pic d'une seule étape.
+    Retourne False si ce n'est pas possible (système autre que Linux, droits insuffisants).
+    """
+    try:
+        with open(CHEMIN_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return _lire_status('VmHWM') is not None
+    except OSError:
+        return False
+
+
+# --- Suivi par étape ---
+
+@contextmanager
+def suivre_etape(nom_etape: str, rapport: list):
+    """
+    Mesure la durée et la mémoire (RSS au début, à la fin et pic) d'une étape du pipeline
+    et ajoute le résultat à `rapport`.
+    Le pic est lu dans le noyau quand c'est possible (Linux), sinon échantillonné par un thread.
+    """
+    rss_debut = rss_courant()
+    pic_noyau = _reinitialiser_pic_noyau()
+    pic_echantillonne = [rss_debut or 0]
+    arret = threading.Event()
+
+    def echantillonner():
+        while not arret.wait(INTERVALLE_ECHANTILLONNAGE):
+            pic_echantillonne[0] = max(pic_echantillonne[0], rss_courant() or 0)
+
+    thread = None
+    if not pic_noyau and rss_debut is not None:
+        thread = threading.Thread(target=echantillonner, daemon=True)
+        thread.start()
+
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        arret.set()
+        if thread is not None:
+            thread.join()
+        rss_fin = rss_courant()
+        pic = _lire_status('VmHWM') if pic_noyau else max(pic_echantillonne[0], rss_fin or 0)
+        rapport.append({
+            'etape': nom_etape,
+            'duree_s': duree,
+            'rss_debut': rss_debut,
+            'rss_fin': rss_fin,
+            'rss_pic': pic,
+        })
+
+def _en_mo(octets) -> str:
+    return f"{octets / (1024 * 1024):.0f} Mo" if octets is not None else "n/d"
+
+def afficher_rapport_memoire(rapport: list) -> None:
+    """Affiche, pour chaque étape suivie, la durée et la mémoire résidente (début, fin, pic)."""
+    if not rapport:
+        return
+    print("\n--- 🧠 Mémoire résidente (RSS) par étape ---")
+    print(f"{'Étape':<40} {'Durée':>9} {'Début':>9} {'Fin':>9} {'Pic':>9}")
+    for mesure in rapport:
+        print(f"{mesure['etape']:<40} {mesure['duree_s']:>8.1f}s {_en_mo(mesure['rss_debut']):>9} "
+              f"{_en_mo(mesure['rss_fin']):>9} {_en_mo(mesure['rss_pic']):>9}")
+    pics = [mesure['rss_pic'] for mesure in rapport if mesure['rss_pic'] is not None]
+    if pics:
+        print(f"Pic global : {_en_mo(max(pics))}")
@@ -0,0 +1,148 @@
+# normalized_columns.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+import config
+import string_engine
+from categorical_encoding import est_categoriel
+from run_profiler import compter
+
+# Formes canoniques d'une colonne, chacune dérivée de la précédente :
+#   'texte'          = astype(str)
+#   'majuscules'     = texte.str.upper().str.strip()
+#   'alphanumerique' = majuscules sans les caractères hors [A-Z0-9]
+FORMES = ('texte', 'majuscules', 'alphanumerique')
+
+_CACHE = {}                 # nom de colonne -> données sources, factorisation et formes déjà calculées
+_VERROU = threading.Lock()
+
+
+# --- Factorisation d'une colonne ---
+
+def _textes_manquants(serie: pd.Series, manquantes: np.ndarray) -> np.ndarray:
+    """
+    Texte de chaque valeur manquante, comme astype(str) ('None', 'nan', 'NaT', '<NA>'...).
+    Les colonnes catégorielles donnent '<NA>', comme les colonnes de chaînes non encodées (cf. en_texte).
+    """
+    if est_categoriel(serie) or isinstance(serie.dtype, pd.StringDtype):
+        return np.full(int(manquantes.sum()), '<NA>', dtype=object)
+    return serie[manquantes].astype(str).to_numpy(dtype=object)
+
+def _factoriser(serie: pd.Series) -> tuple:
+    """Codes de chaque ligne et texte (astype(str)) de chaque valeur distincte, valeurs manquantes comprises."""
+    codes, valeurs = pd.factorize(serie, use_na_sentinel=True)
+    textes = pd.Series(valeurs).astype(str).to_numpy(dtype=object)
+    manquantes = codes == -1
+    if manquantes.any():
+        # factorize regroupe les valeurs manquantes, alors qu'astype(str) distingue None, NaN et pd.NA
+        codes_na, textes_na = pd.factorize(_textes_manquants(serie, manquantes))
+        codes = codes.copy()
+        codes[manquantes] = len(textes) + codes_na
+        textes = np.concatenate([textes, np.asarray(textes_na, dtype=object)])
+    return codes, textes
+
+def _donnees(serie: pd.Series) -> tuple:
+    """
+    Identité des données d'une colonne, obtenue sans parcourir ses valeurs : le tableau qui les porte
+    (conservé dans le cache, il ne peut être libéré puis réalloué à la même adresse) et la position
+    de la colonne dans ce tableau. Une colonne remplacée (df[col] = ...) change de tableau ; une
+    colonne modifiée sur place garde le sien et doit être signalée par invalider_formes.
+    """
+    tableau = serie.array
+    valeurs = getattr(tableau, '_ndarray', None)
+    if valeurs is None:
+        # Tableau d'extension (chaînes Arrow, catégories...) : l'objet est propre à la colonne
+        return tableau, None
+    support = valeurs
+    while isinstance(support.base, np.ndarray):
+        support = support.base
+    return support, (valeurs.__array_interface__['data'][0], valeurs.strides, len(valeurs))
+
+def _entree(serie: pd.Series) -> dict:
+    """
+    Factorisation de la colonne, reprise du cache si la colonne du même nom porte toujours les mêmes
+    données (même tableau, même position, même index) ; sinon l'entrée est recalculée.
+    """
+    if not config.CACHE_FORMES_NORMALISEES_ACTIF or serie.name is None:
+        codes, textes = _factoriser(serie)
+        return {'codes': codes, 'formes': {'texte': textes}}
+
+    support, position = _donnees(serie)
+    with _VERROU:
+        precedente = _CACHE.get(serie.name)
+    if (precedente is not None and precedente['support'] is support and precedente['position'] == position
+            and precedente['index'].equals(serie.index)):
+        compter('formes_normalisees_reutilisees')
+        return precedente
+
+    codes, textes = _factoriser(serie)
+    entree = {'codes': codes, 'formes': {'texte': textes}, 'support': support, 'position': position,
+              'index': serie.index}
+    with _VERROU:
+        _CACHE[serie.name] = entree
+    return entree
+
+
+# --- Formes (calculées sur les valeurs distinctes) ---
+
+def _deriver(forme: str, textes: np.ndarray) -> np.ndarray:
+    """Calcule `forme` à partir de la forme dont elle dérive, avec le moteur de chaînes actif."""
+    if string_engine.moteur_arrow():
+        tableau = string_engine.pa.array(textes, type=string_engine.pa.large_string())
+        if forme == 'majuscules':
+            tableau = string_engine.supprimer_espaces(string_engine.majuscules(tableau))
+        else:
+            tableau = string_engine.remplacer_regex(tableau, r'[^A-Z0-9]', '')
+        return tableau.to_numpy(zero_copy_only=False).astype(object)
+
+    valeurs = pd.Series(textes, dtype=object)
+    if forme == 'majuscules':
+        valeurs = valeurs.str.upper().str.strip()
+    else:
+        valeurs = valeurs.str.replace(r'[^A-Z0-9]', '', regex=True)
+    return valeurs.to_numpy(dtype=object)
+
+def _forme(entree: dict, forme: str) -> np.ndarray:
+    formes = entree['formes']
+    if forme not in formes:
+        parent = FORMES[FORMES.index(forme) - 1]
+        formes[forme] = _deriver(forme, _forme(entree, parent))
+        compter('formes_normalisees_calculees')
+    return formes[forme]
+
+def forme_normalisee(serie: pd.Series, forme: str, vides_en_na: bool = False) -> pd.Series:
+    """
+    Forme canonique d'une colonne (voir FORMES), calculée une seule fois par exécution pour chaque
+    colonne tant que ses données ne changent pas : le nettoyage et la création du code étudiant lisent
+    ainsi la même forme sans la recalculer. Avec vides_en_na, les chaînes vides deviennent pd.NA.
+    Le résultat est une colonne de chaînes du moteur actif (config.MOTEUR_CHAINES).
+    """
+    if forme not in FORMES:
+        raise ValueError(f"Forme inconnue : {forme!r} (attendu : {', '.join(FORMES)})")
+
+    entree = _entree(serie)
+    valeurs = _forme(entree, forme)
+    if vides_en_na:
+        valeurs = np.where(valeurs == '', pd.NA, valeurs)
+
+    if string_engine.moteur_arrow():
+        pa = string_engine.pa
+        tableau = pa.array(valeurs, type=pa.large_string(), from_pandas=True).take(pa.array(entree['codes']))
+        return string_engine.en_serie(tableau, serie.index, serie.name)
+    return pd.Series(valeurs[entree['codes']], index=serie.index, name=serie.name)
+
+def invalider_formes(colonnes=None) -> None:
+    """
+    Oublie les formes des colonnes données (toutes si None) : appelée après chaque étape de nettoyage
+    pour les colonnes qu'elle déclare écrire, qui peuvent avoir été modifiées sur place.
+    """
+    with _VERROU:
+        for col in list(_CACHE) if colonnes is None else colonnes:
+            _CACHE.pop(col, None)
+
+def vider_cache_formes() -> None:
+    """Libère les formes conservées (fin de la création des codes étudiants)."""
+    invalider_formes()
@@ -0,0 +1,271 @@
+# run_profiler.py
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from memory_monitor import rss_courant
+
+# --- État du profilage (une exécution du pipeline) ---
+
+_MESURES = OrderedDict()        # chemin de l'étape (tuple de noms) -> mesures agrégées sur tous les appels
+_VERROU = threading.Lock()
+_LOCAL = threading.local()      # pile des étapes en cours, propre à chaque thread
+_ETAT = {'actif': False, 'memoire': False, 'tracemalloc_demarre': False, 'pile_principale': []}
+
+SUFFIXE_PRECEDENT = '_precedent'
+
+
+def demarrer_profilage(suivre_memoire: bool = True) -> None:
+    """
+    Active l'enregistrement des mesures (durée, temps CPU, mémoire, lignes, compteurs).
+    La variation de mémoire résidente (RSS) est toujours relevée ; avec suivre_memoire, le pic
+    d'allocation de chaque étape est en plus mesuré par tracemalloc, qui suit aussi numpy/pandas
+    mais ralentit nettement le code Python pur (export openpyxl notamment).
+    """
+    _MESURES.clear()
+    _ETAT['actif'] = True
+    _ETAT['memoire'] = suivre_memoire
+    _ETAT['pile_principale'] = _pile()
+    if suivre_memoire and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _ETAT['tracemalloc_demarre'] = True
+
+def arreter_profilage() -> list:
+    """Désactive le profilage et retourne les mesures enregistrées (une ligne par étape)."""
+    _ETAT['actif'] = False
+    if _ETAT['tracemalloc_demarre']:
+        tracemalloc.stop()
+        _ETAT['tracemalloc_demarre'] = False
+    return lignes_rapport()
+
+def _pile() -> list:
+    if not hasattr(_LOCAL, 'pile'):
+        _LOCAL.pile = []
+    return _LOCAL.pile
+
+def _est_thread_principal() -> bool:
+    return threading.current_thread() is threading.main_thread()
+
+
+# --- Mesure d'une étape ---
+
+@contextmanager
+def profiler(nom: str, lignes_entree: int = None):
+    """
+    Mesure le bloc comme une étape nommée, imbriquée dans l'étape en cours.
+    Les appels répétés d'une même étape (boucles, lots) sont agrégés : 'appels' en donne le nombre.
+    Le bloc reçoit un dictionnaire où il peut renseigner 'lignes_entree' et 'lignes_sortie'.
+
+    La mémoire n'est mesurée que dans le thread principal (RSS et tracemalloc sont globaux au
+    processus) ; dans un thread secondaire, le temps CPU est celui du thread.
+    """
+    if not _ETAT['actif']:
+        yield {}
+        return
+
+    pile = _pile()
+    principal = _est_thread_principal()
+    # Une étape exécutée dans un thread secondaire est rattachée à l'étape en cours du thread principal
+    parents = pile if pile or principal else list(_ETAT['pile_principale'])
+    chemin = tuple(cadre['nom'] for cadre in parents) + (nom,)
+    memoire = _ETAT['memoire'] and principal and tracemalloc.is_tracing()
+    _reserver(chemin)
+
+    cadre = {'nom': nom, 'pic': 0, 'lignes_entree': lignes_entree, 'lignes_sortie': None}
+    if memoire:
+        courant, pic = tracemalloc.get_traced_memory()
+        if pile:
+            # Le pic atteint jusqu'ici par l'étape parente est conservé avant la remise à zéro
+            pile[-1]['pic'] = max(pile[-1]['pic'], pic)
+        tracemalloc.reset_peak()
+        cadre['memoire_debut'] = courant
+        cadre['pic'] = courant
+    pile.append(cadre)
+
+    horloge_cpu = time.process_time if principal else time.thread_time
+    rss_debut = rss_courant() if principal else None
+    debut, debut_cpu = time.perf_counter(), horloge_cpu()
+    try:
+        yield cadre
+    finally:
+        duree, cpu = time.perf_counter() - debut, horloge_cpu() - debut_cpu
+        pile.pop()
+        rss_fin = rss_courant() if rss_debut is not None else None
+        rss_delta = rss_fin - rss_debut if rss_fin is not None else None
+        pic_delta = None
+        if memoire:
+            cadre['pic'] = max(cadre['pic'], tracemalloc.get_traced_memory()[1])
+            pic_delta = cadre['pic'] - cadre['memoire_debut']
+            if pile:
+                pile[-1]['pic'] = max(pile[-1]['pic'], cadre['pic'])
+        _enregistrer(chemin, duree, cpu, rss_delta, pic_delta,
+                     cadre['lignes_entree'], cadre['lignes_sortie'], cadre.get('compteurs', {}))
+
+def _reserver(chemin: tuple) -> None:
+    """Crée l'entrée de l'étape dès son démarrage : le rapport suit l'ordre d'exécution (parent avant enfants)."""
+    with _VERROU:
+        if chemin not in _MESURES:
+            _MESURES[chemin] = {
+                'appels': 0, 'duree_s': 0.0, 'cpu_s': 0.0, 'rss_delta_octets': None, 'pic_memoire_delta_octets': None,
+                'lignes_entree': None, 'lignes_sortie': None, 'compteurs': {},
+            }
+
+def _enregistrer(chemin: tuple, duree: float, cpu: float, rss_delta, pic_delta,
+                 lignes_entree, lignes_sortie, compteurs: dict) -> None:
+    with _VERROU:
+        mesure = _MESURES[chemin]
+        mesure['appels'] += 1
+        mesure['duree_s'] += duree
+        mesure['cpu_s'] += cpu
+        if rss_delta is not None:
+            mesure['rss_delta_octets'] = (mesure['rss_delta_octets'] or 0) + rss_delta
+        if pic_delta is not None:
+            mesure['pic_memoire_delta_octets'] = max(mesure['pic_memoire_delta_octets'] or 0, pic_delta)
+        for cle, valeur in (('lignes_entree', lignes_entree), ('lignes_sortie', lignes_sortie)):
+            if valeur is not None:
+                mesure[cle] = (mesure[cle] or 0) + valeur
+        for cle, valeur in compteurs.items():
+            mesure['compteurs'][cle] = mesure['compteurs'].get(cle, 0) + valeur
+
+def mesurer(fonction, *args, nom: str = None, **kwargs):
+    """
+    Appelle fonction(*args, **kwargs) comme une étape profilée (nommée d'après la fonction).
+    Les lignes en entrée et en sortie sont relevées quand l'étape produit un DataFrame
+    (à partir du premier argument DataFrame, s'il y en a un).
+    """
+    if not _ETAT['actif']:
+        return fonction(*args, **kwargs)
+
+    entree = next((arg for arg in args if isinstance(arg, pd.DataFrame)), None)
+    with profiler(nom or fonction.__name__) as cadre:
+        resultat = fonction(*args, **kwargs)
+        if isinstance(resultat, pd.DataFrame):
+            cadre['lignes_sortie'] = len(resultat)
+            if entree is not None:
+                cadre['lignes_entree'] = len(entree)
+    return resultat
+
+def compter(nom: str, valeur: int = 1) -> None:
+    """Ajoute une valeur à un compteur de l'étape en cours (ex : nombre d'itérations de chaînage)."""
+    if not _ETAT['actif'] or not _pile():
+        return
+    compteurs = _pile()[-1].setdefault('compteurs', {})
+    compteurs[nom] = compteurs.get(nom, 0) + valeur
+
+
+# --- Rapport ---
+
+def lignes_rapport() -> list:
+    """Mesures agrégées, une ligne par étape, dans l'ordre de premier démarrage."""
+    lignes = []
+    with _VERROU:
+        for chemin, mesure in _MESURES.items():
+            ligne = {'etape': ' > '.join(chemin), 'niveau': len(chemin) - 1}
+            ligne.update(mesure)
+            ligne['compteurs'] = dict(mesure['compteurs'])
+            lignes.append(ligne)
+    return lignes
+
+def ecrire_rapport(dossier: str, nom_base: str, parametres: dict = None) -> tuple:
+    """
+    Écrit le rapport d'exécution en JSON (rapport complet) et en CSV (une ligne par étape, compteurs
+    en colonnes 'compteur_<nom>'). Le rapport précédent est conservé sous '<nom_base>_precedent'
+    pour pouvoir comparer les deux dernières exécutions.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    chemin_json = os.path.join(dossier, nom_base + '.json')
+    chemin_csv = os.path.join(dossier, nom_base + '.csv')
+    for chemin in (chemin_json, chemin_csv):
+        if os.path.exists(chemin):
+            racine, extension = os.path.splitext(chemin)
+            os.replace(chemin, racine + SUFFIXE_PRECEDENT + extension)
+
+    lignes = lignes_rapport()
+    rapport = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'parametres': parametres or {},
+        'etapes': lignes,
+    }
+    with open(chemin_json, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=1, ensure_ascii=False, default=str)
+
+    df_rapport = pd.DataFrame([{k: v for k, v in ligne.items() if k != 'compteurs'} for ligne in lignes])
+    for i, ligne in enumerate(lignes):
+        for cle, valeur in ligne['compteurs'].items():
+            df_rapport.loc[i, f'compteur_{cle}'] = valeur
+    df_rapport.to_csv(chemin_csv, index=False, encoding='utf-8')
+
+    return chemin_json, chemin_csv
+
+def charger_rapport(chemin: str) -> dict:
+    with open(chemin, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# --- Comparaison de deux rapports ---
+
+def comparer_rapports(ancien: dict, nouveau: dict) -> pd.DataFrame:
+    """
+    Aligne les étapes de deux rapports et calcule les écarts (nouveau - ancien) de durée, de temps CPU,
+    de mémoire et de lignes produites. Les étapes présentes dans un seul rapport sont conservées.
+    """
+    colonnes = ['duree_s', 'cpu_s', 'rss_delta_octets', 'pic_memoire_delta_octets', 'lignes_sortie', 'appels']
+    df_ancien = pd.DataFrame(ancien['etapes']).set_index('etape').reindex(columns=colonnes)
+    df_nouveau = pd.DataFrame(nouveau['etapes']).set_index('etape').reindex(columns=colonnes)
+    ordre = list(df_nouveau.index) + [etape for etape in df_ancien.index if etape not in df_nouveau.index]
+
+    comparaison = df_ancien.add_suffix('_ancien').join(df_nouveau.add_suffix('_nouveau'), how='outer').reindex(ordre)
+    for col in colonnes:
+        comparaison[f'{col}_ecart'] = comparaison[f'{col}_nouveau'] - comparaison[f'{col}_ancien']
+    comparaison['duree_ratio'] = comparaison['duree_s_nouveau'] / comparaison['duree_s_ancien']
+    return comparaison
+
+def _formater(valeur, format_nombre: str, suffixe: str = '') -> str:
+    return '—' if pd.isna(valeur) else f"{valeur:{format_nombre}}{suffixe}"
+
+def afficher_comparaison(comparaison: pd.DataFrame, seuil: float = 0.2, duree_min: float = 0.05) -> None:
+    """
+    Affiche les écarts par étape ; ⚠️ signale une durée en hausse de plus de `seuil` (et de plus de
+    duree_min secondes). L'écart mémoire porte sur le pic tracemalloc s'il a été mesuré, sinon sur la RSS.
+    """
+    print(f"{'Étape':<70} {'Avant':>9} {'Après':>9} {'Écart':>8} {'Mém. Δ (Mo)':>11} {'Lignes Δ':>9}")
+    for etape, ligne in comparaison.iterrows():
+        regression = (ligne['duree_ratio'] > 1 + seuil) and (ligne['duree_s_ecart'] > duree_min)
+        ecart_pic = ligne['pic_memoire_delta_octets_ecart']
+        if pd.isna(ecart_pic):
+            ecart_pic = ligne['rss_delta_octets_ecart']
+        ecart_lignes = ligne['lignes_sortie_ecart']
+        print(f"{'⚠️ ' if regression else '   '}{etape[:67]:<67} "
+              f"{_formater(ligne['duree_s_ancien'], '.2f', 's'):>9} {_formater(ligne['duree_s_nouveau'], '.2f', 's'):>9} "
+              f"{_formater(ligne['duree_ratio'] - 1, '+.0%'):>8} "
+              f"{_formater(ecart_pic / 1024 ** 2, '+.1f'):>11} {_formater(ecart_lignes, '+.0f'):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deux rapports d'exécution (JSON) du pipeline.")
+    parser.add_argument('ancien', help="Rapport de référence (ex : rapport_execution_precedent.json)")
+    parser.add_argument('nouveau', help="Rapport à comparer (ex : rapport_execution.json)")
+    parser.add_argument('--seuil', type=float, default=0.2, help="Hausse relative de durée signalée (défaut : 0.2)")
+    parser.add_argument('--csv', help="Écrit aussi la comparaison complète dans ce fichier CSV")
+    args = parser.parse_args()
+
+    comparaison = comparer_rapports(charger_rapport(args.ancien), charger_rapport(args.nouveau))
+    afficher_comparaison(comparaison, seuil=args.seuil)
+    if args.csv:
+        comparaison.to_csv(args.csv, encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
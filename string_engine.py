@@ -0,0 +1,115 @@
+# string_engine.py
+
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# --- Dépendance optionnelle : sans pyarrow, le moteur 'object' (chaînes Python) est utilisé ---
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+# Caractères retirés par str.strip() (tous les caractères c tels que c.isspace()) : le même ensemble
+# est passé à Arrow pour un résultat identique
+ESPACES_PYTHON = (
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+)
+
+
+def moteur_arrow() -> bool:
+    """True si les chaînes sont traitées par les noyaux Arrow (config.MOTEUR_CHAINES = 'pyarrow' et pyarrow installé)."""
+    return config.MOTEUR_CHAINES == 'pyarrow' and pa is not None
+
+def type_chaines():
+    """Type pandas des colonnes de chaînes produites par le moteur actif."""
+    return 'string[pyarrow]' if moteur_arrow() else object
+
+def stockage_chaines() -> str:
+    """Stockage de pd.StringDtype correspondant au moteur actif."""
+    return 'pyarrow' if moteur_arrow() else 'python'
+
+
+# --- Conversions pandas <-> Arrow ---
+
+def en_arrow(serie: pd.Series, conserver_na: bool = False):
+    """
+    Tableau Arrow (large_string) du texte de la colonne, identique à serie.astype(str).
+    Avec conserver_na, les valeurs manquantes restent nulles au lieu de devenir 'nan' / '<NA>'.
+    Les chaînes déjà Arrow sont reprises sans copie ; les colonnes object ne contenant que des
+    chaînes sont converties directement, les autres passent par astype(str).
+    """
+    if isinstance(serie.dtype, pd.StringDtype) and serie.dtype.storage == 'pyarrow':
+        tableau = pa.array(serie.array).cast(pa.large_string())
+        if isinstance(tableau, pa.ChunkedArray):
+            # Colonne issue d'une concaténation (lots, fichiers) : un seul bloc contigu
+            tableau = tableau.combine_chunks()
+    else:
+        valeurs = serie.to_numpy(dtype=object)
+        try:
+            tableau = pa.array(valeurs, type=pa.large_string(), from_pandas=True)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            # Nombres, dates... : le texte est celui de astype(str), calculé sur toute la colonne
+            manquantes = serie.isna().to_numpy()
+            tableau = pa.array(serie.astype(str).to_numpy(dtype=object), type=pa.large_string(),
+                               mask=manquantes if conserver_na else None)
+            return tableau
+
+    if not conserver_na and tableau.null_count:
+        manquantes = tableau.is_null()
+        textes_na = serie[manquantes.to_numpy(zero_copy_only=False)].astype(str).to_numpy(dtype=object)
+        tableau = pc.replace_with_mask(tableau, manquantes, pa.array(textes_na, type=pa.large_string()))
+    return tableau
+
+def en_serie(tableau, index: pd.Index, nom=None) -> pd.Series:
+    """Colonne pandas 'string[pyarrow]' à partir d'un tableau Arrow de chaînes (sans copie)."""
+    return pd.Series(pd.arrays.ArrowStringArray(tableau), index=index, name=nom)
+
+
+# --- Opérations (résultats identiques aux méthodes .str de pandas sur des chaînes Python) ---
+
+def majuscules(tableau):
+    """
+    Équivalent de str.upper(). Arrow n'applique que des correspondances caractère à caractère
+    ('ß' reste 'ß' alors que Python donne 'SS') : seules les valeurs ASCII passent par le noyau
+    Arrow, les autres (rares) sont mises en majuscules par Python.
+    """
+    resultat = pc.ascii_upper(tableau)
+    non_ascii = pc.invert(pc.fill_null(pc.string_is_ascii(tableau), True))
+    if pc.any(non_ascii).as_py():
+        remplacements = [valeur.upper() for valeur in pc.filter(tableau, non_ascii).to_pylist()]
+        resultat = pc.replace_with_mask(resultat, non_ascii, pa.array(remplacements, type=pa.large_string()))
+    return resultat
+
+def supprimer_espaces(tableau):
+    """Équivalent de str.strip()."""
+    return pc.utf8_trim(tableau, characters=ESPACES_PYTHON)
+
+def remplacer_texte(tableau, motif: str, remplacement: str):
+    """Équivalent de str.replace(motif, remplacement, regex=False)."""
+    return pc.replace_substring(tableau, pattern=motif, replacement=remplacement)
+
+def remplacer_regex(tableau, motif: str, remplacement: str):
+    """
+    Équivalent de str.replace(motif, remplacement, regex=True) pour les motifs dont la syntaxe
+    a le même sens en RE2 et dans le module re (classes de caractères explicites comme [^A-Z0-9]).
+    """
+    return pc.replace_substring_regex(tableau, pattern=motif, replacement=remplacement)
+
+def vide_en_nul(tableau):
+    """Remplace les chaînes vides par des valeurs nulles (équivalent de .replace('', pd.NA))."""
+    return pc.if_else(pc.equal(tableau, ''), pa.scalar(None, type=pa.large_string()), tableau)
+
+def concatener(tableaux: list, separateur: str = ''):
+    """Concaténation élément par élément (équivalent de str.cat(..., sep=separateur) et de '+')."""
+    return pc.binary_join_element_wise(*tableaux, pa.scalar(separateur, type=pa.large_string()))
+
+def repartir(valeurs, masque: np.ndarray):
+    """Tableau de la longueur de `masque`, nul partout sauf aux positions True qui reçoivent `valeurs` dans l'ordre."""
+    nuls = pa.nulls(len(masque), type=pa.large_string())
+    return pc.replace_with_mask(nuls, pa.array(masque), valeurs)
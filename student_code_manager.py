@@ -2,6 +2,23 @@ import pandas as pd
 import numpy as np
 from tqdm import tqdm
 import re # Nécessaire pour les expressions régulières dans le nettoyage
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pandas.util import hash_array
+
+import config
+from categorical_encoding import en_texte
+from run_profiler import mesurer, profiler, compter
+from union_find import aretes_par_cle, composantes_connexes, resumer_composantes
+from fuzzy_matching import cle_nom_approche
+from key_hashing import hacher_cle
+from consolidation_engine import indexer_groupes, diffuser, minimum_par_groupe, consolider_colonnes
+from student_registry import ouvrir_registre, prochaine_sequence, rechercher_correspondances, enregistrer
+from duplicate_report import liste_aretes, extraire_lignes_liees
+import string_engine
+from normalized_columns import forme_normalisee
+from string_engine import (
+    pa, pc, en_arrow, en_serie, majuscules, remplacer_regex, vide_en_nul, concatener, repartir
+)
 
 # --- Paramètres Globaux (Conservés pour la clarté) ---
 KEY_COLUMNS = [
@@ -12,6 +29,10 @@ KEY_COLUMNS = [
     'np_mail',
     'np_composante_mention' # Clé faible, utilisant composante et mention
 ]
+CLE_FAIBLE = 'np_composante_mention'
+CLE_NOM_APPROCHE = 'np_nom_approche' # Appariement approché des noms (config.APPARIEMENT_APPROCHE_ACTIF)
+CLES_REGISTRE = [cle for cle in KEY_COLUMNS if cle != CLE_FAIBLE] # Clés indexées par le registre des codes
+CLE_REGISTRE = 'registre' # Lien du rapport des doublons : groupes réunis par un code du registre
 COLONNES_FORTES_CHECK = ['cin', 'naissance_date'] 
 
 
@@ -22,21 +43,30 @@ def standardiser_champs_pour_hachage(df: pd.DataFrame) -> pd.DataFrame:
     # Colonnes à nettoyer spécifiquement pour la création de clés
     cols_a_nettoyer = ['nom', 'prenoms', 'cin_lieu', 'mail', 'composante', 'mention'] 
     
+    moteur_arrow = string_engine.moteur_arrow()
+
     for col in cols_a_nettoyer:
         if col in df.columns:
-            df[f'{col}_standard'] = df[col].astype(str).str.upper().str.strip()
-            if col not in ['cin', 'telephone']:
-                df[f'{col}_standard'] = df[f'{col}_standard'].str.replace(r'[^A-Z0-9]', '', regex=True)
-            df[f'{col}_standard'] = df[f'{col}_standard'].replace('', pd.NA)
+            # Forme partagée avec le nettoyage (normalized_columns) : déjà calculée si la colonne n'a pas changé
+            forme = 'majuscules' if col in ['cin', 'telephone'] else 'alphanumerique'
+            df[f'{col}_standard'] = forme_normalisee(df[col], forme, vides_en_na=True)
         else:
             df[f'{col}_standard'] = pd.NA
     
     # Création du champ Nom_Prenoms standard (Autorise Prénoms NULL)
-    df['nom_prenoms_standard'] = pd.NA
     nom_std = df.get('nom_standard', pd.Series(pd.NA, index=df.index))
     prenoms_std = df.get('prenoms_standard', pd.Series(pd.NA, index=df.index))
     condition_nom_ok = nom_std.notna() 
-    
+
+    if moteur_arrow:
+        nom_arrow = en_arrow(nom_std, conserver_na=True)
+        prenoms_arrow = en_arrow(prenoms_std, conserver_na=True)
+        nom_prenoms = concatener([pc.fill_null(nom_arrow, ''), pc.fill_null(prenoms_arrow, '')])
+        nom_prenoms = pc.if_else(pc.is_valid(nom_arrow), nom_prenoms, pa.scalar(None, type=pa.large_string()))
+        df['nom_prenoms_standard'] = en_serie(vide_en_nul(nom_prenoms), df.index)
+        return df
+
+    df['nom_prenoms_standard'] = pd.NA
     df.loc[condition_nom_ok, 'nom_prenoms_standard'] = \
         nom_std.fillna('') + prenoms_std.fillna('')
         
@@ -44,8 +74,11 @@ def standardiser_champs_pour_hachage(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
-def creer_cles_de_concatenation(df: pd.DataFrame) -> pd.DataFrame:
-    """Crée les colonnes de concaténation robustes demandées."""
+def creer_cles_de_concatenation(df: pd.DataFrame, hash_algorithm: str = 'SHA256') -> pd.DataFrame:
+    """
+    Crée les colonnes de concaténation robustes demandées, stockées sous forme d'empreintes 64 bits
+    (key_hashing.hacher_cle, algorithme hash_algorithm) : une seule clé texte existe à la fois.
+    """
     cles_config = {
         'np_naissance': ['nom_prenoms_standard', 'naissance_date'],
         'np_cin': ['nom_prenoms_standard', 'cin'],
@@ -65,6 +98,19 @@ def creer_cles_de_concatenation(df: pd.DataFrame) -> pd.DataFrame:
         for comp in components[1:]: 
             condition_creation &= df[comp].notna()
 
+        if string_engine.moteur_arrow():
+            # Clé construite par les noyaux Arrow sur les seules lignes retenues, puis répartie
+            parties = []
+            for col in components:
+                texte = majuscules(en_arrow(df.loc[condition_creation, col]))
+                if col in ['naissance_date', 'cin', 'telephone']:
+                    texte = remplacer_regex(texte, r'[^A-Z0-9-]', '')
+                parties.append(texte)
+            df[key_name] = hacher_cle(
+                en_serie(repartir(concatener(parties, '_'), condition_creation.to_numpy()), df.index), hash_algorithm
+            )
+            continue
+
         df[key_name] = pd.NA 
         
         if condition_creation.any():
@@ -84,6 +130,8 @@ def creer_cles_de_concatenation(df: pd.DataFrame) -> pd.DataFrame:
                 new_keys = new_keys.str.cat(cols_to_concat[i], sep='_')
 
             df.loc[condition_creation, key_name] = new_keys
+
+        df[key_name] = hacher_cle(df[key_name], hash_algorithm)
             
     return df
 
@@ -99,12 +147,409 @@ def verifier_contradiction_forte(df: pd.DataFrame, indices_a_tester: pd.Index, c
             
     return False
 
+# --- Chaînage des doublons ---
+
+def _groupes_minimaux(racines: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Pour chaque ligne, le plus petit id_temporaire de sa composante (l'id canonique du chaînage)."""
+    ids_min = np.full(len(ids), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(ids_min, racines, ids)
+    return ids_min[racines]
+
+def _contradictions(resumes: list, racines_courantes: np.ndarray, racines_cibles: np.ndarray) -> np.ndarray:
+    """
+    Équivalent vectorisé de verifier_contradiction_forte sur l'union de deux groupes, lu dans les
+    résumés (resumer_composantes) des colonnes fortes : plusieurs valeurs dans l'un des groupes,
+    ou une valeur différente de chaque côté.
+    """
+    contradiction = np.zeros(len(racines_courantes), dtype=bool)
+    for resume in resumes:
+        courant, cible = resume[racines_courantes], resume[racines_cibles]
+        contradiction |= (courant == -2) | (cible == -2) | ((courant >= 0) & (cible >= 0) & (courant != cible))
+    return contradiction
+
+def chainer_cles_libres(df: pd.DataFrame, cles_libres: list, silencieux: bool = False,
+                        liens: list = None) -> np.ndarray:
+    """
+    Racine (position de la plus petite ligne) de chaque ligne après fusion par les clés libres :
+    une arête par ligne vers la première ligne de même valeur, puis une seule passe d'union-find,
+    quelle que soit la longueur des chaînes de liens. Si `liens` est une liste, les arêtes y sont
+    ajoutées sous la forme (sources, cibles, clé).
+    """
+    aretes = [aretes_par_cle(df[cle]) for cle in tqdm(cles_libres, desc="Regroupement par clé", disable=silencieux)]
+    if liens is not None:
+        liens.extend((sources, cibles, cle) for (sources, cibles), cle in zip(aretes, cles_libres))
+    sources = np.concatenate([a[0] for a in aretes] + [np.empty(0, dtype=np.int64)])
+    cibles = np.concatenate([a[1] for a in aretes] + [np.empty(0, dtype=np.int64)])
+    compter('liens_fusionnes', len(sources))
+    return composantes_connexes(len(df), sources, cibles)
+
+def fusionner_cles_controlees(df: pd.DataFrame, racines: np.ndarray, cles_controlees: list,
+                              silencieux: bool = False, liens: list = None) -> np.ndarray:
+    """
+    Fusionne les groupes (racines) reliés par les clés contrôlées en appliquant la règle d'exclusion :
+    au sein d'une même valeur de clé, chaque groupe propose de rejoindre celui de plus petit id ; une
+    cible est validée si au moins une proposition ne crée pas de contradiction forte, et toutes les
+    propositions vers une cible validée sont fusionnées. Ces tours sont répétés jusqu'à ce qu'aucune
+    fusion ne soit acceptée. Retourne les nouvelles racines ; si `liens` est une liste, chaque fusion
+    acceptée y est ajoutée par les deux lignes qui partagent la valeur de clé (sources, cibles, clé).
+
+    Chaque groupe porte un résumé de ses valeurs de COLONNES_FORTES_CHECK, combiné à chaque fusion :
+    le test de contradiction ne relit pas les lignes.
+    """
+    nb_lignes = len(df)
+    ids = df['id_temporaire'].to_numpy(dtype=np.int64)
+    positions_par_id = pd.Series(np.arange(nb_lignes), index=ids)
+
+    # Résumé des colonnes fortes de chaque groupe (indexé par racine)
+    resumes = [
+        resumer_composantes(nb_lignes, racines, pd.factorize(df[col], use_na_sentinel=True)[0])
+        for col in COLONNES_FORTES_CHECK if col in df.columns
+    ]
+
+    valeurs_cles = {}
+    for cle in cles_controlees:
+        lignes = np.flatnonzero(df[cle].notna().to_numpy())
+        valeurs_cles[cle] = (lignes, df[cle].to_numpy()[lignes])
+
+    tour = 0
+    while True:
+        tour += 1
+        compter('iterations_chainage')
+        if not silencieux:
+            tqdm.write(f"--- Tour {tour} : Fusion par les clés contrôlées {cles_controlees} ---")
+        fusions_du_tour = 0
+
+        for cle in cles_controlees:
+            lignes, valeurs = valeurs_cles[cle]
+            if not len(lignes):
+                continue
+            id_groupe = _groupes_minimaux(racines, ids)
+            propositions = pd.DataFrame({'cle': valeurs, 'id_courant': id_groupe[lignes], 'racine_courante': racines[lignes]})
+            if liens is None:
+                propositions['id_cible'] = propositions.groupby('cle')['id_courant'].transform('min')
+            else:
+                # Ligne du groupe cible qui porte la même valeur de clé : la preuve du lien
+                propositions['ligne_cible'] = propositions.groupby('cle')['id_courant'].transform('idxmin')
+                propositions['id_cible'] = propositions['id_courant'].to_numpy()[propositions['ligne_cible'].to_numpy()]
+            propositions = propositions[propositions['id_courant'] > propositions['id_cible']] \
+                .drop_duplicates(subset=['id_courant', 'id_cible'])
+            if propositions.empty:
+                continue
+
+            racines_courantes = propositions['racine_courante'].to_numpy()
+            racines_cibles = racines[positions_par_id.loc[propositions['id_cible']].to_numpy()]
+            compatibles = ~_contradictions(resumes, racines_courantes, racines_cibles)
+            valides = propositions['id_cible'].isin(propositions.loc[compatibles, 'id_cible']).to_numpy()
+            if not valides.any():
+                continue
+            fusions_du_tour += int(valides.sum())
+            if liens is not None:
+                liens.append((lignes[propositions.index[valides]],
+                              lignes[propositions['ligne_cible'].to_numpy()[valides]], cle))
+
+            # Chaque ligne reste reliée à sa racine ; les fusions relient les racines des groupes
+            anciennes_racines = np.flatnonzero(racines == np.arange(nb_lignes))
+            racines = composantes_connexes(
+                nb_lignes,
+                np.concatenate([np.arange(nb_lignes), racines_courantes[valides]]),
+                np.concatenate([racines, racines_cibles[valides]]),
+            )
+            resumes = [resumer_composantes(nb_lignes, racines[anciennes_racines], resume[anciennes_racines])
+                       for resume in resumes]
+
+        compter('liens_fusionnes', fusions_du_tour)
+        if fusions_du_tour == 0:
+            break
+
+    if not silencieux:
+        tqdm.write("Pas de nouvelles fusions détectées. Le processus a convergé.")
+    return racines
+
+def chainer_par_propagation(df: pd.DataFrame, cles: list, cles_controlees: list, silencieux: bool = False,
+                            liens: list = None) -> np.ndarray:
+    """
+    Règle d'exclusion historique (config.CONTRADICTION_GROUPE_ENTIER = False) : à chaque tour, clé
+    après clé (dans l'ordre de `cles`), chaque ligne prend le plus petit id des lignes de même valeur,
+    jusqu'à ce qu'aucune ligne ne change. Pour une clé contrôlée, la contradiction est testée sur les
+    lignes qui portent déjà l'id courant ou l'id cible au moment du test, même si la propagation de
+    leur groupe n'est pas terminée. Retourne l'id_groupe de chaque ligne.
+
+    Vectorisé : un regroupement par clé et par tour, et les colonnes fortes des lignes de chaque id
+    sont lues dans des résumés (resumer_composantes) plutôt qu'en relisant les lignes.
+    """
+    nb_lignes = len(df)
+    ids = df['id_temporaire'].to_numpy(dtype=np.int64)
+    positions_par_id = pd.Index(ids)
+    etiquettes = ids.copy()
+    codes_forts = [pd.factorize(df[col], use_na_sentinel=True)[0] for col in COLONNES_FORTES_CHECK if col in df.columns]
+
+    valeurs_cles = {}
+    for cle in cles:
+        lignes = np.flatnonzero(df[cle].notna().to_numpy())
+        valeurs_cles[cle] = (lignes, pd.factorize(df[cle].to_numpy()[lignes])[0])
+
+    tour = 0
+    while True:
+        tour += 1
+        compter('iterations_chainage')
+        if not silencieux:
+            tqdm.write(f"--- Tour {tour} : Propagation par les clés {cles} ---")
+        fusions_du_tour = 0
+
+        for cle in cles:
+            lignes, codes = valeurs_cles[cle]
+            if not len(lignes):
+                continue
+            courants = pd.Series(etiquettes[lignes])
+            cibles = courants.groupby(codes).transform('min').to_numpy()
+            a_maj = courants.to_numpy() > cibles
+            if not a_maj.any():
+                continue
+
+            if cle in cles_controlees:
+                # Résumés des colonnes fortes par id courant (indexés par la position de la ligne de cet id)
+                racines = positions_par_id.get_indexer(etiquettes)
+                resumes = [resumer_composantes(nb_lignes, racines, codes_col) for codes_col in codes_forts]
+                paires = pd.DataFrame({'id_courant': courants.to_numpy()[a_maj], 'id_cible': cibles[a_maj]}) \
+                    .drop_duplicates()
+                compatibles = ~_contradictions(resumes, positions_par_id.get_indexer(paires['id_courant']),
+                                               positions_par_id.get_indexer(paires['id_cible']))
+                a_maj &= np.isin(cibles, paires.loc[compatibles, 'id_cible'].to_numpy())
+                if not a_maj.any():
+                    continue
+
+            if liens is not None:
+                # Ligne de même valeur qui porte l'id cible : la preuve du lien
+                lignes_cibles = courants.groupby(codes).transform('idxmin').to_numpy()
+                liens.append((lignes[a_maj], lignes[lignes_cibles[a_maj]], cle))
+            etiquettes[lignes[a_maj]] = cibles[a_maj]
+            fusions_du_tour += int(a_maj.sum())
+
+        compter('liens_fusionnes', fusions_du_tour)
+        if fusions_du_tour == 0:
+            break
+
+    if not silencieux:
+        tqdm.write("Pas de nouvelles fusions détectées. Le processus a convergé.")
+    return etiquettes
+
+def _repartir_cles(df: pd.DataFrame, toutes_controlees: bool) -> tuple:
+    """Clés de chaînage présentes dans df, réparties en (clés libres, clés contrôlées)."""
+    cles = [cle for cle in KEY_COLUMNS + [CLE_NOM_APPROCHE] if cle in df.columns]
+    cles_controlees = [cle for cle in cles if toutes_controlees or cle in (CLE_FAIBLE, CLE_NOM_APPROCHE)]
+    return [cle for cle in cles if cle not in cles_controlees], cles_controlees
+
+def _propagation_historique(df: pd.DataFrame, cles_controlees: list, groupe_entier: bool) -> bool:
+    """
+    Vrai si la règle d'exclusion historique (chainer_par_propagation) peut donner d'autres groupes
+    que l'union-find : sans clé contrôlée ou sans colonne forte, les deux donnent les composantes connexes.
+    """
+    return not groupe_entier and bool(cles_controlees) and any(col in df.columns for col in COLONNES_FORTES_CHECK)
+
+def chainer_doublons(df: pd.DataFrame, toutes_controlees: bool = None, silencieux: bool = False,
+                     liens: list = None, groupe_entier: bool = None) -> np.ndarray:
+    """
+    Regroupe les lignes qui partagent une clé de KEY_COLUMNS (et CLE_NOM_APPROCHE si elle a été
+    calculée), de proche en proche, et retourne pour chaque ligne l'id_groupe = plus petit
+    id_temporaire de son groupe.
+
+    Avec groupe_entier (par défaut config.CONTRADICTION_GROUPE_ENTIER), les clés libres sont résolues
+    en une seule passe d'union-find (chainer_cles_libres) et les clés contrôlées (CLE_FAIBLE et
+    CLE_NOM_APPROCHE, ou toutes si config.CONTRADICTION_TOUTES_CLES) appliquent ensuite la règle
+    d'exclusion au niveau des groupes complets (fusionner_cles_controlees). Sinon, la règle historique
+    est conservée (chainer_par_propagation).
+    Si `liens` est une liste, les liens acceptés y sont enregistrés (cf. duplicate_report.liste_aretes).
+    """
+    if toutes_controlees is None:
+        toutes_controlees = config.CONTRADICTION_TOUTES_CLES
+    if groupe_entier is None:
+        groupe_entier = config.CONTRADICTION_GROUPE_ENTIER
+    ids = df['id_temporaire'].to_numpy(dtype=np.int64)
+    cles_libres, cles_controlees = _repartir_cles(df, toutes_controlees)
+    if _propagation_historique(df, cles_controlees, groupe_entier):
+        cles = [cle for cle in KEY_COLUMNS + [CLE_NOM_APPROCHE] if cle in cles_libres + cles_controlees]
+        return chainer_par_propagation(df, cles, cles_controlees, silencieux, liens)
+
+    racines = chainer_cles_libres(df, cles_libres, silencieux, liens)
+    if cles_controlees:
+        racines = fusionner_cles_controlees(df, racines, cles_controlees, silencieux, liens)
+    return _groupes_minimaux(racines, ids)
+
+
+# --- Chaînage parallèle par lots de noms ---
+
+def lot_par_nom(noms: pd.Series, nb_lots: int) -> np.ndarray:
+    """
+    Numéro de lot de chaque ligne, dérivé de nom_prenoms_standard : toutes les lignes d'un même nom
+    tombent dans le même lot. Les lignes sans nom (aucune clé) sont réparties par position.
+    """
+    codes, noms_distincts = pd.factorize(noms, use_na_sentinel=True)
+    empreintes = hash_array(np.asarray(noms_distincts, dtype=object), categorize=False)
+    lots = (empreintes % np.uint64(nb_lots)).astype(np.int64)[codes]
+    sans_nom = codes < 0
+    lots[sans_nom] = np.arange(len(noms))[sans_nom] % nb_lots
+    return lots
+
+def _chainer_lot(lot: pd.DataFrame, toutes_controlees: bool, groupe_entier: bool, cles_libres_seulement: bool,
+                 avec_liens: bool = False) -> tuple:
+    """
+    Chaînage d'un lot, exécuté dans un processus de travail (ProcessPoolExecutor) : les options de
+    config sont transmises explicitement. Retourne l'id_groupe de chaque ligne du lot et les liens
+    acceptés (positions dans le lot), ou None si avec_liens est faux.
+    """
+    liens = [] if avec_liens else None
+    if cles_libres_seulement:
+        cles_libres, _ = _repartir_cles(lot, toutes_controlees)
+        racines = chainer_cles_libres(lot, cles_libres, silencieux=True, liens=liens)
+        return _groupes_minimaux(racines, lot['id_temporaire'].to_numpy(dtype=np.int64)), liens
+    return chainer_doublons(lot, toutes_controlees, silencieux=True, liens=liens, groupe_entier=groupe_entier), liens
+
+def chainer_doublons_par_lots(df: pd.DataFrame, nb_processus: int, nb_lots: int = None,
+                              liens: list = None) -> np.ndarray:
+    """
+    Même résultat que chainer_doublons, calculé par lots de noms sur un pool de processus.
+
+    Toutes les clés de KEY_COLUMNS incluent nom_prenoms_standard : deux lignes de noms différents ne
+    sont jamais reliées par une clé exacte, et un lot (ensemble de noms) se chaîne indépendamment
+    des autres, règle d'exclusion comprise. Seule CLE_NOM_APPROCHE relie des noms différents, donc
+    des lots différents : quand elle est présente, les lots ne résolvent que les clés libres et les
+    clés contrôlées sont fusionnées ensuite sur l'ensemble des lignes, à partir des groupes des lots.
+    La règle d'exclusion historique (chainer_par_propagation) entrelace clés libres et contrôlées :
+    avec CLE_NOM_APPROCHE, elle est alors appliquée sur l'ensemble des lignes, sans lots.
+    """
+    nb_lots = nb_lots or nb_processus
+    toutes_controlees = config.CONTRADICTION_TOUTES_CLES
+    groupe_entier = config.CONTRADICTION_GROUPE_ENTIER
+    cles_libres, cles_controlees = _repartir_cles(df, toutes_controlees)
+    reconciliation = CLE_NOM_APPROCHE in cles_controlees
+    if reconciliation and _propagation_historique(df, cles_controlees, groupe_entier):
+        print("--- ⚙️ Chaînage sans lots : la règle d'exclusion historique ne se réconcilie pas entre lots ---")
+        return chainer_doublons(df, toutes_controlees, liens=liens, groupe_entier=groupe_entier)
+    colonnes = ['id_temporaire'] + cles_libres + cles_controlees \
+        + [col for col in COLONNES_FORTES_CHECK if col in df.columns]
+
+    lots = lot_par_nom(df['nom_prenoms_standard'], nb_lots)
+    positions_par_lot = [np.flatnonzero(lots == numero) for numero in range(nb_lots)]
+    positions_par_lot = [positions for positions in positions_par_lot if len(positions)]
+    compter('lots_chainage', len(positions_par_lot))
+
+    donnees = df[colonnes]
+    id_groupe = np.empty(len(df), dtype=np.int64)
+    print(f"--- ⚙️ Chaînage parallèle : {len(positions_par_lot)} lots sur {nb_processus} processus ---")
+    with ProcessPoolExecutor(max_workers=nb_processus) as executor:
+        futures = {
+            executor.submit(_chainer_lot, donnees.iloc[positions].reset_index(drop=True),
+                            toutes_controlees, groupe_entier, reconciliation, liens is not None): positions
+            for positions in positions_par_lot
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Chaînage par lots"):
+            positions = futures[future]
+            id_groupe[positions], liens_du_lot = future.result()
+            if liens is not None:
+                # Positions du lot ramenées aux positions dans df
+                liens.extend((positions[sources], positions[cibles], cle) for sources, cibles, cle in liens_du_lot)
+
+    if not reconciliation:
+        return id_groupe
+
+    # Réconciliation : les liens approchés traversent les lots, les groupes des lots sont fusionnés globalement
+    ids = df['id_temporaire'].to_numpy(dtype=np.int64)
+    racines = pd.Series(np.arange(len(df)), index=ids).loc[id_groupe].to_numpy()
+    racines = fusionner_cles_controlees(df, racines, cles_controlees, liens=liens)
+    return _groupes_minimaux(racines, ids)
+
+# --- Codes du registre ---
+
+def attribuer_codes_registre(df: pd.DataFrame, index_groupes: dict, correspondances: pd.DataFrame,
+                             liens: list = None) -> tuple:
+    """
+    Attribue les codes du registre retrouvés (rechercher_correspondances) et réunit les groupes qui
+    reprennent le même code : deux groupes non reliés pendant cette exécution peuvent retrouver le
+    même étudiant par des clés différentes (l'un par np_cin, l'autre par np_telephone).
+
+    Les couples sont examinés par séquence croissante puis du groupe le plus ancien (année min, puis
+    id_groupe) au plus récent. Un groupe prend le premier code dont le groupe réuni n'entre pas en
+    contradiction forte avec lui (même règle que fusionner_cles_controlees) ; le plus ancien garde
+    donc le code, et un groupe écarté de tous ses codes reçoit une nouvelle séquence.
+
+    Retourne (id_groupe de chaque ligne après réunion, code par id_groupe). Si `liens` est une
+    liste, chaque réunion y est ajoutée entre les premières lignes des deux groupes (clé CLE_REGISTRE).
+    """
+    id_groupe = df['id_groupe'].to_numpy(dtype=np.int64).copy()
+    if correspondances.empty:
+        return id_groupe, pd.Series(dtype=object, name='code_etudiant')
+
+    premieres_lignes = index_groupes['ordre'][index_groupes['debuts']]
+    numeros = pd.Series(np.arange(index_groupes['nb_groupes']), index=id_groupe[premieres_lignes])
+    correspondances = correspondances.assign(
+        numero=numeros.loc[correspondances['groupe']].to_numpy(),
+        annee_min=df['annee_universitaire_min'].to_numpy()[premieres_lignes][numeros.loc[correspondances['groupe']].to_numpy()],
+    ).sort_values(['sequence', 'annee_min', 'groupe'], kind='stable')
+
+    plusieurs = correspondances.groupby('groupe')['code_etudiant'].nunique() > 1
+    if plusieurs.any():
+        compter('groupes_reliant_plusieurs_codes', int(plusieurs.sum()))
+        print(f"⚠️ {int(plusieurs.sum())} groupe(s) relient plusieurs codes du registre : le plus ancien compatible est conservé.")
+
+    # Cas simple, vectorisé : les groupes dont aucun code n'est partagé prennent leur plus ancien code
+    partages = correspondances['code_etudiant'].duplicated(keep=False)
+    en_conflit = correspondances['groupe'].isin(correspondances.loc[partages, 'groupe'])
+    codes = correspondances[~en_conflit].drop_duplicates(subset=['groupe']).set_index('groupe')['code_etudiant']
+    if not en_conflit.any():
+        return id_groupe, codes
+
+    # Codes partagés : réunion de proche en proche sous la règle d'exclusion, sur les résumés des groupes
+    resumes = [
+        resumer_composantes(index_groupes['nb_groupes'], index_groupes['codes'], pd.factorize(df[col], use_na_sentinel=True)[0])
+        for col in COLONNES_FORTES_CHECK if col in df.columns
+    ]
+    proprietaires = {} # code -> numéro du groupe qui le porte (résumé cumulé des groupes réunis)
+    attribues = {}     # numéro de groupe -> code
+    for groupe, code, numero in correspondances.loc[en_conflit, ['groupe', 'code_etudiant', 'numero']].itertuples(index=False):
+        if numero in attribues:
+            continue
+        proprietaire = proprietaires.setdefault(code, numero)
+        if proprietaire != numero:
+            if _contradictions(resumes, np.array([proprietaire]), np.array([numero]))[0]:
+                continue
+            for resume in resumes:
+                resume[proprietaire] = max(resume[proprietaire], resume[numero])
+        attribues[numero] = code
+
+    numeros_par_code = pd.Series(list(attribues.keys()), index=list(attribues.values()), dtype=np.int64)
+    ecartes = correspondances.loc[en_conflit, 'numero'].nunique() - len(attribues)
+    if ecartes:
+        compter('groupes_separes_registre', ecartes)
+        print(f"⚠️ {ecartes} groupe(s) retrouvent un code du registre déjà porté par un étudiant en contradiction "
+              f"(CIN ou date de naissance) : une nouvelle séquence leur est attribuée.")
+
+    # Réunion des groupes d'un même code sous le plus petit id_groupe
+    ids_groupes = id_groupe[premieres_lignes]
+    nouveaux_ids = ids_groupes.copy()
+    for code, numeros_code in numeros_par_code.groupby(level=0):
+        numeros_code = numeros_code.to_numpy()
+        nouveaux_ids[numeros_code] = ids_groupes[numeros_code].min()
+        codes[ids_groupes[numeros_code].min()] = code
+        if liens is not None and len(numeros_code) > 1:
+            proprietaire = proprietaires[code]
+            autres = numeros_code[numeros_code != proprietaire]
+            liens.append((premieres_lignes[autres], np.full(len(autres), premieres_lignes[proprietaire]), CLE_REGISTRE))
+    reunis = int((nouveaux_ids != ids_groupes).sum())
+    compter('groupes_reunis_registre', reunis)
+    if reunis:
+        print(f"🔗 {reunis} groupe(s) réunis à un autre groupe portant le même code du registre.")
+    return nouveaux_ids[index_groupes['codes']], codes
+
+
 # --- Fonction Principale de Dédoublonnage ---
 
-def gerer_code_etudiant_et_consolider(df: pd.DataFrame, hash_algorithm: str = 'SHA256') -> pd.DataFrame:
+def gerer_code_etudiant_et_consolider(df: pd.DataFrame, hash_algorithm: str = 'SHA256',
+                                      doublons: dict = None) -> pd.DataFrame:
     """
     Détecte les doublons par chaînage, assigne le code étudiant ETU<ANNEE_MIN>_<SEQUENCE>
-    et consolide les champs.
+    et consolide les champs. Si `doublons` est un dictionnaire, les liens acceptés et les lignes
+    liées (avant consolidation) y sont conservés sous 'etudiants' pour le rapport des doublons
+    (cf. duplicate_report.ecrire_rapports_doublons).
     """
     if df.empty:
         return df
@@ -113,119 +558,101 @@ def gerer_code_etudiant_et_consolider(df: pd.DataFrame, hash_algorithm: str = 'S
 
     # Étape 1 à 3 : Initialisation et Préparation
     df['id_temporaire'] = df.index + 1
-    df = standardiser_champs_pour_hachage(df)
-    df = creer_cles_de_concatenation(df)
+    df = mesurer(standardiser_champs_pour_hachage, df)
+    df = mesurer(creer_cles_de_concatenation, df, hash_algorithm)
+    if config.APPARIEMENT_APPROCHE_ACTIF:
+        df[CLE_NOM_APPROCHE] = mesurer(cle_nom_approche, df)
 
-    # Étape 4 : Propagation du plus petit ID pour regrouper les doublons (Algorithme de chaînage)
-    df_temp = df[['id_temporaire'] + KEY_COLUMNS].copy()
-    for col in KEY_COLUMNS:
-        df_temp[col] = df_temp[col].astype(pd.StringDtype())
+    # Étape 4 : Regroupement des doublons en composantes connexes (union-find, cf. union_find.py)
+    # Les liens acceptés (paires de lignes et clé) sont conservés pour le rapport des doublons
+    liens = [] if doublons is not None else None
+    with profiler('chainage'):
+        if config.NB_PROCESSUS_CHAINAGE > 1:
+            df['id_groupe'] = chainer_doublons_par_lots(df, config.NB_PROCESSUS_CHAINAGE, liens=liens)
+        else:
+            df['id_groupe'] = chainer_doublons(df, liens=liens)
 
-    iteration = 0
-    while True:
-        iteration += 1
-        nouvelles_fusions = 0
-        tqdm.write(f"--- Itération {iteration} : Détection et Chaînage ---")
-        
-        id_temp_current = df_temp['id_temporaire'].copy()
-        
-        for key_col in tqdm(KEY_COLUMNS, desc=f"Regroupement par clé"):
-            mask_not_na = df_temp[key_col].notna()
-            df_subset = df_temp.loc[mask_not_na].copy()
-            
-            if df_subset.empty:
-                continue
 
-            # 1. Calcul de l'ID Canonique (le plus petit ID du groupe)
-            grouped = df_subset.groupby(key_col)
-            canonical_ids = grouped['id_temporaire'].transform('min')
-            
-            # 2. Condition de fusion: L'ID actuel doit être plus grand que l'ID canonique
-            condition_fusion_simple = (df_subset['id_temporaire'] > canonical_ids)
-            indices_a_maj = condition_fusion_simple[condition_fusion_simple].index
-            
-            if len(indices_a_maj) > 0:
-                indices_valides = indices_a_maj 
-                
-                # --- RÈGLE CONDITIONNELLE D'EXCLUSION pour la clé faible ---
-                if key_col == 'np_composante_mention':
-                    propositions = pd.DataFrame({
-                        'id_courant': df_temp.loc[indices_a_maj, 'id_temporaire'],
-                        'id_cible': canonical_ids.loc[indices_a_maj]
-                    }).reset_index()
-
-                    fusions_inter_groupes = propositions[propositions['id_courant'] != propositions['id_cible']].copy()
-                    groupes_a_tester = fusions_inter_groupes.drop_duplicates(subset=['id_courant', 'id_cible'])
-                    groupes_valides_cible_id = set()
-                    
-                    for _, row in groupes_a_tester.iterrows():
-                        id_courant = row['id_courant']
-                        id_cible = row['id_cible']
-                        
-                        indices_courant = df_temp[df_temp['id_temporaire'] == id_courant].index
-                        indices_cible = df_temp[df_temp['id_temporaire'] == id_cible].index
-                        indices_combines = indices_courant.union(indices_cible)
-
-                        if not verifier_contradiction_forte(df, indices_combines, COLONNES_FORTES_CHECK):
-                            groupes_valides_cible_id.add(id_cible)
-                            
-                    indices_valides = propositions[
-                        (propositions['id_cible'].isin(groupes_valides_cible_id)) | 
-                        (propositions['id_courant'] == propositions['id_cible']) 
-                    ]['index']
-                # --- Fin de la Règle Conditionnelle ---
-                
-                canonical_values_validated = canonical_ids.loc[indices_valides]
-                df_temp.loc[indices_valides, 'id_temporaire'] = canonical_values_validated
-                nouvelles_fusions += len(indices_valides)
-                
-        if nouvelles_fusions == 0:
-            tqdm.write("Pas de nouvelles fusions détectées. Le processus a convergé.")
-            break
-        elif iteration == 1:
-            tqdm.write(f"Fusion de {nouvelles_fusions} liens détectée. Continuer l'itération pour chaînage.")
-            
-    # Étape 5 : Mise à jour du DataFrame original après chaînage
-    df['id_groupe'] = df_temp['id_temporaire']
-    
-    
     # --- ÉTAPE 6 : NOMENCLATURE DU CODE ÉTUDIANT (ETU<ANNEE_MIN>_<SEQUENCE>) ---
     
-    # 6.1 : Déterminer l'année universitaire la plus ancienne pour chaque groupe
-    if 'annee_universitaire' not in df.columns:
-         df['annee_universitaire'] = 'NON_SPECIFIEE'
+    with profiler('nomenclature_code_etudiant'):
+        # 6.1 : Déterminer l'année universitaire la plus ancienne pour chaque groupe
+        if 'annee_universitaire' not in df.columns:
+             df['annee_universitaire'] = 'NON_SPECIFIEE'
+
+        # Extraire l'année de début (ex: 2023 de 2023-2024)
+        df['annee_debut'] = en_texte(df['annee_universitaire']).str.split('-').str[0].astype(int, errors='ignore').fillna(9999)
 
-    # Extraire l'année de début (ex: 2023 de 2023-2024)
-    df['annee_debut'] = df['annee_universitaire'].astype(str).str.split('-').str[0].astype(int, errors='ignore').fillna(9999)
+        # Index des groupes pour les étapes 6 et 7 (consolidation_engine), recalculé seulement si le
+        # registre réunit des groupes
+        index_groupes = indexer_groupes(df['id_groupe'])
+        premieres_lignes = index_groupes['ordre'][index_groupes['debuts']]
 
-    # Propagation de l'année la plus petite au sein de chaque groupe
-    annee_min_par_groupe = df.groupby('id_groupe', dropna=False)['annee_debut'].transform('min')
-    df['annee_universitaire_min'] = annee_min_par_groupe
+        # Propagation de l'année la plus petite au sein de chaque groupe
+        df['annee_universitaire_min'] = minimum_par_groupe(index_groupes, df['annee_debut'])
     
-    # 6.2 : Génération du Numéro Séquentiel (xxxxxx)
+        # 6.2 : Génération du Numéro Séquentiel (xxxxxx)
+
+        # Registre persistant : les groupes déjà connus reprennent leur code, les nouveaux numéros
+        # commencent après la plus grande séquence attribuée (jamais de renumérotation)
+        codes_connus = pd.Series(dtype=object)
+        premiere_sequence = 1
+        if config.REGISTRE_ETUDIANTS_ACTIF:
+            registre = ouvrir_registre(config.FICHIER_REGISTRE_ETUDIANTS)
+            correspondances = mesurer(rechercher_correspondances, registre, df, CLES_REGISTRE)
+            id_groupe, codes_connus = attribuer_codes_registre(df, index_groupes, correspondances, liens)
+            premiere_sequence = prochaine_sequence(registre)
+            if not np.array_equal(id_groupe, df['id_groupe'].to_numpy()):
+                # Groupes réunis par un code du registre : l'index des groupes et l'année min sont recalculés
+                df['id_groupe'] = id_groupe
+                index_groupes = indexer_groupes(df['id_groupe'])
+                premieres_lignes = index_groupes['ordre'][index_groupes['debuts']]
+                df['annee_universitaire_min'] = minimum_par_groupe(index_groupes, df['annee_debut'])
     
-    # Tri par année min pour attribuer les codes séquentiels dans l'ordre chronologique d'ancienneté.
-    codes_uniques = df.drop_duplicates(subset=['id_groupe']).sort_values(by='annee_universitaire_min').index
+        # Tri par année min pour attribuer les codes séquentiels dans l'ordre chronologique d'ancienneté.
+        codes_uniques = df.iloc[premieres_lignes].sort_values(by='annee_universitaire_min').index
+        groupes_nouveaux = df.loc[codes_uniques, 'id_groupe']
+        groupes_nouveaux = groupes_nouveaux[~groupes_nouveaux.isin(codes_connus.index)]
     
-    # Créer un mapping de l'id_groupe vers un nouveau numéro séquentiel (1, 2, 3...)
-    group_to_sequence = {
-        group_id: seq + 1 
-        for seq, group_id in enumerate(df.loc[codes_uniques, 'id_groupe'].unique())
-    }
+        # Créer un mapping de l'id_groupe vers un nouveau numéro séquentiel (1, 2, 3...)
+        group_to_sequence = {
+            group_id: seq + premiere_sequence 
+            for seq, group_id in enumerate(groupes_nouveaux.unique())
+        }
     
-    df['code_final_sequence'] = df['id_groupe'].map(group_to_sequence)
-
-    # 6.3 : Concaténation finale
-    sequence_formattee = df['code_final_sequence'].astype(str).str.zfill(6)
-    df['code_etudiant'] = (
-        'ETU' 
-        + df['annee_universitaire_min'].astype(str) 
-        + '_' 
-        + sequence_formattee
-    )
+        df['code_final_sequence'] = df['id_groupe'].map(group_to_sequence)
+
+        # 6.3 : Concaténation finale
+        # Entier nullable : les groupes qui reprennent un code du registre n'ont pas de séquence
+        sequence_formattee = df['code_final_sequence'].astype('Int64').astype(str).str.zfill(6)
+        df['code_etudiant'] = (
+            'ETU' 
+            + df['annee_universitaire_min'].astype(str) 
+            + '_' 
+            + sequence_formattee
+        )
+        if len(codes_connus):
+            df['code_etudiant'] = df['id_groupe'].map(codes_connus).fillna(df['code_etudiant'])
     
-    # Propagation formelle du code généré à toutes les lignes du groupe (même s'il l'est déjà)
-    df['code_etudiant'] = df.groupby('id_groupe', dropna=False)['code_etudiant'].transform('first')
+        # Propagation formelle du code généré à toutes les lignes du groupe (même s'il l'est déjà)
+        df['code_etudiant'] = diffuser(index_groupes, df['code_etudiant'].to_numpy()[premieres_lignes])
+
+        if config.REGISTRE_ETUDIANTS_ACTIF:
+            nouveaux = df.iloc[premieres_lignes]
+            nouveaux = nouveaux[nouveaux['id_groupe'].isin(group_to_sequence.keys())]
+            mesurer(enregistrer, registre, df, pd.DataFrame({
+                'code_etudiant': nouveaux['code_etudiant'],
+                'sequence': nouveaux['id_groupe'].map(group_to_sequence),
+                'annee_min': nouveaux['annee_universitaire_min'],
+            }), CLES_REGISTRE)
+            registre.close()
+
+
+    # Liens du rapport des doublons et lignes liées, lues avant que la consolidation n'uniformise les valeurs
+    if liens is not None:
+        with profiler('liens_doublons_etudiants'):
+            doublons['etudiants'] = extraire_lignes_liees(df, liste_aretes(liens, KEY_COLUMNS + [CLE_NOM_APPROCHE, CLE_REGISTRE]))
+            del liens
 
 
     # --- ÉTAPE 7 : CONSOLIDATION DES CHAMPS (IMPUTATION) ---
@@ -238,22 +665,15 @@ def gerer_code_etudiant_et_consolider(df: pd.DataFrame, hash_algorithm: str = 'S
 
     print("\n--- ÉTAPE 7 : CONSOLIDATION DES CHAMPS (IMPUTATION) ---")
     
-    for col in tqdm(colonnes_consolidation, desc="Consolidation des valeurs non-NA"):
-        if col in df.columns:
-            is_object = df[col].dtype == 'object' or df[col].dtype.name == 'string'
-            if is_object:
-                df[col] = df[col].replace('', np.nan) 
-            
-            df[col] = df.groupby('id_groupe', dropna=False)[col].transform('first')
-            
-            if is_object:
-                df[col] = df[col].convert_dtypes()
+    with profiler('consolidation_champs'):
+        # Une seule passe par colonne sur l'index des groupes, valeur survivante selon config.REGLES_CONSOLIDATION
+        df = consolider_colonnes(df, colonnes_consolidation, index_groupes, config.REGLES_CONSOLIDATION)
 
     print("✅ Consolidation des champs effectuée.")
 
 
     # --- Étape 8 : Nettoyage final ---
-    cols_a_dropper = [col for col in df.columns if col.endswith('_standard') or col in KEY_COLUMNS or col.startswith('id_groupe') or col.startswith('code_final_sequence') or col.startswith('id_temporaire') or col in ['annee_debut', 'annee_universitaire_min']]
+    cols_a_dropper = [col for col in df.columns if col.endswith('_standard') or col in KEY_COLUMNS + [CLE_NOM_APPROCHE] or col.startswith('id_groupe') or col.startswith('code_final_sequence') or col.startswith('id_temporaire') or col in ['annee_debut', 'annee_universitaire_min']]
     df = df.drop(columns=cols_a_dropper, errors='ignore')
 
     nombre_codes_uniques = df['code_etudiant'].nunique()
@@ -0,0 +1,97 @@
+# student_registry.py
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from run_profiler import compter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS etudiants (
+    code_etudiant TEXT PRIMARY KEY,
+    sequence      INTEGER NOT NULL UNIQUE,
+    annee_min     INTEGER
+);
+CREATE TABLE IF NOT EXISTS cles (
+    cle           TEXT NOT NULL,
+    valeur        TEXT NOT NULL,
+    code_etudiant TEXT NOT NULL REFERENCES etudiants (code_etudiant),
+    PRIMARY KEY (cle, valeur, code_etudiant)
+) WITHOUT ROWID;
+"""
+
+
+# --- Connexion ---
+
+def ouvrir_registre(chemin: str) -> sqlite3.Connection:
+    """Ouvre (et crée si besoin) le registre des codes étudiants."""
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    connexion = sqlite3.connect(chemin)
+    connexion.executescript(SCHEMA)
+    return connexion
+
+def prochaine_sequence(connexion: sqlite3.Connection) -> int:
+    """Premier numéro de séquence libre : les numéros attribués ne sont jamais réutilisés."""
+    (maximum,) = connexion.execute("SELECT COALESCE(MAX(sequence), 0) FROM etudiants").fetchone()
+    return maximum + 1
+
+
+# --- Recherche et enregistrement ---
+
+def _valeurs_cles(df: pd.DataFrame, cles: list, colonne_groupe: str) -> pd.DataFrame:
+    """Couples distincts (cle, valeur, groupe) des clés de chaînage renseignées."""
+    morceaux = []
+    for cle in cles:
+        if cle not in df.columns:
+            continue
+        renseignees = df[cle].notna()
+        morceaux.append(pd.DataFrame({
+            'cle': cle,
+            'valeur': df.loc[renseignees, cle].astype(str).to_numpy(dtype=object),
+            'groupe': df.loc[renseignees, colonne_groupe].to_numpy(),
+        }))
+    if not morceaux:
+        return pd.DataFrame(columns=['cle', 'valeur', 'groupe'])
+    return pd.concat(morceaux, ignore_index=True).drop_duplicates()
+
+def rechercher_correspondances(connexion: sqlite3.Connection, df: pd.DataFrame, cles: list,
+                               colonne_groupe: str = 'id_groupe') -> pd.DataFrame:
+    """
+    Codes déjà attribués retrouvés par une valeur de clé au registre : un couple distinct
+    (groupe, code_etudiant, sequence) par code retrouvé pour un groupe. Un groupe peut retrouver
+    plusieurs codes, et un code plusieurs groupes : le choix est laissé à l'appelant
+    (student_code_manager.attribuer_codes_registre).
+    """
+    valeurs = _valeurs_cles(df, cles, colonne_groupe)
+    connexion.execute("CREATE TEMP TABLE IF NOT EXISTS recherche (cle TEXT, valeur TEXT, groupe INTEGER)")
+    connexion.execute("DELETE FROM recherche")
+    connexion.executemany("INSERT INTO recherche VALUES (?, ?, ?)",
+                          zip(valeurs['cle'], valeurs['valeur'], valeurs['groupe'].tolist()))
+    trouves = pd.read_sql_query(
+        "SELECT DISTINCT r.groupe, e.code_etudiant, e.sequence FROM recherche r "
+        "JOIN cles c ON c.cle = r.cle AND c.valeur = r.valeur "
+        "JOIN etudiants e ON e.code_etudiant = c.code_etudiant",
+        connexion,
+    )
+    connexion.execute("DELETE FROM recherche")
+    compter('groupes_retrouves_registre', trouves['groupe'].nunique())
+    return trouves
+
+def enregistrer(connexion: sqlite3.Connection, df: pd.DataFrame, nouveaux: pd.DataFrame, cles: list) -> None:
+    """
+    Ajoute au registre les nouveaux étudiants (colonnes code_etudiant, sequence, annee_min) et toutes
+    les valeurs de clés des lignes traitées, rattachées à leur code : les exécutions suivantes
+    retrouvent un étudiant par n'importe laquelle de ses clés connues.
+    """
+    valeurs = _valeurs_cles(df, cles, 'code_etudiant')
+    with connexion:
+        connexion.executemany(
+            "INSERT OR IGNORE INTO etudiants (code_etudiant, sequence, annee_min) VALUES (?, ?, ?)",
+            zip(nouveaux['code_etudiant'], nouveaux['sequence'].tolist(), nouveaux['annee_min'].tolist()),
+        )
+        connexion.executemany("INSERT OR IGNORE INTO cles (cle, valeur, code_etudiant) VALUES (?, ?, ?)",
+                              zip(valeurs['cle'], valeurs['valeur'], valeurs['groupe']))
+    compter('etudiants_enregistres', len(nouveaux))
@@ -0,0 +1,9 @@
+# conftest.py
+#
+# Les modules du pipeline sont à la racine du dépôt (sans paquet) : la racine est ajoutée au chemin
+# d'importation pour lancer les tests avec `pytest` comme avec `python -m pytest`.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,189 @@
+# test_chainage.py
+
+import io
+from contextlib import redirect_stdout, redirect_stderr
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+from normalized_columns import vider_cache_formes
+from union_find import aretes_par_cle, composantes_connexes, resumer_composantes
+from student_code_manager import (
+    CLE_FAIBLE, chainer_cles_libres, chainer_doublons, chainer_par_propagation, fusionner_cles_controlees,
+    gerer_code_etudiant_et_consolider
+)
+
+
+def _lignes(**colonnes) -> pd.DataFrame:
+    """Lignes de chaînage : clés (Int64, comme les clés hachées), colonnes fortes et id_temporaire 1..n."""
+    nb_lignes = len(next(iter(colonnes.values())))
+    df = pd.DataFrame({
+        nom: pd.array(valeurs, dtype='Int64') if nom.startswith('np_') else pd.Series(valeurs, dtype=object)
+        for nom, valeurs in colonnes.items()
+    })
+    for col in ['cin', 'naissance_date']:
+        if col not in df.columns:
+            df[col] = pd.Series([None] * nb_lignes, dtype=object)
+    df['id_temporaire'] = np.arange(1, nb_lignes + 1)
+    return df
+
+def _partition(id_groupe) -> list:
+    """Groupes d'id_temporaire (1..n), triés."""
+    groupes = {}
+    for id_temporaire, groupe in enumerate(id_groupe, start=1):
+        groupes.setdefault(groupe, []).append(id_temporaire)
+    return sorted(groupes.values())
+
+
+# --- union_find ---
+
+def test_aretes_vers_la_premiere_ligne_de_meme_valeur():
+    sources, cibles = aretes_par_cle(pd.Series(pd.array([7, None, 7, 3, 7, 3], dtype='Int64')))
+    assert sources.tolist() == [2, 4, 5]
+    assert cibles.tolist() == [0, 0, 3]
+
+def test_composantes_chaine_longue_melangee():
+    rng = np.random.default_rng(0)
+    sources = np.arange(1, 200)
+    cibles = sources - 1
+    ordre = rng.permutation(len(sources))
+    racines = composantes_connexes(201, sources[ordre], cibles[ordre])
+    assert (racines[:200] == 0).all()
+    assert racines[200] == 200
+
+def test_resume_une_valeur_aucune_ou_plusieurs():
+    racines = np.array([0, 0, 2, 2, 4])
+    codes = np.array([5, -1, 1, 2, -1])
+    resumes = resumer_composantes(5, racines, codes)
+    assert resumes[[0, 2, 4]].tolist() == [5, -2, -1]
+
+
+# --- Clés libres ---
+
+def test_cles_libres_chainage_transitif():
+    df = _lignes(np_cin=[1, 1, None, None], np_telephone=[None, 2, 2, None])
+    assert _partition(chainer_doublons(df, silencieux=True)) == [[1, 2, 3], [4]]
+
+def test_cles_libres_ignorent_les_contradictions():
+    df = _lignes(np_telephone=[1, 1], cin=['A', 'B'])
+    assert _partition(chainer_doublons(df, toutes_controlees=False, silencieux=True)) == [[1, 2]]
+
+def test_id_groupe_plus_petit_id_temporaire():
+    df = _lignes(np_cin=[None, 1, 1])
+    assert chainer_doublons(df, silencieux=True).tolist() == [1, 2, 2]
+
+
+# --- Clés contrôlées (règle d'exclusion) ---
+
+@pytest.mark.parametrize('groupe_entier', [False, True])
+def test_cle_faible_sans_contradiction_fusionne(groupe_entier):
+    df = _lignes(np_composante_mention=[1, 1], cin=['A', None])
+    assert _partition(chainer_doublons(df, silencieux=True, groupe_entier=groupe_entier)) == [[1, 2]]
+
+@pytest.mark.parametrize('groupe_entier', [False, True])
+def test_cle_faible_contradiction_cin_ou_naissance_refusee(groupe_entier):
+    df = _lignes(np_composante_mention=[1, 1], cin=['A', 'B'])
+    assert _partition(chainer_doublons(df, silencieux=True, groupe_entier=groupe_entier)) == [[1], [2]]
+    df = _lignes(np_composante_mention=[1, 1], naissance_date=['2000-01-01', '2001-01-01'])
+    assert _partition(chainer_doublons(df, silencieux=True, groupe_entier=groupe_entier)) == [[1], [2]]
+
+def test_contradiction_sur_un_groupe_en_cours_de_propagation():
+    # La ligne 2 (CIN A) ne rejoint le groupe 1 que par téléphone au second tour ; au premier tour,
+    # la clé faible teste la ligne 4 (CIN B) contre les lignes {1, 3} seulement
+    df = _lignes(np_mail=[5, None, 5, None], np_telephone=[None, 6, 6, None],
+                 np_composante_mention=[9, None, None, 9], cin=[None, 'A', None, 'B'])
+    # Règle historique : la fusion est acceptée, puis la ligne 2 rejoint le groupe (deux CIN réunis)
+    assert _partition(chainer_doublons(df, silencieux=True, groupe_entier=False)) == [[1, 2, 3, 4]]
+    # Groupes complets : le groupe {1, 2, 3} porte le CIN A, la fusion avec la ligne 4 est refusée
+    assert _partition(chainer_doublons(df, silencieux=True, groupe_entier=True)) == [[1, 2, 3], [4]]
+
+@pytest.mark.parametrize('groupe_entier', [False, True])
+def test_contradiction_sur_un_groupe_deja_propage(groupe_entier):
+    # Le téléphone relie 1 et 2 avant la clé faible : les deux règles refusent la ligne 3 (CIN B)
+    df = _lignes(np_telephone=[1, 1, None], np_composante_mention=[None, 2, 2], cin=['A', None, 'B'])
+    assert _partition(chainer_doublons(df, silencieux=True, groupe_entier=groupe_entier)) == [[1, 2], [3]]
+
+@pytest.mark.parametrize('groupe_entier', [False, True])
+def test_cible_validee_accepte_toutes_ses_propositions(groupe_entier):
+    # Une cible est validée si au moins une proposition est compatible, et toutes les propositions
+    # vers elle sont alors fusionnées (y compris la ligne 3, CIN différent)
+    df = _lignes(np_composante_mention=[1, 1, 1], cin=['A', None, 'B'])
+    assert _partition(chainer_doublons(df, silencieux=True, groupe_entier=groupe_entier)) == [[1, 2, 3]]
+
+@pytest.mark.parametrize('groupe_entier', [False, True])
+def test_toutes_cles_controlees(groupe_entier):
+    df = _lignes(np_telephone=[1, 1], cin=['A', 'B'])
+    assert _partition(chainer_doublons(df, toutes_controlees=True, silencieux=True,
+                                       groupe_entier=groupe_entier)) == [[1], [2]]
+
+def test_fusion_des_groupes_issus_des_cles_libres():
+    # Les clés libres relient 2 et 3 ; la clé faible rattache ensuite 1 (valeur 1) et 4 (valeur 2)
+    # au groupe {2, 3}, dont les résumés sont combinés au fil des fusions
+    df = _lignes(np_composante_mention=[1, 1, 2, 2], np_mail=[None, 3, 3, None])
+    racines = chainer_cles_libres(df, ['np_mail'], silencieux=True)
+    racines = fusionner_cles_controlees(df, racines, [CLE_FAIBLE], silencieux=True)
+    assert len(set(racines.tolist())) == 1
+
+@pytest.mark.parametrize('avec_liens', [False, True])
+def test_fusionner_cles_controlees_liens_et_partition(avec_liens):
+    df = _lignes(np_composante_mention=[1, 1, 1, 2, 2], cin=['A', None, None, 'B', 'C'])
+    liens = [] if avec_liens else None
+    racines = fusionner_cles_controlees(df, np.arange(len(df)), [CLE_FAIBLE], silencieux=True, liens=liens)
+    assert _partition(racines) == [[1, 2, 3], [4], [5]]
+    if avec_liens:
+        sources = np.concatenate([morceau[0] for morceau in liens])
+        cibles = np.concatenate([morceau[1] for morceau in liens])
+        # Chaque lien enregistré relie deux lignes du même groupe final, par la valeur de clé partagée
+        assert (racines[sources] == racines[cibles]).all()
+        assert (df[CLE_FAIBLE].to_numpy()[sources] == df[CLE_FAIBLE].to_numpy()[cibles]).all()
+
+def test_propagation_historique_liens():
+    df = _lignes(np_mail=[5, None, 5, None], np_telephone=[None, 6, 6, None],
+                 np_composante_mention=[9, None, None, 9], cin=[None, 'A', None, 'B'])
+    liens = []
+    id_groupe = chainer_par_propagation(df, ['np_telephone', 'np_mail', CLE_FAIBLE], [CLE_FAIBLE], True, liens)
+    sources = np.concatenate([morceau[0] for morceau in liens])
+    cibles = np.concatenate([morceau[1] for morceau in liens])
+    assert (id_groupe[sources] == id_groupe[cibles]).all()
+    assert {morceau[2] for morceau in liens} == {'np_telephone', 'np_mail', CLE_FAIBLE}
+
+
+# --- Chaînage par lots (NB_PROCESSUS_CHAINAGE) ---
+
+def _inscriptions_aleatoires(nb_lignes: int, graine: int) -> pd.DataFrame:
+    """Inscriptions brutes : peu de noms (avec variantes d'orthographe) et d'attributs, donc beaucoup de doublons."""
+    rng = np.random.default_rng(graine)
+    noms = ['RAKOTONIRINA', 'RAKOTONIRINY', 'RABE', 'ANDRIA', 'RAVELOSON', 'RAVELOSSON', 'RASOA', 'HERY']
+
+    def tirer(valeurs, proportion_manquante):
+        tirees = rng.choice(np.array(valeurs, dtype=object), nb_lignes)
+        return np.where(rng.random(nb_lignes) < proportion_manquante, None, tirees)
+
+    return pd.DataFrame({
+        'nom': tirer(noms, 0), 'prenoms': tirer(['Jean', 'Hery', 'Rabe', 'Mialy'], 0.1),
+        'cin': tirer([f'10120130140{i}' for i in range(4)], 0.5),
+        'telephone': tirer([f'03412345{i:02d}' for i in range(6)], 0.5),
+        'naissance_date': pd.to_datetime(tirer(['2000-01-01', '2001-05-12', '1999-09-30'], 0.4)),
+        'cin_lieu': tirer(['ANTANANARIVO', 'FIANARANTSOA'], 0.3), 'mail': tirer(['a@x.mg', 'b@x.mg', 'c@x.mg'], 0.6),
+        'composante': tirer(['FAC', 'ENS'], 0), 'mention': tirer(['M0', 'M1', 'M2'], 0),
+        'annee_universitaire': tirer(['2020-2021', '2021-2022', '2022-2023'], 0),
+    })
+
+@pytest.mark.parametrize('approche', [False, True])
+@pytest.mark.parametrize('groupe_entier', [False, True])
+def test_chainage_par_lots_memes_codes(approche, groupe_entier, monkeypatch):
+    monkeypatch.setattr(config, 'REGISTRE_ETUDIANTS_ACTIF', False)
+    monkeypatch.setattr(config, 'APPARIEMENT_APPROCHE_ACTIF', approche)
+    monkeypatch.setattr(config, 'CONTRADICTION_GROUPE_ENTIER', groupe_entier)
+    inscriptions = _inscriptions_aleatoires(300, graine=7)
+
+    codes = {}
+    for nb_processus in [1, 4]:
+        monkeypatch.setattr(config, 'NB_PROCESSUS_CHAINAGE', nb_processus)
+        vider_cache_formes()
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            codes[nb_processus] = gerer_code_etudiant_et_consolider(inscriptions.copy())['code_etudiant'].tolist()
+    assert codes[4] == codes[1]
+    assert len(set(codes[1])) < len(codes[1]) # des doublons ont bien été chaînés
@@ -0,0 +1,68 @@
+# test_chargement.py
+
+import io
+from contextlib import redirect_stdout, redirect_stderr
+
+import pandas as pd
+import pytest
+
+import config
+from data_cleaner import charger_et_combiner_fichiers, determiner_projection, lire_fichier_excel
+
+pytest.importorskip('openpyxl')
+
+
+def _ecrire_classeur(chemin, numero: int) -> None:
+    """Petit classeur d'inscriptions : textes, CIN numériques et une colonne inconnue du pipeline."""
+    pd.DataFrame({
+        'nom': [f'RAKOTO{numero}', f'RABE{numero}', None],
+        'prenoms': ['Jean', 'Hery', 'Solo'],
+        'cin': [101201301400 + numero, '102 202', None],
+        'mention': ['Économie', 'Maths', 'Maths'],
+        'colonne_inutile': [1, 2, 3],
+    }).to_excel(chemin, index=False)
+
+@pytest.fixture
+def dossier_sources(tmp_path):
+    """Classeurs des trois années, dont un dans un sous-dossier."""
+    (tmp_path / 'ENS').mkdir()
+    _ecrire_classeur(tmp_path / f'DEGS{config.NOM_FILTRE_2023}001.xlsx', 1)
+    _ecrire_classeur(tmp_path / f'DEGS{config.NOM_FILTRE_2024}001.xlsx', 2)
+    _ecrire_classeur(tmp_path / 'ENS' / f'ENS{config.NOM_FILTRE_2025}001.xlsx', 3)
+    return str(tmp_path)
+
+def _charger(dossier: str, nb_processus: int) -> pd.DataFrame:
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        return charger_et_combiner_fichiers(dossier, config.NOM_FILTRE_2023, config.NOM_FILTRE_2024,
+                                            config.NOM_FILTRE_2025, nb_processus=nb_processus)
+
+
+# --- Chargement parallèle ---
+
+def test_meme_resultat_quel_que_soit_le_nombre_de_processus(dossier_sources):
+    sequentiel = _charger(dossier_sources, 1)
+    parallele = _charger(dossier_sources, 3)
+    pd.testing.assert_frame_equal(parallele, sequentiel)
+    # Ordre trié des chemins, sous-dossiers compris
+    assert sequentiel['annee_universitaire'].unique().tolist() == ['2022-2023', '2023-2024', '2024-2025']
+
+
+# --- Projection à la lecture ---
+
+def test_projection_colonnes_utiles_et_types(tmp_path):
+    chemin = tmp_path / f'DEGS{config.NOM_FILTRE_2023}001.xlsx'
+    _ecrire_classeur(chemin, 1)
+    df = lire_fichier_excel(str(chemin), '2022-2023')
+    # La colonne inconnue n'est pas lue, la ligne sans nom est écartée
+    assert df.columns.tolist() == ['nom', 'prenoms', 'cin', 'mention', 'annee_universitaire']
+    assert df['nom'].tolist() == ['RAKOTO1', 'RABE1']
+    # Colonnes textuelles lues en 'str' ; le CIN garde le type de la cellule (nettoyé plus tard)
+    assert df['mention'].tolist() == ['Économie', 'Maths']
+    assert df['cin'].tolist() == [101201301401, '102 202']
+
+def test_projection_memorisee_par_entete():
+    entete = ('nom', 'tel', 'colonne_inutile', 'semestre')
+    colonnes, types = determiner_projection(entete)
+    assert colonnes == ['nom', 'tel', 'semestre']
+    assert types == {'nom': str, 'semestre': str}
+    assert determiner_projection(entete)[0] is colonnes
@@ -0,0 +1,76 @@
+# test_consolidation_engine.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from consolidation_engine import REGLES_SURVIE, indexer_groupes, minimum_par_groupe, consolider_colonnes
+
+
+def _groupes() -> pd.DataFrame:
+    """Trois étudiants (groupes 10, 20, 30) sur six lignes, dans l'ordre de chargement."""
+    return pd.DataFrame({
+        'groupe':         [10, 20, 10, 10, 20, 30],
+        'annee_debut':    [2021, 2024, 2023, 2022, 2020, 2022],
+        'composante':     ['FAC_A', 'FAC_A', 'FAC_B', 'FAC_C', 'FAC_B', 'FAC_C'],
+        'telephone':      ['0340', '', '0341', '0342', '0345', None],
+        'naissance_lieu': ['TANA', 'MAJUNGA', 'TAMATAVE', 'TAMATAVE', 'FIANAR', None],
+        'adresse':        ['LOT 1', 'LOT 22', 'LOT II A 45', 'LOT 3', 'LOT 9', None],
+        'mail':           ['a@x.mg', None, 'b@x.mg', 'c@x.mg', 'e@x.mg', None],
+    })
+
+def _consolider(df: pd.DataFrame, colonne: str, regle=None) -> list:
+    regles = {colonne: regle} if regle is not None else None
+    resultat = consolider_colonnes(df, [colonne], indexer_groupes(df['groupe']), regles)
+    return resultat[colonne].astype(object).where(resultat[colonne].notna(), None).tolist()
+
+
+# Valeur attendue par groupe (10, 20, 30), diffusée aux lignes dans l'ordre de 'groupe'
+CAS_REGLES = {
+    # Première valeur renseignée ; la chaîne vide compte comme manquante
+    'premier': ('telephone', 'premier', {10: '0340', 20: '0345', 30: None}),
+    # Valeur de l'année la plus récente (2023 pour le groupe 10, 2024 vide puis 2020 pour le groupe 20)
+    'plus_recent': ('telephone', 'plus_recent', {10: '0341', 20: '0345', 30: None}),
+    # Valeur la plus fréquente ; à égalité, la première ligne du groupe
+    'plus_frequent': ('naissance_lieu', 'plus_frequent', {10: 'TAMATAVE', 20: 'MAJUNGA', 30: None}),
+    # Valeur la plus longue ; à égalité, la première ligne du groupe
+    'plus_long': ('adresse', 'plus_long', {10: 'LOT II A 45', 20: 'LOT 22', 30: None}),
+    # Ligne de la source la mieux classée ; une source absente du classement passe en dernier, et une
+    # ligne sans valeur laisse la place à la suivante (groupe 20 : FAC_A sans mail, puis FAC_B)
+    'priorite_source': ('mail', ('priorite_source', 'composante', ['FAC_C', 'FAC_A']),
+                        {10: 'c@x.mg', 20: 'e@x.mg', 30: None}),
+}
+
+def test_toutes_les_regles_sont_couvertes():
+    assert set(CAS_REGLES) == set(REGLES_SURVIE)
+
+@pytest.mark.parametrize('nom', list(CAS_REGLES))
+def test_regle_de_survie(nom):
+    colonne, regle, attendu = CAS_REGLES[nom]
+    df = _groupes()
+    assert _consolider(df, colonne, regle) == [attendu[groupe] for groupe in df['groupe']]
+
+def test_regle_par_defaut_premier():
+    df = _groupes()
+    assert _consolider(df, 'telephone') == _consolider(_groupes(), 'telephone', 'premier')
+
+def test_plus_recent_sans_colonne_annee_revient_au_premier():
+    df = _groupes().drop(columns='annee_debut')
+    assert _consolider(df, 'telephone', 'plus_recent') == _consolider(_groupes(), 'telephone', 'premier')
+
+def test_regle_inconnue():
+    with pytest.raises(ValueError, match='Règle de survie inconnue'):
+        _consolider(_groupes(), 'telephone', 'plus_ancien')
+
+def test_colonne_categorielle_sans_modalite_vide():
+    df = _groupes()
+    df['telephone'] = df['telephone'].astype('category')
+    resultat = consolider_colonnes(df, ['telephone'], indexer_groupes(df['groupe']))
+    assert '' not in resultat['telephone'].cat.categories
+    assert resultat['telephone'].tolist()[:2] == ['0340', '0345']
+
+def test_minimum_par_groupe():
+    df = _groupes()
+    minimums = minimum_par_groupe(indexer_groupes(df['groupe']), df['annee_debut'])
+    assert minimums.tolist() == [2021, 2020, 2021, 2021, 2020, 2022]
+    assert minimums.index.equals(df.index)
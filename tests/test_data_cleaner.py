@@ -0,0 +1,188 @@
+# test_data_cleaner.py
+
+import io
+import re
+import warnings
+from contextlib import redirect_stdout, redirect_stderr
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+import data_cleaner
+from data_cleaner import (
+    nettoyer_donnees, nettoyer_donnees_par_lots, vider_cache_valeurs_uniques, formater_cin, formater_telephone,
+    appliquer_par_valeurs_uniques, appliquer_par_combinaisons_uniques, declarer_colonnes, construire_graphe_etapes,
+    etapes_en_aval, ETAPES_NETTOYAGE, GRAPHE_NETTOYAGE, trouver_etape
+)
+
+
+def _lot(nb_lignes: int = 2, **colonnes) -> pd.DataFrame:
+    lignes = {'nom': ['Rakoto'] * nb_lignes, 'sexe': ['F'] * nb_lignes, 'annee_universitaire': ['2023-2024'] * nb_lignes}
+    lignes.update(colonnes)
+    return pd.DataFrame(lignes)
+
+
+# --- Mode flux ---
+
+def test_lots_suivants_gardent_les_avertissements(capsys):
+    vider_cache_valeurs_uniques()
+    # Le second lot n'a pas de colonne 'sexe' : l'avertissement doit rester visible
+    nettoyer_donnees_par_lots([_lot(), _lot().drop(columns='sexe')])
+    sortie = capsys.readouterr().out
+    assert "⏭️ Étape 'standardiser_sexe' ignorée" in sortie
+    # Les messages de progression ne sont affichés que pour le premier lot
+    assert sortie.count("✅ Colonne 'sexe' standardisée.") == 1
+    assert sortie.count("✅ Espaces en début/fin") == 1
+
+def test_silencieux_ne_touche_pas_la_sortie_d_erreur(monkeypatch):
+    def etape_qui_avertit(df):
+        print("✅ Progression")
+        warnings.warn("avertissement de l'étape")
+        return df
+    etape_qui_avertit.colonnes_lues = etape_qui_avertit.colonnes_lues_optionnelles = ()
+    etape_qui_avertit.colonnes_ecrites = ()
+    monkeypatch.setattr(data_cleaner, 'ETAPES_NETTOYAGE', [etape_qui_avertit])
+
+    sortie, erreurs = io.StringIO(), io.StringIO()
+    with redirect_stdout(sortie), redirect_stderr(erreurs), warnings.catch_warnings(record=True) as avertis:
+        warnings.simplefilter('always')
+        nettoyer_donnees(_lot(), nb_fils=1, silencieux=True)
+    assert 'Progression' not in sortie.getvalue()
+    assert [str(a.message) for a in avertis] == ["avertissement de l'étape"]
+    assert not data_cleaner._AFFICHAGE['silencieux']
+
+
+# --- Graphe des étapes de nettoyage ---
+
+BRUT = pd.DataFrame({
+    'nom': [' Rakoto ', 'rabe'], 'prenoms': ['Jean', None], 'cin': ['101 201 301 401', '102-202'],
+    'telephone': ['034 12 345 67', None], 'naissance_date': ['12/03/1990', 1995], 'sexe': ['f', 'M'],
+    'composante': ['Fac', 'ENS'], 'mention': ['Eco', 'Maths'], 'parcours': [None, 'P1'], 'id_Parcours': [None, 'X'],
+    'annee_universitaire': ['2023-2024', '2023-2024'], 'institution_id': ['U1', 'U1'],
+})
+
+def _nettoyer(df: pd.DataFrame, **options) -> pd.DataFrame:
+    vider_cache_valeurs_uniques()
+    with redirect_stdout(io.StringIO()):
+        return nettoyer_donnees(df.copy(), **options)
+
+def _valeurs_par_colonne(df: pd.DataFrame) -> dict:
+    return {col: df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns}
+
+def test_graphe_des_colonnes_declarees():
+    @declarer_colonnes(ecrit=['x'])
+    def ecrit_x(df): return df
+    @declarer_colonnes(lit=['x'], ecrit=['y'])
+    def lit_x(df): return df
+    @declarer_colonnes(lit=[('z', 'z_bis')], ecrit=['w'])
+    def independante(df): return df
+    @declarer_colonnes(lit_optionnel=['y'])
+    def lit_y(df): return df
+
+    etapes = [ecrit_x, lit_x, independante, lit_y]
+    graphe = construire_graphe_etapes(etapes)
+    assert graphe == {ecrit_x: set(), lit_x: {ecrit_x}, independante: set(), lit_y: {lit_x}}
+    assert etapes_en_aval(etapes, graphe, ecrit_x) == [ecrit_x, lit_x, lit_y]
+    assert etapes_en_aval(etapes, graphe, independante) == [independante]
+
+def test_graphe_de_reference():
+    # Le nettoyage général des textes (toutes les colonnes) précède toutes les étapes suivantes
+    texte = trouver_etape('nettoyer_colonnes_texte')
+    assert all(texte in GRAPHE_NETTOYAGE[etape] for etape in ETAPES_NETTOYAGE[ETAPES_NETTOYAGE.index(texte) + 1:])
+    # L'imputation de id_Parcours utilise la composante préfixée
+    en_aval = etapes_en_aval(ETAPES_NETTOYAGE, GRAPHE_NETTOYAGE, trouver_etape('prefixer_composante'))
+    assert trouver_etape('imputer_id_parcours') in en_aval
+    assert trouver_etape('traiter_naissance_date') not in en_aval
+
+def test_etapes_en_parallele_identiques_au_sequentiel():
+    sequentiel = _nettoyer(BRUT, nb_fils=1)
+    parallele = _nettoyer(BRUT, nb_fils=4)
+    assert list(parallele.columns) == list(sequentiel.columns)
+    assert parallele.equals(sequentiel)
+
+def test_reprise_a_partir_d_une_etape():
+    nettoye = _nettoyer(BRUT, nb_fils=1)
+    # Seule la colonne cin est à refaire (ex : correction de l'étape) : les autres ne sont pas retouchées
+    a_reprendre = nettoye.copy()
+    a_reprendre['cin'] = BRUT['cin']
+    sortie = io.StringIO()
+    with redirect_stdout(sortie):
+        repris = nettoyer_donnees(a_reprendre, a_partir_de='nettoyer_et_formater_cin', nb_fils=1)
+    assert "Reprise du nettoyage à partir de 'nettoyer_et_formater_cin'" in sortie.getvalue()
+    assert 'Nettoyage Général' not in sortie.getvalue()
+    assert _valeurs_par_colonne(repris) == _valeurs_par_colonne(nettoye)
+
+def test_reprise_etape_inconnue():
+    with pytest.raises(ValueError, match='Étape de nettoyage inconnue'):
+        nettoyer_donnees(BRUT.copy(), a_partir_de='inexistante')
+
+
+# --- Cache des valeurs uniques ---
+
+VALEURS_DE_TYPES_MELES = [1, 1.0, '1', True, None, np.nan, 1.0, '1']
+
+def _noms_types(valeurs: pd.Series) -> pd.Series:
+    return valeurs.map(lambda valeur: type(valeur).__name__)
+
+def test_cle_de_cache_separe_les_types():
+    assert len({data_cleaner._cle_valeur(v) for v in [1, 1.0, '1', True, None, np.nan, pd.NA, pd.NaT]}) == 8
+
+@pytest.mark.parametrize('cache_chaud', [False, True])
+def test_valeurs_egales_de_types_differents(cache_chaud):
+    vider_cache_valeurs_uniques()
+    serie = pd.Series(VALEURS_DE_TYPES_MELES, dtype=object)
+    attendu = ['int', 'float', 'str', 'bool', 'NoneType', 'float', 'float', 'str']
+    if cache_chaud:
+        # Le cache est alimenté dans un autre ordre : chaque type retrouve son propre résultat
+        appliquer_par_valeurs_uniques(serie.iloc[::-1], _noms_types, 'types')
+    assert appliquer_par_valeurs_uniques(serie, _noms_types, 'types').tolist() == attendu
+    combinaisons = appliquer_par_combinaisons_uniques(
+        serie.to_frame('valeur'), lambda df: _noms_types(df['valeur']), 'types_combinaisons'
+    )
+    assert combinaisons.tolist() == attendu
+
+
+# --- Formatage vectorisé du CIN et du téléphone ---
+
+def _cin_par_valeur(valeur):
+    """Ancienne version, valeur par valeur (apply)."""
+    chaine = re.sub(r'[^\d]', '', str(valeur))[:12]
+    if len(chaine) != 12:
+        return pd.NA
+    return f"{chaine[0:3]}-{chaine[3:6]}-{chaine[6:9]}-{chaine[9:12]}"
+
+def _telephone_par_valeur(valeur):
+    """Ancienne version, valeur par valeur (apply)."""
+    chaine = re.sub(r'[^\d]', '', str(valeur))
+    if not chaine:
+        return pd.NA
+    chaine_locale = chaine[3:] if chaine.startswith('261') else chaine
+    if len(chaine_locale) == 9:
+        numero = '0' + chaine_locale
+    elif len(chaine_locale) == 10:
+        numero = chaine_locale
+    else:
+        return pd.NA
+    return f"{numero[0:3]} {numero[3:5]} {numero[5:8]} {numero[8:10]}"
+
+VALEURS_CIN = ['101 201 301 401', '101-201-301-401-999', 101201301401, 101201301401.0, 'CIN n°101201301401',
+               '10120130140', '', None, np.nan, pd.NA, 'inconnu', '1O1201301401']
+VALEURS_TELEPHONE = ['034 12 345 67', '+261 34 12 345 67', '261341234567', 341234567, 341234567.0,
+                     '0341234567', '03412345', '2610341234567', '', None, np.nan, pd.NA, 'n/a', '034.12.345.67']
+
+@pytest.mark.parametrize('moteur', ['pyarrow', 'object'])
+@pytest.mark.parametrize('formater, par_valeur, valeurs', [
+    (formater_cin, _cin_par_valeur, VALEURS_CIN),
+    (formater_telephone, _telephone_par_valeur, VALEURS_TELEPHONE),
+])
+def test_formatage_vectorise_identique_a_l_ancienne_version(moteur, formater, par_valeur, valeurs, monkeypatch):
+    if moteur == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    monkeypatch.setattr(config, 'MOTEUR_CHAINES', moteur)
+    serie = pd.Series(valeurs, dtype=object)
+    obtenu = formater(serie)
+    attendu = [par_valeur(valeur) for valeur in valeurs]
+    assert [None if pd.isna(v) else v for v in obtenu] == [None if pd.isna(v) else v for v in attendu]
+    assert obtenu.index.equals(serie.index)
@@ -0,0 +1,45 @@
+# test_dates.py
+
+import datetime
+import io
+import warnings
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_cleaner import analyser_dates, traiter_naissance_date, vider_cache_valeurs_uniques
+
+
+def _dates(*valeurs) -> list:
+    return analyser_dates(pd.Series(valeurs, dtype=object)).tolist()
+
+
+@pytest.mark.parametrize('valeur', [1995, 1995.0, np.int64(1995), '1995'])
+def test_annee_seule(valeur):
+    assert _dates(valeur) == [pd.Timestamp('1995-01-01')]
+
+def test_numero_de_serie_excel():
+    assert _dates(36526, 36526.5) == [pd.Timestamp('2000-01-01'), pd.Timestamp('2000-01-01 12:00')]
+
+@pytest.mark.parametrize('valeur', [500, 1995.5, 2200, -3])
+def test_nombres_non_plausibles(valeur):
+    assert pd.isna(_dates(valeur)[0])
+
+def test_textes_et_objets_date():
+    assert _dates('12/03/1990', datetime.datetime(2001, 2, 3), 'inconnu', None) == [
+        pd.Timestamp('1990-03-12'), pd.Timestamp('2001-02-03'), pd.NaT, pd.NaT
+    ]
+
+def test_nombres_sans_avertissement():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        _dates(1995, 36526, 'vers 1990')
+
+def test_naissance_annee_cellule_numerique():
+    vider_cache_valeurs_uniques()
+    df = pd.DataFrame({'naissance_date': pd.Series([1995, 'vers 1990', '12/03/1990'], dtype=object)})
+    with redirect_stdout(io.StringIO()):
+        df = traiter_naissance_date(df)
+    assert df['naissance_annee'].tolist() == [1995, 1990, 1990]
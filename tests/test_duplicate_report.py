@@ -0,0 +1,95 @@
+# test_duplicate_report.py
+
+import io
+from contextlib import redirect_stdout, redirect_stderr
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import config
+
+from student_code_manager import gerer_code_etudiant_et_consolider
+from duplicate_report import (
+    liste_aretes, extraire_lignes_liees, rapport_doublons_etudiants, rapport_doublons_inscriptions,
+    ecrire_rapports_doublons
+)
+
+CLES = ['np_cin', 'np_telephone', 'registre']
+
+
+def _lignes() -> pd.DataFrame:
+    """Cinq lignes sources : un étudiant sur les lignes 0, 2 et 3, un autre sur la ligne 1, un troisième sur la 4."""
+    return pd.DataFrame({
+        'id_temporaire': [1, 2, 3, 4, 5],
+        'code_etudiant': ['ETU2020_000001', 'ETU2021_000002', 'ETU2020_000001', 'ETU2020_000001', 'ETU2022_000003'],
+        'nom': ['RAKOTO', 'RABE', 'RAKOTOO', 'RAKOTO', 'ANDRIA'],
+        'cin': ['101', '202', '101', None, '303'],
+    })
+
+def _aretes() -> pd.DataFrame:
+    # Lien par CIN entre les lignes 0 et 2 (tour 1), puis par téléphone entre 2 et 3 (tour 2)
+    return liste_aretes([(np.array([2]), np.array([0]), 'np_cin'), (np.array([3]), np.array([2]), 'np_telephone')], CLES)
+
+
+def test_liste_aretes_compacte():
+    aretes = _aretes()
+    assert aretes['ligne_a'].tolist() == [2, 3] and aretes['ligne_b'].tolist() == [0, 2]
+    assert aretes['ligne_a'].dtype == np.int32
+    assert aretes['cle'].tolist() == ['np_cin', 'np_telephone']
+    assert aretes['cle'].cat.categories.tolist() == CLES
+
+def test_liste_aretes_vide():
+    aretes = liste_aretes([], CLES)
+    assert aretes.empty and aretes['cle'].cat.categories.tolist() == CLES
+
+def test_rapport_doublons_etudiants():
+    rapport = rapport_doublons_etudiants(_lignes(), _aretes(), colonnes=['nom', 'cin'])
+    # Seules les lignes de l'étudiant à plusieurs lignes, chacune avec son premier lien enregistré
+    assert rapport['ligne'].tolist() == [1, 3, 4]
+    assert rapport['taille_groupe'].tolist() == [3, 3, 3]
+    assert rapport['ligne_liee'].tolist() == [3, 1, 3]
+    assert rapport['cle_lien'].tolist() == ['np_cin', 'np_cin', 'np_telephone']
+    assert rapport['nom'].tolist() == ['RAKOTO', 'RAKOTOO', 'RAKOTO']
+
+def test_lignes_liees_meme_rapport():
+    df = _lignes()
+    liens, lignes = extraire_lignes_liees(df, _aretes(), colonnes=['nom', 'cin'])
+    assert len(lignes) == 3
+    # La consolidation qui suit ne touche pas l'extrait
+    df['nom'] = 'CONSOLIDE'
+    pd.testing.assert_frame_equal(rapport_doublons_etudiants(lignes, liens, colonnes=['nom', 'cin']),
+                                  rapport_doublons_etudiants(_lignes(), _aretes(), colonnes=['nom', 'cin']))
+
+def test_rapport_doublons_inscriptions():
+    df = pd.DataFrame({
+        'code_etudiant': ['E1', 'E1', 'E1', 'E2'],
+        'semestre_id':   ['S01', 'S01', 'S02', 'S01'],
+        'composante':    ['FAC_A', 'FAC_B', 'FAC_A', 'FAC_A'],
+    })
+    cle = ['code_etudiant', 'semestre_id']
+    candidates = np.array([True, True, True, False])
+    conservees = np.array([True, False, True, True])
+    rapport = rapport_doublons_inscriptions(df, cle, candidates, conservees)
+    assert rapport.columns.tolist() == cle + ['conservee', 'composante']
+    assert rapport['composante'].tolist() == ['FAC_A', 'FAC_B']
+    assert rapport['conservee'].tolist() == [True, False]
+
+def test_ecriture_dans_le_dossier_demande(tmp_path):
+    liens, lignes = extraire_lignes_liees(_lignes(), _aretes())
+    chemins = ecrire_rapports_doublons({'etudiants': (liens, lignes)}, str(tmp_path), 'csv')
+    assert [p.name for p in tmp_path.iterdir()] == ['liste_doublons_etudiants.csv']
+    assert len(pd.read_csv(chemins[0])) == 3
+
+def test_etape_conserve_les_liens_sans_ecrire(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'DOSSIER_SORTIE', str(tmp_path / 'sortie'))
+    monkeypatch.setattr(config, 'REGISTRE_ETUDIANTS_ACTIF', False)
+    monkeypatch.setattr(config, 'NB_PROCESSUS_CHAINAGE', 1)
+    df = pd.DataFrame({'nom': ['RAKOTO', 'RAKOTO', 'RABE'], 'prenoms': ['JEAN', 'JEAN', 'HERY'],
+                       'cin': ['101', '101', '202'], 'annee_universitaire': ['2020-2021', '2021-2022', '2020-2021']})
+    doublons = {}
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        gerer_code_etudiant_et_consolider(df, doublons=doublons)
+    assert not (tmp_path / 'sortie').exists()
+    aretes, lignes = doublons['etudiants']
+    assert len(aretes) >= 1 and lignes['id_temporaire'].tolist() == [1, 2]
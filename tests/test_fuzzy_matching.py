@@ -0,0 +1,74 @@
+# test_fuzzy_matching.py
+
+import io
+from contextlib import redirect_stdout
+
+import pandas as pd
+import pytest
+
+import config
+from fuzzy_matching import cle_nom_approche, paires_candidates
+from normalized_columns import vider_cache_formes
+from student_code_manager import gerer_code_etudiant_et_consolider
+
+
+def _personnes(*lignes) -> pd.DataFrame:
+    """Lignes (nom, prenoms, naissance, cin) ; seuls la date de naissance et le CIN servent au blocage."""
+    vider_cache_formes()
+    return pd.DataFrame({
+        'nom': [nom for nom, _, _, _ in lignes],
+        'prenoms': [prenoms for _, prenoms, _, _ in lignes],
+        'naissance_date': [pd.Timestamp(naissance) if naissance else pd.NaT for _, _, naissance, _ in lignes],
+        'cin': pd.Series([cin for _, _, _, cin in lignes], dtype=object),
+    })
+
+def _reliees(cles: pd.Series) -> list:
+    """Groupes de positions qui partagent une clé (les lignes sans clé sont omises)."""
+    return sorted(sorted(groupe.tolist()) for _, groupe in cles.dropna().groupby(cles.dropna()).groups.items())
+
+
+def test_faute_de_frappe_reliee():
+    df = _personnes(
+        ('RAKOTONIRINA', 'Jean', '2000-01-01', None),
+        ('RAKOTONIRINY', 'Jean', '2000-01-01', None), # faute de frappe, même date de naissance
+        ('ANDRIA', 'Jean', '2000-01-01', None),       # même date, autre nom
+    )
+    assert _reliees(cle_nom_approche(df)) == [[0, 1]]
+
+def test_nom_et_prenoms_inverses_relies():
+    df = _personnes(('RABE', 'Hery', None, '101'), ('HERY', 'Rabe', None, '101'))
+    paires = paires_candidates(df)
+    assert paires[['ligne_a', 'ligne_b']].values.tolist() == [[0, 1]]
+    assert paires['similarite'].tolist() == [1.0]
+    assert _reliees(cle_nom_approche(df)) == [[0, 1]]
+
+def test_sans_attribut_commun_non_relies():
+    df = _personnes(('RAKOTONIRINA', 'Jean', '2000-01-01', None), ('RAKOTONIRINY', 'Jean', '1999-01-01', None))
+    assert paires_candidates(df).empty
+    assert cle_nom_approche(df).isna().all()
+
+def test_bloc_trop_grand_ignore(monkeypatch):
+    lignes = [('RAKOTONIRINA', 'Jean', '2000-01-01', None), ('RAKOTONIRINY', 'Jean', '2000-01-01', None),
+              ('RAKOTONIRINA', 'Jeans', '2000-01-01', None)]
+    monkeypatch.setattr(config, 'TAILLE_MAX_BLOC_APPROCHE', 3)
+    assert _reliees(cle_nom_approche(_personnes(*lignes))) == [[0, 1, 2]]
+    # Bloc de 3 lignes (même date de naissance, même préfixe) au-delà de la limite : aucune comparaison
+    monkeypatch.setattr(config, 'TAILLE_MAX_BLOC_APPROCHE', 2)
+    assert paires_candidates(_personnes(*lignes)).empty
+    assert cle_nom_approche(_personnes(*lignes)).isna().all()
+
+@pytest.mark.parametrize('actif', [False, True])
+def test_appariement_approche_dans_le_chainage(actif, monkeypatch):
+    monkeypatch.setattr(config, 'APPARIEMENT_APPROCHE_ACTIF', actif)
+    monkeypatch.setattr(config, 'REGISTRE_ETUDIANTS_ACTIF', False)
+    monkeypatch.setattr(config, 'NB_PROCESSUS_CHAINAGE', 1)
+    df = pd.DataFrame({
+        'nom': ['RAKOTONIRINA', 'RAKOTONIRINY'], 'prenoms': ['Jean', 'Jean'],
+        'naissance_date': [pd.Timestamp('2000-01-01')] * 2, 'cin': [None, None], 'telephone': [None, None],
+        'cin_lieu': ['LIEU1', 'LIEU2'], 'mail': ['a@x.mg', 'b@x.mg'], 'composante': ['FAC', 'FAC'],
+        'mention': ['M0', 'M1'], 'annee_universitaire': ['2020-2021', '2021-2022'],
+    })
+    vider_cache_formes()
+    with redirect_stdout(io.StringIO()):
+        codes = gerer_code_etudiant_et_consolider(df)['code_etudiant']
+    assert (codes.nunique() == 1) == actif
@@ -0,0 +1,22 @@
+# test_incremental_manager.py
+
+import config
+import incremental_manager
+from incremental_manager import signature_manifeste
+
+
+def test_signature_suit_la_version_du_nettoyage(monkeypatch):
+    signature = signature_manifeste()
+    monkeypatch.setattr(incremental_manager, 'VERSION_NETTOYAGE', incremental_manager.VERSION_NETTOYAGE + 1)
+    assert signature_manifeste() != signature
+
+def test_signature_suit_la_config_du_nettoyage(monkeypatch):
+    signature = signature_manifeste()
+    monkeypatch.setattr(config, 'COLONNES_CATEGORIELLES', list(config.COLONNES_CATEGORIELLES) + ['sexe_bis'])
+    assert signature_manifeste() != signature
+
+def test_parametres_d_execution_hors_signature(monkeypatch):
+    signature = signature_manifeste()
+    monkeypatch.setattr(config, 'NB_FILS_NETTOYAGE', config.NB_FILS_NETTOYAGE + 3)
+    monkeypatch.setattr(config, 'TAILLE_CACHE_VALEURS_UNIQUES', 10)
+    assert signature_manifeste() == signature
@@ -0,0 +1,50 @@
+# test_inscription_semestre.py
+
+import io
+from contextlib import redirect_stdout
+
+import pandas as pd
+import pytest
+
+import config
+from categorical_encoding import encoder_categoriel
+from data_cleaner import traiter_colonne_semestre, COLONNES_SEMESTRES
+from inscription_semestre_code_manager import exploser_par_semestre
+
+
+def _explosion_par_melt(df: pd.DataFrame, semestre_cols: list) -> pd.DataFrame:
+    """Ancienne version (melt sur toutes les colonnes, puis filtre inscrit == 1)."""
+    id_vars_list = [col for col in df.columns if col not in semestre_cols]
+    df_melted = df.melt(id_vars=id_vars_list, value_vars=semestre_cols, var_name='semestre_id', value_name='inscrit')
+    df_semestres = df_melted[df_melted['inscrit'] == 1].drop(columns=['inscrit'])
+    if config.ENCODAGE_CATEGORIEL_ACTIF:
+        df_semestres['semestre_id'] = encoder_categoriel(df_semestres['semestre_id'])
+    return df_semestres
+
+def _inscriptions() -> pd.DataFrame:
+    df = pd.DataFrame({
+        'code_etudiant': ['ETU1', 'ETU2', 'ETU3', 'ETU4', 'ETU5'],
+        'annee_universitaire': pd.Categorical(['2022-2023', '2022-2023', '2023-2024', '2023-2024', '2023-2024']),
+        'id_Parcours': ['P1', 'P2', None, 'P1', 'P3'],
+        'semestre': ['S1-S2', 'S3 et S5', None, 'illisible', 'S16'],
+        'niveau': ['L1', 'L2', 'M1', None, 'D3'],
+    }, index=[10, 11, 12, 13, 14])
+    with redirect_stdout(io.StringIO()):
+        return traiter_colonne_semestre(df)
+
+
+@pytest.mark.parametrize('encodage', [False, True])
+@pytest.mark.parametrize('avec_masque', [True, False])
+def test_explosion_identique_au_melt(encodage, avec_masque, monkeypatch):
+    monkeypatch.setattr(config, 'ENCODAGE_CATEGORIEL_ACTIF', encodage)
+    df = _inscriptions()
+    if not avec_masque:
+        # Colonnes S01-S16 seules (ancien format) : une cellule manquante n'est pas une inscription
+        df = df.drop(columns='semestres_masque')
+        df.loc[11, 'S03'] = pd.NA
+    attendu = _explosion_par_melt(df.copy(), COLONNES_SEMESTRES)
+    obtenu = exploser_par_semestre(df, COLONNES_SEMESTRES)
+    pd.testing.assert_frame_equal(obtenu, attendu)
+    # La ligne 'illisible' sans niveau n'a aucun semestre
+    assert 'ETU4' not in obtenu['code_etudiant'].tolist()
+    assert not any(col in df.columns for col in COLONNES_SEMESTRES)
@@ -0,0 +1,74 @@
+# test_key_hashing.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import key_hashing
+from key_hashing import hacher_cle
+
+
+def test_valeurs_egales_meme_empreinte_na_conserves():
+    cles = hacher_cle(pd.Series(['A_1', None, 'B_2', 'A_1']))
+    assert str(cles.dtype) == 'Int64'
+    assert cles.isna().tolist() == [False, True, False, False]
+    assert cles[0] == cles[3] and cles[0] != cles[2]
+
+@pytest.mark.parametrize('algorithme', ['SHA256', 'md5', 'siphash'])
+def test_empreinte_stable_par_algorithme(algorithme):
+    serie = pd.Series(['RAKOTOJEAN_101', 'RABE_0341'])
+    assert hacher_cle(serie, algorithme).equals(hacher_cle(serie.iloc[::-1].reset_index(drop=True), algorithme).iloc[::-1]
+                                                .reset_index(drop=True))
+
+def test_algorithme_inconnu():
+    with pytest.raises(ValueError, match='Algorithme de hachage inconnu'):
+        hacher_cle(pd.Series(['A']), 'inexistant')
+
+def test_collision_forcee_rehachage_avec_sel(monkeypatch):
+    hacher_textes = key_hashing._hacher_textes
+
+    def hacher_en_collision(textes, algorithme):
+        # Tous les textes non salés ont la même empreinte ; les textes salés sont hachés normalement
+        empreintes = hacher_textes(textes, algorithme)
+        non_sales = np.array([not texte.startswith('#') for texte in textes], dtype=bool)
+        empreintes[non_sales] = 42
+        return empreintes
+
+    monkeypatch.setattr(key_hashing, '_hacher_textes', hacher_en_collision)
+    cles = hacher_cle(pd.Series(['A', 'B', 'A', 'C', None]))
+
+    # Le premier texte garde son empreinte, les suivants sont rehachés avec un sel : chaque texte
+    # distinct a sa propre empreinte et les regroupements restent ceux des textes
+    assert cles[0] == 42 and cles[2] == 42
+    assert cles[[0, 1, 3]].nunique() == 3
+    assert cles[1] == hacher_textes(np.array(['#1:B'], dtype=object), 'SHA256')[0]
+    assert pd.isna(cles[4])
+
+def test_collision_persistante_sels_successifs(monkeypatch):
+    hacher_textes = key_hashing._hacher_textes
+
+    def hacher_en_collision(textes, algorithme):
+        # Seul le sel #2 sépare les textes : le sel #1 retombe sur la même empreinte
+        empreintes = hacher_textes(textes, algorithme)
+        empreintes[np.array([not texte.startswith('#2:') for texte in textes], dtype=bool)] = 7
+        return empreintes
+
+    monkeypatch.setattr(key_hashing, '_hacher_textes', hacher_en_collision)
+    cles = hacher_cle(pd.Series(['A', 'B', 'C']))
+    assert cles.nunique() == 3
+    assert cles[0] == 7
+
+def test_collision_independante_de_l_ordre_des_lignes(monkeypatch):
+    hacher_textes = key_hashing._hacher_textes
+
+    def hacher_en_collision(textes, algorithme):
+        empreintes = hacher_textes(textes, algorithme)
+        empreintes[np.array([not texte.startswith('#') for texte in textes], dtype=bool)] = 42
+        return empreintes
+
+    monkeypatch.setattr(key_hashing, '_hacher_textes', hacher_en_collision)
+    # Le texte le plus petit garde l'empreinte, quel que soit l'ordre de chargement
+    dans_un_ordre = hacher_cle(pd.Series(['C', 'A', 'B']))
+    dans_l_autre = hacher_cle(pd.Series(['B', 'C', 'A']))
+    assert dict(zip(['C', 'A', 'B'], dans_un_ordre)) == dict(zip(['B', 'C', 'A'], dans_l_autre))
+    assert dans_un_ordre[1] == 42
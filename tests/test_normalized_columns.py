@@ -0,0 +1,69 @@
+# test_normalized_columns.py
+
+import io
+from contextlib import redirect_stdout
+
+import pandas as pd
+import pytest
+
+import config
+import normalized_columns
+from data_cleaner import nettoyer_donnees, vider_cache_valeurs_uniques
+from normalized_columns import forme_normalisee, invalider_formes, vider_cache_formes
+
+
+@pytest.fixture
+def derivations(monkeypatch):
+    """Cache actif et vide ; retourne la liste des formes effectivement calculées."""
+    monkeypatch.setattr(config, 'CACHE_FORMES_NORMALISEES_ACTIF', True)
+    vider_cache_formes()
+    calculees = []
+    deriver = normalized_columns._deriver
+
+    def deriver_compte(forme, textes):
+        calculees.append(forme)
+        return deriver(forme, textes)
+
+    monkeypatch.setattr(normalized_columns, '_deriver', deriver_compte)
+    yield calculees
+    vider_cache_formes()
+
+def _valeurs(serie: pd.Series) -> list:
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+
+def test_forme_reprise_sans_recalcul(derivations):
+    df = pd.DataFrame({'nom': [' rakoto ', 'Rabe', None]})
+    premiere = forme_normalisee(df['nom'], 'majuscules')
+    assert derivations == ['majuscules']
+    # Nouvel accès à la même colonne : rien n'est recalculé, et la forme dérivée part du cache
+    assert _valeurs(forme_normalisee(df['nom'], 'majuscules')) == _valeurs(premiere) == ['RAKOTO', 'RABE', 'NONE']
+    forme_normalisee(df['nom'], 'alphanumerique')
+    assert derivations == ['majuscules', 'alphanumerique']
+
+def test_colonne_remplacee_recalculee(derivations):
+    df = pd.DataFrame({'nom': ['rakoto', 'rabe']})
+    forme_normalisee(df['nom'], 'majuscules')
+    df['nom'] = ['andria', 'rabe']
+    assert _valeurs(forme_normalisee(df['nom'], 'majuscules')) == ['ANDRIA', 'RABE']
+    assert derivations == ['majuscules', 'majuscules']
+
+def test_meme_nom_autre_dataframe_recalcule(derivations):
+    forme_normalisee(pd.Series(['a', 'b'], name='nom'), 'majuscules')
+    assert _valeurs(forme_normalisee(pd.Series(['c', 'd'], name='nom'), 'majuscules')) == ['C', 'D']
+    assert derivations == ['majuscules', 'majuscules']
+
+def test_modification_sur_place_invalidee(derivations):
+    df = pd.DataFrame({'nom': ['rakoto', 'rabe']})
+    forme_normalisee(df['nom'], 'majuscules')
+    df.loc[0, 'nom'] = 'andria'
+    invalider_formes(['nom'])
+    assert _valeurs(forme_normalisee(df['nom'], 'majuscules')) == ['ANDRIA', 'RABE']
+
+def test_etape_de_nettoyage_invalide_ses_colonnes_ecrites(derivations):
+    vider_cache_valeurs_uniques()
+    df = pd.DataFrame({'composante': ['fac', 'ens'], 'mention': ['eco', 'maths'], 'institution_id': ['U1', 'U1']})
+    forme_normalisee(df['mention'], 'majuscules')
+    with redirect_stdout(io.StringIO()):
+        nettoyer_donnees(df, nb_fils=1)
+    assert 'mention' not in normalized_columns._CACHE
@@ -0,0 +1,68 @@
+# test_string_engine.py
+
+import io
+from contextlib import redirect_stdout
+
+import pandas as pd
+import pytest
+
+import config
+from data_cleaner import nettoyer_donnees, vider_cache_valeurs_uniques
+from normalized_columns import vider_cache_formes
+from student_code_manager import KEY_COLUMNS, standardiser_champs_pour_hachage, creer_cles_de_concatenation
+
+MOTEURS = ['pyarrow', 'object']
+
+# Accents et lettres hors ASCII, valeurs manquantes de plusieurs types, textes faits d'espaces
+# (y compris insécables et Unicode, que str.strip() retire aussi)
+LIGNES = pd.DataFrame({
+    'nom':            ['Rakôtoarisoa', ' ANDRIA ', None, '   ', 'Ñandú', 'rabe', '　'],
+    'prenoms':        ['Jean-Éric', pd.NA, 'Solo', 'Hery', 'José', float('nan'), 'Mialy'],
+    'cin':            ['101 201 301 401', None, '\t', '102-202', '1O1', '101201301401', ''],
+    'telephone':      ['034 12 345 67', '+261 33 00 000 00', None, ' ', '0321234567', 'n/a', '034.12.345.67'],
+    'naissance_date': ['12/03/1990', '1990-03-12', None, 'vers 1995', '  ', 36526, '31/02/1990'],
+    'cin_lieu':       ['Antananarivo', 'Fianarantsoa ', None, ' ', 'Toamasina', 'Mahajanga', 'Toliara'],
+    'mail':           ['Jean@X.mg ', None, '', 'hery@x.mg', 'jose@x.mg', ' ', 'mialy@x.mg'],
+    'composante':     ['Faculté DEGS', 'ENS', None, '  ', 'Faculté DEGS', 'ENS', 'ENS'],
+    'mention':        ['Économie', 'Maths', 'Maths', None, 'Économie', ' ', 'Maths'],
+    'annee_universitaire': ['2023-2024'] * 7,
+    'institution_id': ['U1'] * 7,
+})
+
+
+def _cles(moteur: str, monkeypatch) -> pd.DataFrame:
+    """Nettoyage puis clés de chaînage avec le moteur demandé (caches vidés)."""
+    monkeypatch.setattr(config, 'MOTEUR_CHAINES', moteur)
+    vider_cache_valeurs_uniques()
+    vider_cache_formes()
+    with redirect_stdout(io.StringIO()):
+        df = nettoyer_donnees(LIGNES.copy())
+        df = creer_cles_de_concatenation(standardiser_champs_pour_hachage(df))
+    return df
+
+
+@pytest.mark.parametrize('moteur', MOTEURS)
+def test_textes_vides_et_espaces(moteur, monkeypatch):
+    df = _cles(moteur, monkeypatch)
+    # Un texte fait d'espaces (y compris insécables ou Unicode) devient une valeur manquante
+    assert df.loc[[3, 6], 'nom'].isna().all()
+    assert df.loc[[3], 'telephone'].isna().all()
+    assert df.loc[0, 'nom'] == 'Rakôtoarisoa' and df.loc[4, 'nom'] == 'Ñandú'
+
+@pytest.mark.parametrize('moteur', MOTEURS)
+def test_memes_cles_que_le_moteur_object(moteur, monkeypatch):
+    pytest.importorskip('pyarrow')
+    reference = _cles('object', monkeypatch)
+    obtenu = _cles(moteur, monkeypatch)
+    for col in KEY_COLUMNS + ['nom_prenoms_standard']:
+        assert obtenu[col].astype(object).where(obtenu[col].notna(), None).tolist() == \
+            reference[col].astype(object).where(reference[col].notna(), None).tolist(), col
+
+@pytest.mark.parametrize('moteur', MOTEURS)
+def test_memes_colonnes_nettoyees(moteur, monkeypatch):
+    pytest.importorskip('pyarrow')
+    reference = _cles('object', monkeypatch)
+    obtenu = _cles(moteur, monkeypatch)
+    for col in ['nom', 'prenoms', 'cin', 'telephone', 'cin_lieu', 'mail', 'composante', 'mention']:
+        assert obtenu[col].astype(object).where(obtenu[col].notna(), None).tolist() == \
+            reference[col].astype(object).where(reference[col].notna(), None).tolist(), col
@@ -0,0 +1,65 @@
+# test_student_registry.py
+
+import io
+from contextlib import redirect_stdout, redirect_stderr
+from itertools import count
+
+import pandas as pd
+import pytest
+
+import config
+from student_code_manager import gerer_code_etudiant_et_consolider
+
+
+@pytest.fixture
+def registre(tmp_path, monkeypatch):
+    """Registre actif dans un dossier temporaire, sans appariement approché."""
+    monkeypatch.setattr(config, 'REGISTRE_ETUDIANTS_ACTIF', True)
+    monkeypatch.setattr(config, 'APPARIEMENT_APPROCHE_ACTIF', False)
+    monkeypatch.setattr(config, 'NB_PROCESSUS_CHAINAGE', 1)
+    monkeypatch.setattr(config, 'FICHIER_REGISTRE_ETUDIANTS', str(tmp_path / 'registre.sqlite'))
+
+    def executer(lignes: list) -> pd.DataFrame:
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            return gerer_code_etudiant_et_consolider(pd.DataFrame(lignes))
+    return executer
+
+_numeros = count()
+
+def _ligne(cin=None, telephone=None, naissance=None, mention='M0', annee='2020-2021') -> dict:
+    # Lieu de CIN et mail propres à chaque ligne : seules les clés choisies relient les lignes
+    numero = next(_numeros)
+    return {
+        'nom': 'RAKOTO', 'prenoms': 'JEAN', 'cin': cin, 'telephone': telephone,
+        'naissance_date': pd.Timestamp(naissance) if naissance else pd.NaT,
+        'composante': 'FAC', 'mention': mention, 'annee_universitaire': annee,
+        'cin_lieu': f'LIEU{numero}', 'mail': f'e{numero}@x.mg',
+    }
+
+
+def test_code_repris_a_l_execution_suivante(registre):
+    premier = registre([_ligne('101', '0341', '2000-01-01')])
+    suivant = registre([_ligne('101', '0349', mention='M1', annee='2021-2022')])
+    assert suivant['code_etudiant'].tolist() == premier['code_etudiant'].tolist() == ['ETU2020_000001']
+
+def test_groupes_du_meme_code_reunis(registre):
+    registre([_ligne('101', '0341', '2000-01-01')])
+    # Deux groupes non reliés entre eux retrouvent le même étudiant, l'un par np_cin, l'autre par np_telephone
+    resultat = registre([
+        _ligne('101', '0349', mention='M1', annee='2021-2022'),
+        _ligne(None, '0341', '2000-01-01', mention='M2', annee='2021-2022'),
+    ])
+    assert resultat['code_etudiant'].tolist() == ['ETU2020_000001', 'ETU2020_000001']
+    # Consolidés comme un seul étudiant
+    assert resultat['cin'].tolist() == ['101', '101']
+    assert resultat['naissance_date'].nunique() == 1
+
+def test_groupe_en_contradiction_nouvelle_sequence_stable(registre):
+    registre([_ligne('101', '0341', '2000-01-01')])
+    lignes = [
+        _ligne('101', '0349', '2000-01-01', mention='M1', annee='2021-2022'),
+        _ligne('202', '0341', mention='M2', annee='2021-2022'), # même téléphone, autre CIN
+    ]
+    resultat = registre(lignes)
+    assert resultat['code_etudiant'].tolist() == ['ETU2020_000001', 'ETU2021_000002']
+    assert registre(lignes)['code_etudiant'].tolist() == resultat['code_etudiant'].tolist()
@@ -0,0 +1,89 @@
+# test_workbook_cache.py
+
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import workbook_cache
+from workbook_cache import (
+    calculer_empreinte, charger_index, sauver_index, lire_depuis_cache, ecrire_dans_cache,
+    evincer_entrees, invalider_cache, ecrire_frame_colonnaire, lire_frame_colonnaire
+)
+
+pytest.importorskip('pyarrow')
+
+
+def _classeur_lu() -> pd.DataFrame:
+    """Colonnes telles que les produit pd.read_excel : 'object' mixtes, NaN, nombres et dates."""
+    return pd.DataFrame({
+        'nom': ['Rakoto', np.nan, 'Rabe'],
+        'cin': ['101 201', 101201301401, np.nan],
+        'naissance_date': [datetime.datetime(2000, 1, 2), '12/03/1990', 36526],
+        'note': [12.5, 3, True],
+        'annee': [2021, 2022, 2023],
+    })
+
+def _source(tmp_path, nom: str, contenu: bytes = b'classeur') -> str:
+    chemin = tmp_path / nom
+    chemin.write_bytes(contenu)
+    return str(chemin)
+
+
+def test_aller_retour_colonnes_mixtes(tmp_path):
+    df = _classeur_lu()
+    chemin = str(tmp_path / 'frame.parquet')
+    ecrire_frame_colonnaire(df, chemin)
+    relu = lire_frame_colonnaire(chemin)
+    pd.testing.assert_frame_equal(relu, df)
+    # Chaque valeur garde son type Python (1 et 1.0, True et 1 ne se confondent pas)
+    for col in ['cin', 'naissance_date', 'note']:
+        assert [type(v) for v in relu[col]] == [type(v) for v in df[col]], col
+
+def test_valeur_non_encodable_pas_de_cache(tmp_path):
+    fichier = _source(tmp_path, 'a.xlsx')
+    index = {}
+    df = pd.DataFrame({'x': [object(), 'a']})
+    assert not ecrire_dans_cache(index, str(tmp_path / 'cache'), fichier, df, 'sig', calculer_empreinte(fichier))
+    assert index == {}
+
+def test_reprise_et_signature(tmp_path):
+    dossier = str(tmp_path / 'cache')
+    fichier = _source(tmp_path, 'a.xlsx')
+    index = {}
+    assert ecrire_dans_cache(index, dossier, fichier, _classeur_lu(), 'sig', calculer_empreinte(fichier))
+    pd.testing.assert_frame_equal(lire_depuis_cache(index, dossier, fichier, 'sig'), _classeur_lu())
+    assert lire_depuis_cache(index, dossier, fichier, 'autre') is None
+    # Contenu modifié : l'entrée n'est plus reprise
+    _source(tmp_path, 'a.xlsx', b'classeur modifie')
+    assert lire_depuis_cache(index, dossier, fichier, 'sig') is None
+
+def test_eviction_lru(tmp_path):
+    dossier = str(tmp_path / 'cache')
+    index = {}
+    fichiers = [_source(tmp_path, f'{nom}.xlsx') for nom in 'abc']
+    for fichier in fichiers:
+        ecrire_dans_cache(index, dossier, fichier, _classeur_lu(), 'sig', calculer_empreinte(fichier))
+    # 'a' est le plus récemment utilisé : 'b' puis 'c' sont évincés en premier
+    for numero, fichier in enumerate([fichiers[1], fichiers[2], fichiers[0]]):
+        index[os.path.abspath(fichier)]['dernier_acces'] = numero
+    taille_entree = max(entree['taille_cache'] for entree in index.values())
+    assert evincer_entrees(index, dossier, taille_entree) == 2
+    assert list(index) == [os.path.abspath(fichiers[0])]
+    assert sorted(os.listdir(dossier)) == [index[os.path.abspath(fichiers[0])]['fichier_cache']]
+
+def test_invalider_cache(tmp_path):
+    dossier = str(tmp_path / 'cache')
+    index = {}
+    fichiers = [_source(tmp_path, f'{nom}.xlsx') for nom in 'ab']
+    for fichier in fichiers:
+        ecrire_dans_cache(index, dossier, fichier, _classeur_lu(), 'sig', calculer_empreinte(fichier))
+    sauver_index(index, dossier)
+
+    assert invalider_cache(dossier, [fichiers[0]]) == 1
+    assert list(charger_index(dossier)) == [os.path.abspath(fichiers[1])]
+    assert invalider_cache(dossier) == 1
+    assert charger_index(dossier) == {}
+    assert os.listdir(dossier) == [workbook_cache.NOM_FICHIER_INDEX]
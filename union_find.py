@@ -0,0 +1,83 @@
+# union_find.py
+
+import numpy as np
+import pandas as pd
+
+
+# --- Arêtes ---
+
+def aretes_par_cle(valeurs: pd.Series) -> tuple:
+    """
+    Arêtes (sources, cibles) reliant chaque ligne à la première ligne portant la même valeur
+    (positions 0..n-1). Les valeurs manquantes ne relient rien. Une clé partagée par k lignes
+    donne k - 1 arêtes au lieu des k * (k - 1) / 2 paires.
+    """
+    codes, _ = pd.factorize(valeurs, use_na_sentinel=True)
+    positions = np.flatnonzero(codes >= 0)
+    codes = codes[positions]
+    # Les codes sont numérotés dans l'ordre d'apparition : premiers[code] = première ligne du groupe
+    _, premiers = np.unique(codes, return_index=True)
+    cibles = positions[premiers[codes]]
+    liens = positions != cibles
+    return positions[liens], cibles[liens]
+
+
+# --- Composantes connexes ---
+
+def composantes_connexes(nb_noeuds: int, sources: np.ndarray, cibles: np.ndarray) -> np.ndarray:
+    """
+    Union-find vectorisé : pour chaque nœud (0..nb_noeuds-1), la racine de sa composante connexe,
+    qui est le plus petit nœud de la composante.
+
+    À chaque tour, la plus grande des deux racines de chaque arête est rattachée à la plus petite
+    (np.minimum.at), puis les chemins sont compressés par sauts de pointeurs jusqu'aux racines.
+    Les arêtes déjà internes à une composante sont écartées au fil des tours : le coût total est
+    quasi linéaire, quelle que soit la longueur des chaînes de liens.
+    """
+    parents = np.arange(nb_noeuds)
+    sources = np.asarray(sources, dtype=np.int64)
+    cibles = np.asarray(cibles, dtype=np.int64)
+
+    while len(sources):
+        racines_sources, racines_cibles = parents[sources], parents[cibles]
+        actives = racines_sources != racines_cibles
+        if not actives.any():
+            break
+        sources, cibles = sources[actives], cibles[actives]
+        racines_sources, racines_cibles = racines_sources[actives], racines_cibles[actives]
+
+        # Rattachement : un parent est toujours plus petit que son enfant, la forêt reste sans cycle
+        np.minimum.at(parents, np.maximum(racines_sources, racines_cibles),
+                      np.minimum(racines_sources, racines_cibles))
+
+        # Compression des chemins (sauts de pointeurs) : chaque nœud pointe sur sa racine
+        while True:
+            grands_parents = parents[parents]
+            if np.array_equal(grands_parents, parents):
+                break
+            parents = grands_parents
+
+    return parents
+
+
+# --- Résumés par composante ---
+
+def resumer_composantes(nb_noeuds: int, racines: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """
+    Résumé compact d'un attribut par composante, indexé par racine : le code de l'unique valeur
+    connue, -1 si aucune valeur n'est connue, -2 si plusieurs valeurs différentes coexistent.
+
+    `codes` suit la même convention (ex : pd.factorize, -1 = manquant) : on peut donc résumer des
+    lignes, ou combiner les résumés d'anciennes composantes fusionnées sans revenir aux lignes.
+    """
+    racines = np.asarray(racines, dtype=np.int64)
+    codes = np.asarray(codes, dtype=np.int64)
+    connues = codes >= 0
+    minimums = np.full(nb_noeuds, np.iinfo(np.int64).max, dtype=np.int64)
+    maximums = np.full(nb_noeuds, -1, dtype=np.int64)
+    np.minimum.at(minimums, racines[connues], codes[connues])
+    np.maximum.at(maximums, racines[connues], codes[connues])
+
+    resumes = np.where(maximums < 0, -1, np.where(minimums == maximums, minimums, -2))
+    resumes[racines[codes == -2]] = -2
+    return resumes
@@ -0,0 +1,291 @@
+# workbook_cache.py
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import datetime
+
+import pandas as pd
+import numpy as np
+
+# --- Dépendance optionnelle : le cache est désactivé si pyarrow n'est pas installé ---
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+NOM_FICHIER_INDEX = 'index_cache.json'
+CLE_METADONNEES = b'uf_cache'
+
+# Types Python acceptés dans une colonne 'object' mixte, avec le type de la sous-colonne Parquet associée
+TYPES_SOUS_COLONNES = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'datetime': datetime.datetime,
+}
+
+
+def cache_disponible() -> bool:
+    """Indique si le cache colonnaire peut être utilisé (pyarrow installé)."""
+    return pa is not None
+
+
+# --- Empreinte des fichiers sources ---
+
+def calculer_hash_contenu(fichier: str, taille_bloc: int = 1 << 20) -> str:
+    """Calcule le SHA256 du contenu d'un fichier, lu par blocs."""
+    sha = hashlib.sha256()
+    with open(fichier, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+def calculer_empreinte(fichier: str, avec_hash: bool = True) -> dict:
+    """Retourne l'empreinte d'un fichier : taille, date de modification et (optionnellement) hash du contenu."""
+    stat = os.stat(fichier)
+    empreinte = {'taille': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if avec_hash:
+        empreinte['sha256'] = calculer_hash_contenu(fichier)
+    return empreinte
+
+
+# --- Encodage colonnaire (Parquet) fidèle aux DataFrames lus par pd.read_excel ---
+
+def _type_sous_colonne(valeur) -> str:
+    """Nom de la sous-colonne typée d'une valeur non nulle d'une colonne 'object'."""
+    # bool avant int (bool est une sous-classe de int) ; pd.Timestamp est une sous-classe de datetime
+    for nom_type in ('bool', 'str', 'int', 'float', 'datetime'):
+        if isinstance(valeur, TYPES_SOUS_COLONNES[nom_type]):
+            return nom_type
+    raise TypeError(f"Type non pris en charge par le cache : {type(valeur).__name__}")
+
+def encoder_pour_parquet(df: pd.DataFrame):
+    """
+    Prépare un DataFrame pour l'écriture Parquet sans perte d'information :
+    - les colonnes sont renommées par position (les en-têtes Excel ne sont pas toujours des chaînes) ;
+    - les colonnes 'object' sont conservées comme 'object' à la relecture ;
+    - une colonne 'object' mélangeant plusieurs types (str, int, datetime...) est éclatée
+      en sous-colonnes typées, une par type Python rencontré.
+    Lève TypeError si une valeur n'est pas représentable (le fichier n'est alors pas mis en cache).
+    """
+    colonnes = {}
+    descriptions = []
+    for position, nom in enumerate(df.columns):
+        if not isinstance(nom, str):
+            raise TypeError(f"En-tête de colonne non textuel : {nom!r}")
+        serie = df.iloc[:, position]
+        cle = f'c{position}'
+        description = {'nom': nom, 'cle': cle, 'object': serie.dtype == object, 'sous_colonnes': []}
+
+        if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+            non_nulles = serie[serie.notna()]
+            types = non_nulles.map(_type_sous_colonne)
+            for nom_type in types.unique():
+                sous_cle = f'{cle}_{nom_type}'
+                valeurs = pd.Series(pd.NA, index=serie.index, dtype=object)
+                valeurs[types.index[types == nom_type]] = non_nulles[types == nom_type]
+                if nom_type == 'int':
+                    valeurs = valeurs.astype('Int64')
+                elif nom_type == 'float':
+                    valeurs = valeurs.astype('Float64')
+                elif nom_type == 'bool':
+                    valeurs = valeurs.astype('boolean')
+                elif nom_type == 'datetime':
+                    valeurs = pd.to_datetime(valeurs)
+                colonnes[sous_cle] = valeurs
+                description['sous_colonnes'].append([sous_cle, nom_type])
+        else:
+            colonnes[cle] = serie
+        descriptions.append(description)
+
+    df_encode = pd.DataFrame(colonnes, index=df.index)
+    return df_encode, descriptions
+
+def decoder_depuis_parquet(df_encode: pd.DataFrame, descriptions: list) -> pd.DataFrame:
+    """Reconstruit le DataFrame d'origine à partir de sa forme encodée (inverse de encoder_pour_parquet)."""
+    colonnes = []
+    for description in descriptions:
+        if description['sous_colonnes']:
+            valeurs = np.full(len(df_encode), np.nan, dtype=object)
+            for sous_cle, nom_type in description['sous_colonnes']:
+                sous_colonne = df_encode[sous_cle]
+                masque = sous_colonne.notna().to_numpy()
+                if nom_type == 'datetime':
+                    valeurs[masque] = [horodatage.to_pydatetime() for horodatage in sous_colonne[masque]]
+                else:
+                    valeurs[masque] = [TYPES_SOUS_COLONNES[nom_type](v) for v in sous_colonne[masque]]
+            serie = pd.Series(valeurs, index=df_encode.index)
+        else:
+            serie = df_encode[description['cle']]
+            if description['object']:
+                # pyarrow relit les valeurs manquantes en None : on rétablit le NaN produit par pd.read_excel
+                serie = serie.astype(object).where(serie.notna(), np.nan)
+        colonnes.append(serie)
+
+    df = pd.concat(colonnes, axis=1) if colonnes else pd.DataFrame(index=df_encode.index)
+    df.columns = [description['nom'] for description in descriptions]
+    return df
+
+def ecrire_frame_colonnaire(df: pd.DataFrame, chemin: str) -> None:
+    """Écrit un DataFrame au format Parquet en conservant noms et types de colonnes d'origine."""
+    df_encode, descriptions = encoder_pour_parquet(df.reset_index(drop=True))
+    table = pa.Table.from_pandas(df_encode, preserve_index=False)
+    metadonnees = dict(table.schema.metadata or {})
+    metadonnees[CLE_METADONNEES] = json.dumps(descriptions).encode('utf-8')
+    table = table.replace_schema_metadata(metadonnees)
+    pq.write_table(table, chemin)
+
+def lire_frame_colonnaire(chemin: str) -> pd.DataFrame:
+    """Relit un DataFrame écrit par ecrire_frame_colonnaire."""
+    table = pq.read_table(chemin)
+    descriptions = json.loads(table.schema.metadata[CLE_METADONNEES].decode('utf-8'))
+    return decoder_depuis_parquet(table.to_pandas(), descriptions)
+
+
+# --- Index du cache ---
+
+def charger_index(dossier_cache: str) -> dict:
+    """Charge l'index du cache (chemin source -> entrée). Retourne un index vide s'il n'existe pas."""
+    chemin_index = os.path.join(dossier_cache, NOM_FICHIER_INDEX)
+    if not os.path.exists(chemin_index):
+        return {}
+    try:
+        with open(chemin_index, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Index du cache illisible ({e}). Le cache est réinitialisé.")
+        return {}
+
+def sauver_index(index: dict, dossier_cache: str) -> None:
+    """Écrit l'index du cache de façon atomique."""
+    os.makedirs(dossier_cache, exist_ok=True)
+    chemin_index = os.path.join(dossier_cache, NOM_FICHIER_INDEX)
+    chemin_tmp = chemin_index + '.tmp'
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    os.replace(chemin_tmp, chemin_index)
+
+def _nom_fichier_cache(fichier: str) -> str:
+    return hashlib.sha256(os.path.abspath(fichier).encode('utf-8')).hexdigest()[:32] + '.parquet'
+
+def _supprimer_entree(index: dict, dossier_cache: str, cle: str) -> None:
+    entree = index.pop(cle, None)
+    if entree:
+        chemin = os.path.join(dossier_cache, entree['fichier_cache'])
+        if os.path.exists(chemin):
+            os.remove(chemin)
+
+
+# --- Lecture / écriture des classeurs en cache ---
+
+def lire_depuis_cache(index: dict, dossier_cache: str, fichier: str, signature: str):
+    """
+    Retourne le DataFrame en cache pour 'fichier' si son empreinte n'a pas changé, sinon None.
+    La taille et la date de modification sont vérifiées d'abord ; si seule la date diffère,
+    le hash du contenu décide (fichier recopié sans modification).
+    """
+    cle = os.path.abspath(fichier)
+    entree = index.get(cle)
+    if entree is None or entree.get('signature') != signature:
+        return None
+
+    empreinte = calculer_empreinte(fichier, avec_hash=False)
+    if empreinte['taille'] != entree['taille']:
+        return None
+    if empreinte['mtime_ns'] != entree['mtime_ns']:
+        if calculer_hash_contenu(fichier) != entree['sha256']:
+            return None
+        entree['mtime_ns'] = empreinte['mtime_ns']
+
+    chemin = os.path.join(dossier_cache, entree['fichier_cache'])
+    try:
+        df = lire_frame_colonnaire(chemin)
+    except Exception:
+        _supprimer_entree(index, dossier_cache, cle)
+        return None
+
+    entree['dernier_acces'] = time.time()
+    return df
+
+def ecrire_dans_cache(index: dict, dossier_cache: str, fichier: str, df: pd.DataFrame, signature: str,
+                      empreinte: dict) -> bool:
+    """
+    Enregistre le DataFrame lu depuis 'fichier' dans le cache, sous l'empreinte calculée AVANT la
+    lecture (un classeur enregistré pendant son analyse est ainsi relu à l'exécution suivante).
+    Retourne False si le DataFrame n'est pas encodable.
+    """
+    os.makedirs(dossier_cache, exist_ok=True)
+    cle = os.path.abspath(fichier)
+    nom_cache = _nom_fichier_cache(fichier)
+    chemin = os.path.join(dossier_cache, nom_cache)
+    try:
+        ecrire_frame_colonnaire(df, chemin)
+    except (TypeError, ValueError, OverflowError, pa.ArrowException) as e:
+        print(f"⚠️ {os.path.basename(fichier)} non mis en cache : {e}")
+        _supprimer_entree(index, dossier_cache, cle)
+        return False
+
+    entree = dict(empreinte)
+    entree.update({
+        'signature': signature,
+        'fichier_cache': nom_cache,
+        'taille_cache': os.path.getsize(chemin),
+        'dernier_acces': time.time(),
+    })
+    index[cle] = entree
+    return True
+
+def evincer_entrees(index: dict, dossier_cache: str, taille_max_octets: int) -> int:
+    """Supprime les entrées les moins récemment utilisées jusqu'à repasser sous la taille maximale. Retourne le nombre d'entrées évincées."""
+    taille_totale = sum(entree['taille_cache'] for entree in index.values())
+    evincees = 0
+    for cle, entree in sorted(index.items(), key=lambda item: item[1]['dernier_acces']):
+        if taille_totale <= taille_max_octets:
+            break
+        taille_totale -= entree['taille_cache']
+        _supprimer_entree(index, dossier_cache, cle)
+        evincees += 1
+    return evincees
+
+def invalider_cache(dossier_cache: str, fichiers: list = None) -> int:
+    """
+    Invalide le cache : toutes les entrées si 'fichiers' est vide, sinon uniquement celles des fichiers donnés.
+    Retourne le nombre d'entrées supprimées.
+    """
+    index = charger_index(dossier_cache)
+    if fichiers:
+        cles = [os.path.abspath(fichier) for fichier in fichiers if os.path.abspath(fichier) in index]
+    else:
+        cles = list(index.keys())
+
+    for cle in cles:
+        _supprimer_entree(index, dossier_cache, cle)
+
+    if os.path.isdir(dossier_cache):
+        sauver_index(index, dossier_cache)
+    return len(cles)
+
+
+# --- Commande d'administration du cache ---
+
+if __name__ == "__main__":
+    import config
+
+    parser = argparse.ArgumentParser(description="Gestion du cache des classeurs Excel analysés.")
+    parser.add_argument('--invalider', nargs='*', metavar='FICHIER',
+                        help="Invalide le cache (tous les fichiers si aucun chemin n'est donné).")
+    args = parser.parse_args()
+
+    if args.invalider is not None:
+        nb = invalider_cache(config.DOSSIER_CACHE, args.invalider)
+        print(f"✅ {nb} entrée(s) du cache invalidée(s) dans {config.DOSSIER_CACHE}.")
+    else:
+        index = charger_index(config.DOSSIER_CACHE)
+        taille_mo = sum(entree['taille_cache'] for entree in index.values()) / (1024 * 1024)
+        print(f"📦 Cache : {len(index)} classeur(s), {taille_mo:.1f} Mo (limite {config.CACHE_TAILLE_MAX_MO} Mo) dans {config.DOSSIER_CACHE}.")